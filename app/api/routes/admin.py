@@ -0,0 +1,139 @@
+import hashlib
+import hmac
+from typing import List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request
+from pydantic import ValidationError
+
+from app.config import settings
+from app.dtos.refresh_request import RefreshRequest
+from app.dtos.refresh_response import RefreshResponse
+from app.services.refresh_service import RefreshService
+
+router = APIRouter()
+
+SIGNATURE_HEADER = "x-webhook-signature"
+
+
+# ============================================================================
+# Admin controller for pushing page updates without a full recrawl
+# ============================================================================
+
+
+def get_refresh_service():
+    """
+    Dependency injection factory for RefreshService, closes its database session after the request
+    """
+    service = RefreshService()
+    try:
+        yield service
+    finally:
+        service.db.close()
+
+
+def require_admin_token(authorization: Optional[str] = Header(None)):
+    """
+    Check the Authorization: Bearer <settings.ADMIN_TOKEN> header
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin API is disabled, ADMIN_TOKEN is not set")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+
+def webhook_signature(body: bytes) -> str:
+    """
+    Expected X-Webhook-Signature of a webhook body
+    """
+    return "sha256=" + hmac.new(settings.REFRESH_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+def run_refresh(urls: List[str]):
+    """
+    Refresh in the background (webhook), errors are only logged
+    """
+    service = RefreshService()
+    try:
+        service.refresh(urls)
+    except HTTPException as e:
+        print(f"[Admin] @run_refresh: refresh rejected: {e.detail}")
+    except Exception as e:
+        print(f"[Admin] @run_refresh: refresh failed: {e}")
+    finally:
+        service.db.close()
+
+
+@router.post("/admin/refresh", dependencies=[Depends(require_admin_token)])
+def refresh_pages(request_data: RefreshRequest,
+                  service: RefreshService = Depends(get_refresh_service)) -> RefreshResponse:
+    """
+    Fetch and store the given pages now, instead of waiting for the next crawl
+
+    Args:
+        request_data (RefreshRequest): Request body containing:
+            - urls (list[str]): Pages of the crawled domain to refresh (at most settings.REFRESH_MAX_URLS)
+        service (RefreshService): Injected refresh service (automatic via Depends)
+
+    Returns:
+        RefreshResponse: Structured response containing:
+            - corpus_version (str): Corpus version after the refresh
+            - results (list[RefreshResult]): Per URL status: created, updated, unchanged, deleted (404/410),
+              not_found, skipped (other domain, not a text page), over_budget or failed, with a detail message
+
+    Raises:
+        HTTPException:
+            - 400 status code if there are no URLs or too many
+            - 401 status code if the admin token is missing or wrong
+            - 409 status code if a crawl is running
+            - 503 status code if ADMIN_TOKEN is not configured
+
+    Example:
+        POST /admin/refresh
+        Authorization: Bearer <token>
+        {
+            "urls": ["https://tehisintellekt.ee/services"]
+        }
+
+        Response:
+        {
+            "corpus_version": "3f2a9c1b7d4e5f60",
+            "results": [{"url": "https://tehisintellekt.ee/services", "status": "updated", "detail": null}]
+        }
+    """
+    return service.refresh(request_data.urls)
+
+
+@router.post("/webhooks/refresh", status_code=202)
+async def refresh_webhook(request: Request, background_tasks: BackgroundTasks,
+                          signature: Optional[str] = Header(None, alias=SIGNATURE_HEADER),
+                          service: RefreshService = Depends(get_refresh_service)) -> dict:
+    """
+    Webhook receiver for the site's CMS: the same refresh as /admin/refresh, authenticated by an HMAC signature
+    of the body and run in the background, so the CMS gets its answer right away. A running crawl is checked
+    before queueing, so the CMS gets the 409 and can retry instead of the refresh being dropped in the background
+
+    Returns:
+        dict: {"accepted": <number of URLs queued>}
+
+    Raises:
+        HTTPException:
+            - 400 status code if there are no URLs or too many
+            - 401 status code if the signature is missing or wrong
+            - 409 status code if a crawl is running
+            - 422 status code if the body is not {"urls": [...]}
+            - 503 status code if REFRESH_WEBHOOK_SECRET is not configured
+    """
+    if not settings.REFRESH_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhook is disabled, REFRESH_WEBHOOK_SECRET is not set")
+    body = await request.body()
+    if not signature or not hmac.compare_digest(signature.strip(), webhook_signature(body)):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    try:
+        urls = RefreshService.validate_urls(RefreshRequest.model_validate_json(body).urls)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    if service.crawl_running():
+        raise HTTPException(status_code=409, detail="A crawl is running, refresh the pages after it finished")
+    background_tasks.add_task(run_refresh, urls)
+    return {"accepted": len(urls)}
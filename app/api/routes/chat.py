@@ -0,0 +1,78 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+
+from app.services.chat_service import ChatService, ChatSessionStore
+
+router = APIRouter()
+
+
+# ============================================================================
+# Chat controller for conversational (multi-turn) questions over a WebSocket
+# ============================================================================
+
+
+def get_chat_service():
+    """
+    Dependency injection factory for ChatService.
+    """
+    return ChatService()
+
+
+@router.websocket("/chat")
+async def chat(websocket: WebSocket, session_id: Optional[str] = None,
+               service: ChatService = Depends(get_chat_service)):
+    """
+    Conversational question answering. The server keeps the session (previous turns, selected context), so
+    follow-up questions need no repeated context. Pass ?session_id=... to resume a session after a reconnect.
+
+    Protocol (JSON messages):
+        server -> {"type": "session", "session_id": "..."} once connected
+        client -> {"question": "What services do you offer?"}
+        server -> {"type": "delta", "text": "..."} while the answer is generated
+        server -> {"type": "answer", "question": ..., "answer": ..., "sources": [...], "usage": {...}}
+                  (the complete answer, authoritative over the deltas)
+        server -> {"type": "error", "status": 400|500|503, "detail": "..."} instead of an answer
+    """
+    await websocket.accept()
+    session = ChatSessionStore.open(session_id)
+    await websocket.send_json({"type": "session", "session_id": session.id})
+    loop = asyncio.get_running_loop()
+
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"type": "error", "status": 400, "detail": "Invalid JSON message"})
+                continue
+            question = message.get("question") if isinstance(message, dict) else None
+            if not isinstance(question, str):
+                await websocket.send_json({"type": "error", "status": 400,
+                                           "detail": 'Message must be {"question": "<text>"}'})
+                continue
+
+            deltas: asyncio.Queue = asyncio.Queue()
+            task = asyncio.ensure_future(run_in_threadpool(
+                service.ask, session, question, lambda text: loop.call_soon_threadsafe(deltas.put_nowait, text)
+            ))
+            while True:
+                next_delta = asyncio.ensure_future(deltas.get())
+                done, _ = await asyncio.wait({task, next_delta}, return_when=asyncio.FIRST_COMPLETED)
+                if next_delta not in done:
+                    next_delta.cancel()
+                    break
+                await websocket.send_json({"type": "delta", "text": next_delta.result()})
+            while not deltas.empty():
+                await websocket.send_json({"type": "delta", "text": deltas.get_nowait()})
+
+            try:
+                response = task.result()
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "status": e.status_code, "detail": e.detail})
+                continue
+            await websocket.send_json({"type": "answer", **response.model_dump()})
+    except WebSocketDisconnect:
+        pass
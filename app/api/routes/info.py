@@ -1,12 +1,20 @@
-from typing import Dict
+import asyncio
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
 from app.dtos.ask_request import AskRequest
 from app.dtos.ask_response import AskResponse
 from app.services.app_service import AppService
+from app.services.resilience_service import Cancellation
+from app.services.source_info_service import SourceInfoService
 
 router = APIRouter()
 
+TIMEOUT_HEADER = "x-request-timeout"
+
 
 # ============================================================================
 # Info controller for web information related requests
@@ -21,21 +29,25 @@ def get_app_service():
 
 
 @router.get("/source_info")
-def get_source_info(service: AppService = Depends(get_app_service)) -> Dict[str, str]:
+def get_source_info(request: Request, service: AppService = Depends(get_app_service)) -> Response:
     """
     Retrieve all crawled pages and their content.
 
     Returns a dictionary mapping each crawled URL to its extracted text content.
+    The JSON is rendered once per corpus version (see SourceInfoService) and sent as a file in the best
+    encoding the client accepts (br, gzip or identity), with a strong ETag; a matching If-None-Match
+    gets 304 Not Modified without a body.
     This endpoint is useful for:
     - Debugging: Verify what content was crawled
     - Monitoring: Check if the crawler has completed
     - Inspection: Review the data available for question answering
 
     Args:
+        request (Request): Incoming request, for Accept-Encoding and If-None-Match
         service (AppService): Injected application service (automatic via Depends)
 
     Returns:
-        Dict[str, str]: Dictionary mapping URLs to their text content.
+        Response: File response with the JSON dictionary mapping URLs to their text content.
             Example:
             {
                 "https://tehisintellekt.ee/": "Homepage content...",
@@ -55,20 +67,55 @@ def get_source_info(service: AppService = Depends(get_app_service)) -> Dict[str,
             "https://example.com/contact": "Contact us at..."
         }
     """
-    return service.get_source_info()
+    path, encoding, etag = service.get_source_info_file(request.headers.get("accept-encoding"))
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if SourceInfoService.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(path, media_type="application/json", headers=headers)
+
+
+def request_timeout(header: Optional[str]) -> float:
+    """
+    Deadline of an /ask request in seconds: the X-Request-Timeout header if it is a valid, shorter timeout,
+    settings.ASK_TIMEOUT_SECONDS otherwise
+    """
+    try:
+        timeout = float(header)
+    except (TypeError, ValueError):
+        return settings.ASK_TIMEOUT_SECONDS
+    return min(timeout, settings.ASK_TIMEOUT_SECONDS) if timeout > 0 else settings.ASK_TIMEOUT_SECONDS
+
+
+async def watch_disconnect(request: Request, cancellation: Cancellation):
+    """
+    Cancel the request's work as soon as its client disconnects
+    """
+    while not cancellation.cancelled:
+        if await request.is_disconnected():
+            cancellation.cancel("disconnect")
+            return
+        await asyncio.sleep(settings.ASK_DISCONNECT_POLL_SECONDS)
 
 
 @router.post("/ask")
 async def ask_question(
         request_data: AskRequest,
+        request: Request,
         service: AppService = Depends(get_app_service)
 ) -> AskResponse:
     """
     Answer a user question based on crawled website content
 
+    The question is answered in a worker thread while the event loop watches the connection. Work stops
+    cooperatively when the client disconnects or the deadline passes (X-Request-Timeout header in seconds,
+    at most settings.ASK_TIMEOUT_SECONDS)
+
     Args:
         request_data (AskRequest): Request body containing:
             - question (str): The user's question (5-1000 characters)
+        request (Request): Incoming request, for the timeout header and disconnect detection
         service (AppService): Injected application service (automatic via Depends)
 
     Returns:
@@ -79,6 +126,8 @@ async def ask_question(
             - usage (Usage): Token usage statistics
                 - input_tokens (int): Tokens consumed in the request
                 - output_tokens (int): Tokens generated in the response
+            - fallback (bool): True for a degraded answer quoting page passages, returned when OpenAI is
+              unavailable or has not answered within ASK_FALLBACK_DEADLINE_SECONDS
 
     Raises:
         HTTPException:
@@ -86,8 +135,10 @@ async def ask_question(
                 - Question is empty or only whitespace
                 - Question is shorter than 5 characters
                 - Question is longer than 1000 characters
+            - 499 status code if the client disconnected
             - 500 status code if no crawled content is available
             - 500 status code if OpenAI API call fails
+            - 504 status code if the deadline passed
 
     Example:
         POST /ask
@@ -106,7 +157,13 @@ async def ask_question(
             "usage": {
                 "input_tokens": 1250,
                 "output_tokens": 87
-            }
+            },
+            "fallback": false
         }
     """
-    return service.ask_question(request_data.question)
+    cancellation = Cancellation(request_timeout(request.headers.get(TIMEOUT_HEADER)))
+    watcher = asyncio.ensure_future(watch_disconnect(request, cancellation))
+    try:
+        return await run_in_threadpool(service.ask_question, request_data.question, cancellation)
+    finally:
+        watcher.cancel()
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -8,6 +9,29 @@ class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
 
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL")
+    """
+        Optional read replica. API reads (/ask, /source_info, readiness) use it, writes (crawler, question log,
+        precomputed answers, crawl lease) always go to DATABASE_URL. Without it reads use DATABASE_URL
+    """
+
+    DB_ENGINES = json.loads(os.getenv("DB_ENGINES", "null")) or {
+        "read": {
+            "pool_size": 10, "max_overflow": 10, "pool_timeout": 5, "pool_recycle": 1800,
+            "pool_pre_ping": True, "statement_timeout_ms": 10000,
+        },
+        "write": {
+            "pool_size": 5, "max_overflow": 5, "pool_timeout": 30, "pool_recycle": 1800,
+            "pool_pre_ping": True, "statement_timeout_ms": 60000,
+        },
+    }
+    """
+        Connection pool per engine role. Reads and writes have separate pools, so crawl ingestion or a slow
+        question log flush cannot take the connections of the /ask read path. Reads fail fast (short
+        pool_timeout and statement timeout), writes wait longer. statement_timeout_ms is applied on PostgreSQL only.
+        Override with a JSON object in the DB_ENGINES env var
+    """
+
     DOMAIN = 'tehisintellekt.ee'
     """
         Target domain to crawl.
@@ -15,8 +39,162 @@ class Settings:
         Change this value to crawl a different website.
     """
 
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL")
+    """
+        Optional OpenAI-compatible endpoint (proxy, gateway or a local fake server in tests)
+    """
+
     CHATGPT_MODEL = "gpt-4o-mini"
 
+    MODEL_ROUTES = json.loads(os.getenv("MODEL_ROUTES", "null")) or [
+        {
+            "name": "degraded", "model": "gpt-4o-mini", "max_context_chars": 40000,
+            "min_latency_p95_seconds": 15,
+            "input_cost_per_mtok": 0.15, "output_cost_per_mtok": 0.6,
+        },
+        {
+            "name": "simple", "model": "gpt-4o-mini", "max_context_chars": 30000,
+            "max_question_chars": 120, "complex": False, "min_context_chars": 30000,
+            "input_cost_per_mtok": 0.15, "output_cost_per_mtok": 0.6,
+        },
+        {
+            "name": "default", "model": CHATGPT_MODEL, "max_context_chars": 250000, "map_reduce": True,
+            "input_cost_per_mtok": 0.15, "output_cost_per_mtok": 0.6,
+        },
+    ]
+    """
+        Routing table (see RoutingService). Routes are checked in order and the first match picks the model and
+        the context budget: short simple questions get only the most relevant pages, complex ones the full corpus,
+        and every question is trimmed while OpenAI is slow. A corpus above the budget of a route with "map_reduce"
+        is answered shard by shard instead of trimmed (see MAP_REDUCE_MAX_SHARDS).
+        Override with a JSON list in the MODEL_ROUTES env var
+    """
+
+    CONTEXT_MODE = os.getenv("CONTEXT_MODE", "full")
+    """
+        How the context is selected: "full" sends the corpus (trimmed to the route budget),
+        "two_stage" ranks pages by their crawl-time summaries and sends the full text of the best
+        TWO_STAGE_MAX_PAGES pages only
+    """
+
+    TWO_STAGE_MAX_PAGES = 5
+
+    MAP_REDUCE_MAX_SHARDS = int(os.getenv("MAP_REDUCE_MAX_SHARDS", 8))
+    """
+        Map-reduce answering (routes with "map_reduce", CONTEXT_MODE=full): when the corpus exceeds the route budget
+        it is split into budget-sized shards, the question is asked against the shards holding the best matching
+        pages (at most this many) and the partial answers are combined by one more call. 1 or less trims instead
+    """
+
+    MAP_REDUCE_CONCURRENCY = 4
+    """
+        Parallel shard calls of one map-reduce answer
+    """
+
+    CONTEXT_IMPORTANCE_WEIGHT = float(os.getenv("CONTEXT_IMPORTANCE_WEIGHT", 0.5))
+    """
+        How strongly page importance (link graph PageRank, see PageRankService) affects which pages are kept when
+        the context has to be trimmed: relevance scores are multiplied by importance ** weight (an average page has
+        importance 1.0). 0 ranks by relevance only. Without a relevance match pages are taken by importance
+    """
+
+    SUMMARY_MAX_CHARS = 600
+    """
+        Maximum size of the extractive summary stored per page at crawl time
+    """
+
+    SUMMARY_MAX_SENTENCES_RANKED = 200
+    """
+        Only the first sentences of a page are ranked by TextRank, which is quadratic in sentence count
+    """
+
+    OPENAI_ATTEMPT_TIMEOUT_SECONDS = 60
+    """
+        Deadline of a single OpenAI call, hedged request included
+    """
+
+    OPENAI_MAX_ATTEMPTS = 3
+    """
+        Total attempts per question for retryable errors (timeouts, connection errors, 429, 5xx)
+    """
+
+    OPENAI_BACKOFF_BASE_SECONDS = 0.5
+    OPENAI_BACKOFF_MAX_SECONDS = 8
+    """
+        Retries wait a random time between 0 and min(max, base * 2^attempt) (full jitter)
+    """
+
+    OPENAI_HEDGE_ENABLED = os.getenv("OPENAI_HEDGE_ENABLED", "false").lower() == "true"
+    """
+        Send a second, identical request when the first has not answered after the recent p95 latency.
+        Cuts tail latency at the price of extra tokens for the hedged calls (~5%)
+    """
+
+    OPENAI_HEDGE_MIN_DELAY_SECONDS = 2.0
+    """
+        Lower bound of the hedge delay, so hedging never doubles fast requests
+    """
+
+    OPENAI_MAX_CONCURRENT_CALLS = int(os.getenv("OPENAI_MAX_CONCURRENT_CALLS", 16))
+    """
+        OpenAI calls running at once per worker process (hedged requests included). Further calls wait for a free
+        thread; their attempt deadline keeps running while they wait
+    """
+
+    ASK_TIMEOUT_SECONDS = float(os.getenv("ASK_TIMEOUT_SECONDS", 120))
+    """
+        Deadline of an /ask request. Clients can shorten it with the X-Request-Timeout header (seconds).
+        Work still pending at the deadline is cancelled and the request fails with 504
+    """
+
+    ASK_FALLBACK_ENABLED = os.getenv("ASK_FALLBACK_ENABLED", "true").lower() == "true"
+    """
+        Answer /ask with a degraded extractive answer (see FallbackService) instead of an error when the circuit
+        breaker is open or OpenAI has not answered within ASK_FALLBACK_DEADLINE_SECONDS
+    """
+
+    ASK_FALLBACK_DEADLINE_SECONDS = float(os.getenv("ASK_FALLBACK_DEADLINE_SECONDS", 20))
+    """
+        Time the LLM stage of an /ask request gets before the fallback answer is returned. The request deadline
+        (ASK_TIMEOUT_SECONDS) still applies when it is shorter and then fails the request with 504. Keep it above
+        the min_latency_p95_seconds of the "degraded" route: abandoned calls count with the time waited for them,
+        so a p95 above the deadline is never observed
+    """
+
+    ASK_FALLBACK_MAX_PAGES = 5
+    ASK_FALLBACK_MAX_PASSAGES = 3
+    ASK_FALLBACK_PASSAGE_CHARS = 400
+    """
+        Fallback answers quote the best matching passages (sentences joined up to ASK_FALLBACK_PASSAGE_CHARS) of
+        the ASK_FALLBACK_MAX_PAGES best matching pages
+    """
+
+    ASK_FALLBACK_ANSWERS = {
+        "en": "The assistant cannot answer right now. These passages of {domain} match your question:",
+        "et": "Assistent ei saa praegu vastata. Need lõigud {domain} lehtedelt vastavad teie küsimusele:",
+    }
+
+    ASK_FALLBACK_NO_MATCH_ANSWERS = {
+        "en": "The assistant cannot answer right now and no page of {domain} matches your question. "
+              "Please try again later.",
+        "et": "Assistent ei saa praegu vastata ja ükski {domain} leht ei vasta teie küsimusele. "
+              "Palun proovige hiljem uuesti.",
+    }
+
+    ASK_DISCONNECT_POLL_SECONDS = 0.5
+    """
+        How often /ask checks whether the client is still connected; its work is cancelled once it is gone
+    """
+
+    CIRCUIT_FAILURE_RATE = 0.5
+    CIRCUIT_WINDOW_SIZE = 20
+    CIRCUIT_MIN_CALLS = 10
+    CIRCUIT_OPEN_SECONDS = 30
+    """
+        The circuit opens when at least CIRCUIT_FAILURE_RATE of the last CIRCUIT_WINDOW_SIZE OpenAI calls failed
+        (and at least CIRCUIT_MIN_CALLS were made). While open, questions fail fast for CIRCUIT_OPEN_SECONDS
+    """
+
     MAX_QUESTION_LENGTH = 1000
     """
         Maximum allowed length for user questions in characters
@@ -27,10 +205,195 @@ class Settings:
         Minimum required length for user questions in characters
     """
 
-    MAX_CONTENT_SIZE = 190000
+    RELEVANCE_GATE = os.getenv("RELEVANCE_GATE", "enforce")
+    """
+        Local relevance gate in front of the LLM (see RelevanceService): "enforce" answers questions that do not
+        match the corpus with RELEVANCE_GATE_ANSWERS without an LLM call, "log_only" only logs and counts the
+        decisions (for tuning the threshold), "off" disables it
+    """
+
+    RELEVANCE_GATE_MIN_SCORE = float(os.getenv("RELEVANCE_GATE_MIN_SCORE", 0.5))
+    """
+        Minimum share of the question's informative terms (stop words excluded) that must occur in the corpus.
+        Scores are stored in question_logs.relevance_score for tuning
+    """
+
+    RELEVANCE_GATE_PREFIX_CHARS = 5
+
+    RELEVANCE_GATE_ANSWERS = {
+        "en": "Sorry, I can only answer questions about the content of {domain}, "
+              "and this question does not seem to be covered there.",
+        "et": "Vabandust, saan vastata ainult küsimustele {domain} sisu kohta "
+              "ning see küsimus ei tundu seal käsitletud olevat.",
+    }
+
+    CHAT_MAX_TURNS = 6
+    """
+        Previous (question, answer) turns of a /chat session sent with each follow-up question
+    """
+
+    CHAT_MAX_SESSIONS = 1000
+    CHAT_MAX_MEMORY_BYTES = 256 * 1024 * 1024
+    CHAT_SESSION_IDLE_SECONDS = 1800
+    """
+        /chat sessions live in process memory. Sessions idle for CHAT_SESSION_IDLE_SECONDS are evicted, and the
+        least recently used ones are evicted while there are more than CHAT_MAX_SESSIONS or they hold more than
+        CHAT_MAX_MEMORY_BYTES (turn history and selected context, corpus text shared with the snapshot not counted)
+    """
+
+    MAX_CONTENT_SIZE = int(os.getenv("MAX_CONTENT_SIZE", 190000))
     """
         Maximum total content size in characters across all crawled pages.
-        The crawler will stop when this limit is reached.
+        The crawler will stop when this limit is reached. Corpora larger than a route's context budget are
+        answered by map-reduce (see MAP_REDUCE_MAX_SHARDS)
+    """
+
+    READINESS_RETRY_SECONDS = 5
+    """
+        Interval between warm-up attempts while the corpus is still empty or the database is unavailable
+    """
+
+    PRECOMPUTE_QUESTIONS = [
+        "What services do you offer?",
+        "How can I contact you?",
+        "Milliseid teenuseid te pakute?",
+        "Kuidas teiega ühendust võtta?",
+    ]
+    """
+        Frequent questions answered in the background after every crawl and served without an LLM call
+    """
+
+    PRECOMPUTE_TOP_N = 50
+    """
+        Maximum number of questions precomputed per crawl: the most frequent questions from the question log,
+        topped up from PRECOMPUTE_QUESTIONS
+    """
+
+    PRECOMPUTE_CONCURRENCY = 4
+    """
+        Parallel OpenAI calls of the precompute stage, kept low so it does not compete with live traffic
+    """
+
+    DATA_DIR = os.getenv("DATA_DIR", "data")
+    """
+        Directory for files written at runtime (question log spill file, ...)
+    """
+
+    QUESTION_LOG_QUEUE_SIZE = 10000
+    """
+        Maximum number of question log entries waiting in memory for the background writer
+    """
+
+    QUESTION_LOG_BATCH_SIZE = 200
+    QUESTION_LOG_FLUSH_SECONDS = 2
+    """
+        The writer inserts a batch once it has QUESTION_LOG_BATCH_SIZE entries or QUESTION_LOG_FLUSH_SECONDS passed
+    """
+
+    QUESTION_LOG_OVERFLOW_POLICY = os.getenv("QUESTION_LOG_OVERFLOW_POLICY", "spill")
+    """
+        What happens to entries when the queue is full or the database write fails:
+        "spill" appends them to QUESTION_LOG_SPILL_PATH and replays them later, "drop" discards them
+    """
+
+    QUESTION_LOG_SPILL_PATH = os.path.join(DATA_DIR, "question_log_spill.jsonl")
+
+    SOURCE_INFO_DIR = os.path.join(DATA_DIR, "source_info")
+    """
+        /source_info JSON rendered per corpus version (plain, gzip and brotli files)
+    """
+
+    SOURCE_INFO_KEEP_VERSIONS = 2
+
+    SOURCE_INFO_REQUEST_GZIP_LEVEL = 6
+    """
+        gzip level of /source_info files rendered on the request path (a worker without files for the version).
+        Brotli is then rendered in the background, files rendered after a crawl use the highest levels
+    """
+
+    CORPUS_FILE_ENABLED = os.getenv("CORPUS_FILE_ENABLED", "true").lower() == "true"
+    CORPUS_FILE_DIR = os.getenv("CORPUS_FILE_DIR", os.path.join(DATA_DIR, "corpus"))
+    """
+        Binary corpus file per version (see CorpusFileService). Workers memory-map it instead of loading all pages
+        from the database. Point CORPUS_FILE_DIR to a shared volume to share it between replicas
+    """
+
+    CRAWL_MODE = os.getenv("CRAWL_MODE", "live")
+    """
+        "live" crawls the site, "record" crawls it and archives every response in CRAWL_ARCHIVE_DIR,
+        "replay" crawls the archive only, without network access (see crawler/httpcache.py)
+    """
+
+    CRAWL_ARCHIVE_DIR = os.getenv("CRAWL_ARCHIVE_DIR", os.path.join(DATA_DIR, "crawl_archive"))
+
+    CRAWL_JOB_DIR = os.getenv("CRAWL_JOB_DIR", os.path.join(DATA_DIR, "crawl_job"))
+    """
+        Scrapy JOBDIR of the crawl: pending requests, seen requests and the spider checkpoint
+    """
+
+    CRAWL_RESUME = os.getenv("CRAWL_RESUME", "true").lower() == "true"
+    """
+        Continue an interrupted crawl (timeout, shutdown, crash) from CRAWL_JOB_DIR instead of starting over.
+        Pages stored by the interrupted crawl are kept and not fetched again. A finished crawl always starts over
+    """
+
+    CRAWL_CHECKPOINT_PAGES = 20
+    """
+        The spider checkpoints its progress (stored pages, total content size) every this many stored pages
+    """
+
+    CRAWL_EXTRACT_WORKERS = int(os.getenv("CRAWL_EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+    """
+        Processes extracting text, summary, language and links from crawled pages, so parsing large pages does not
+        block downloading on the Scrapy reactor thread. 0 extracts inline on the reactor thread
+    """
+
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN")
+    """
+        Bearer token of the /admin endpoints (Authorization: Bearer <token>). Without it they are disabled (503)
+    """
+
+    REFRESH_WEBHOOK_SECRET: str = os.getenv("REFRESH_WEBHOOK_SECRET")
+    """
+        Shared secret of the /webhooks/refresh endpoint. Requests are signed with an X-Webhook-Signature header
+        "sha256=<hex HMAC-SHA256 of the body>". Without it the webhook is disabled (503)
+    """
+
+    REFRESH_MAX_URLS = 50
+    """
+        Maximum number of URLs per refresh request
+    """
+
+    REFRESH_FETCH_TIMEOUT_SECONDS = 15
+
+    REFRESH_MAX_RESPONSE_BYTES = MAX_CONTENT_SIZE * 20
+    """
+        Largest response body a refresh reads, a page larger than that fails instead of being read into memory.
+        Twenty times the corpus budget leaves room for markup, scripts and multibyte characters
+    """
+
+    PAGE_RANK_DAMPING = 0.85
+    PAGE_RANK_TOLERANCE = 1e-6
+    PAGE_RANK_MAX_ITERATIONS = 100
+    """
+        PageRank of the crawled link graph, computed after every crawl (see PageRankService)
+    """
+
+    CRAWL_TIMEOUT_SECONDS = 3600
+    """
+        Maximum duration of a single crawl. The spider subprocess is terminated after it
+    """
+
+    CRAWL_LEASE_TTL_SECONDS = 60
+    """
+        Lifetime of the crawl leader lease. The leader renews it every third of the TTL, so a crashed
+        leader is replaced by another process after at most this many seconds
+    """
+
+    CRAWL_FRESHNESS_SECONDS = int(os.getenv("CRAWL_FRESHNESS_SECONDS", 3600))
+    """
+        A process that becomes leader skips crawling if the last successful crawl finished less than this
+        many seconds ago, so replicas started one after another do not recrawl the site each time
     """
 
 settings = Settings()
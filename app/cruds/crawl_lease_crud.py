@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app.db.models.crawl_lease import CrawlLease
+
+
+class CrawlLeaseCrud:
+    def __init__(self, db):
+        """
+        Initialize CrawlLeaseCrud with a database session
+
+        Args:
+            db: SQLAlchemy database session for executing queries
+        """
+        self.db = db
+
+    def try_acquire(self, name: str, owner: str, ttl_seconds: int) -> bool:
+        """
+        Take the lease if it does not exist, has expired or is already held by `owner`.
+        Both paths are single atomic statements, so concurrent callers cannot both win
+
+        Args:
+            name (str): Lease name
+            owner (str): Identifier of the calling process
+            ttl_seconds (int): Lease lifetime, must be renewed before it runs out
+
+        Returns:
+            bool: True if `owner` now holds the lease
+
+        Raises:
+            SQLAlchemyError: If the database operation fails
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        try:
+            self.db.execute(insert(CrawlLease).values(name=name, owner=owner, expires_at=expires_at))
+            self.db.commit()
+            return True
+        except IntegrityError:
+            self.db.rollback()
+
+        try:
+            updated = self.db.query(CrawlLease).filter(
+                CrawlLease.name == name,
+                (CrawlLease.owner == None) | (CrawlLease.owner == owner) | (CrawlLease.expires_at < now),  # noqa: E711
+            ).update({"owner": owner, "expires_at": expires_at}, synchronize_session=False)
+            self.db.commit()
+            return updated == 1
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[CrawlLeaseCrud] @try_acquire: Database error occurred")
+            raise
+
+    def renew(self, name: str, owner: str, ttl_seconds: int) -> bool:
+        """
+        Extend the lease held by `owner`
+
+        Returns:
+            bool: False if the lease was lost (taken over after expiry)
+
+        Raises:
+            SQLAlchemyError: If the database operation fails
+        """
+        try:
+            updated = self.db.query(CrawlLease).filter(
+                CrawlLease.name == name, CrawlLease.owner == owner
+            ).update({"expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)}, synchronize_session=False)
+            self.db.commit()
+            return updated == 1
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[CrawlLeaseCrud] @renew: Database error occurred")
+            raise
+
+    def release(self, name: str, owner: str, completed: bool = False):
+        """
+        Give up the lease held by `owner`, optionally recording a successful completion
+
+        Returns:
+            None
+
+        Raises:
+            SQLAlchemyError: If the database operation fails
+        """
+        values = {"owner": None, "expires_at": None}
+        if completed:
+            values["completed_at"] = datetime.utcnow()
+        try:
+            self.db.query(CrawlLease).filter(
+                CrawlLease.name == name, CrawlLease.owner == owner
+            ).update(values, synchronize_session=False)
+            self.db.commit()
+            return None
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[CrawlLeaseCrud] @release: Database error occurred")
+            raise
+
+    def get_lease(self, name: str) -> Optional[CrawlLease]:
+        """
+        Retrieve the lease row
+
+        Returns:
+            Optional[CrawlLease]: None if the lease was never taken
+
+        Raises:
+            Exception: If the database query fails
+        """
+        try:
+            return self.db.query(CrawlLease).filter(CrawlLease.name == name).first()
+        except Exception:
+            print(f"[CrawlLeaseCrud] @get_lease: Database error occurred")
+            raise
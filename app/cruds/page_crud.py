@@ -1,9 +1,15 @@
-from typing import List
+import hashlib
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
+from sqlalchemy import func, select, update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import defer
 from app.db.models.page import Page
 
 
+DEFAULT_BATCH_SIZE = 500
+
+
 class PageCrud:
     def __init__(self, db):
         """
@@ -14,13 +20,15 @@ class PageCrud:
         """
         self.db = db
 
-    def add_page(self, url: str, content: str) -> Page:
+    def add_page(self, url: str, content: str, summary: Optional[str] = None, language: Optional[str] = None) -> Page:
         """
         Add a new page to the database
 
         Args:
             url (str): The URL of the crawled page (must not be empty)
             content (str): The extracted text content from the page
+            summary (Optional[str]): Extractive summary of the content
+            language (Optional[str]): Detected page language code
 
         Returns:
             Page
@@ -35,6 +43,8 @@ class PageCrud:
             page = Page(
                 url=url,
                 content=content,
+                summary=summary,
+                language=language,
             )
             self.db.add(page)
             self.db.commit()
@@ -45,9 +55,68 @@ class PageCrud:
             print(f"[PageCrud] @add_page: Database error occurred")
             raise
 
+    def upsert_page(self, url: str, content: str, summary: Optional[str] = None,
+                    language: Optional[str] = None) -> Tuple[Page, str]:
+        """
+        Insert a page or update the stored page of the URL in place. An update increments the page revision,
+        so the corpus version changes even though no row was added
+
+        Args:
+            url (str): The URL of the page (must not be empty)
+            content (str): The extracted text content from the page
+            summary (Optional[str]): Extractive summary of the content
+            language (Optional[str]): Detected page language code
+
+        Returns:
+            Tuple[Page, str]: The page and what happened: "created", "updated" or "unchanged"
+
+        Raises:
+            ValueError: If the URL is not valid
+            SQLAlchemyError: If the database operation fails
+        """
+        if not url or not url.strip():
+            raise ValueError("URL cannot be empty")
+        try:
+            page = self.db.query(Page).filter(Page.url == url).first()
+            if page is None:
+                return self.add_page(url, content, summary=summary, language=language), "created"
+            if (page.content, page.summary, page.language) == (content, summary, language):
+                return page, "unchanged"
+            page.content = content
+            page.summary = summary
+            page.language = language
+            page.revision = (page.revision or 0) + 1
+            self.db.commit()
+            self.db.refresh(page)
+            return page, "updated"
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[PageCrud] @upsert_page: Database error occurred")
+            raise
+
+    def delete_page(self, url: str) -> bool:
+        """
+        Delete the page of a URL
+
+        Returns:
+            bool: False if no page was stored for the URL
+
+        Raises:
+            SQLAlchemyError: If the delete operation or commit fails
+        """
+        try:
+            deleted = self.db.query(Page).filter(Page.url == url).delete()
+            self.db.commit()
+            return deleted > 0
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[PageCrud] @delete_page: Database error occurred")
+            raise
+
     def get_all_pages(self) -> List[Page]:
         """
-        Retrieve all pages from the database.
+        Retrieve all pages from the database ordered by URL, so callers get a deterministic order.
+        Loads every row with its content at once, prefer iter_pages/iter_page_rows for large corpora
 
         Returns:
             List[Page]
@@ -56,11 +125,202 @@ class PageCrud:
             Exception: If the database query fails
         """
         try:
-            return self.db.query(Page).all()
+            return self.db.query(Page).order_by(Page.url).all()
         except Exception:
             print(f"[PageCrud] @get_all_pages: Database error occurred")
             raise
 
+    def iter_pages(self, batch_size: int = DEFAULT_BATCH_SIZE, with_content: bool = True) -> Iterator[Page]:
+        """
+        Stream pages in id order without loading the whole table. Every batch is its own keyset-paged query
+        (`WHERE id > <last id> ORDER BY id LIMIT batch_size`) read with yield_per, so at most one batch of
+        rows is buffered and pages the caller has dropped can be garbage collected
+
+        Args:
+            batch_size (int): Rows per query
+            with_content (bool): False defers `content` and `summary`, they are loaded only if accessed
+
+        Returns:
+            Iterator[Page]
+
+        Raises:
+            Exception: If the database query fails
+        """
+        query = self.db.query(Page).order_by(Page.id)
+        if not with_content:
+            query = query.options(defer(Page.content), defer(Page.summary))
+        last_id = 0
+        try:
+            while True:
+                count = 0
+                for page in query.filter(Page.id > last_id).limit(batch_size).yield_per(batch_size):
+                    last_id = page.id
+                    count += 1
+                    yield page
+                if count < batch_size:
+                    return
+        except Exception:
+            print(f"[PageCrud] @iter_pages: Database error occurred")
+            raise
+
+    def iter_page_rows(self, batch_size: int = DEFAULT_BATCH_SIZE
+                       ) -> Iterator[Tuple[str, str, Optional[str], Optional[str]]]:
+        """
+        Stream (url, content, summary, language) tuples in URL order with keyset-paged Core queries. No ORM objects are
+        built, which makes this the cheapest way to read the whole corpus (snapshot rebuilds)
+
+        Returns:
+            Iterator[Tuple[str, str, Optional[str], Optional[str]]]
+
+        Raises:
+            Exception: If the database query fails
+        """
+        yield from self._iter_keyset(select(Page.url, Page.content, Page.summary, Page.language), Page.url, batch_size)
+
+    def iter_page_sizes(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Tuple[int, str, int]]:
+        """
+        Stream (id, url, content length) tuples in id order. The length is computed by the database,
+        content never leaves it
+
+        Returns:
+            Iterator[Tuple[int, str, int]]
+
+        Raises:
+            Exception: If the database query fails
+        """
+        yield from self._iter_keyset(select(Page.id, Page.url, func.length(Page.content)), Page.id, batch_size)
+
+    def _iter_keyset(self, statement, key_column, batch_size: int) -> Iterator[tuple]:
+        """
+        Run `statement` in batches ordered by the unique `key_column` (first selected column), each batch
+        starting after the last key of the previous one
+        """
+        last_key = None
+        try:
+            while True:
+                paged = statement.order_by(key_column).limit(batch_size)
+                if last_key is not None:
+                    paged = paged.where(key_column > last_key)
+                rows = self.db.execute(paged).all()
+                for row in rows:
+                    yield tuple(row)
+                if len(rows) < batch_size:
+                    return
+                last_key = rows[-1][0]
+        except Exception:
+            print(f"[PageCrud] @_iter_keyset: Database error occurred")
+            raise
+
+    def get_urls(self) -> Set[str]:
+        """
+        Retrieve URLs of all stored pages without loading their content
+
+        Returns:
+            Set[str]
+
+        Raises:
+            Exception: If the database query fails
+        """
+        try:
+            return set(self.db.execute(select(Page.url)).scalars())
+        except Exception:
+            print(f"[PageCrud] @get_urls: Database error occurred")
+            raise
+
+    def get_page_ids(self) -> Dict[str, int]:
+        """
+        URL -> id of all stored pages, without loading their content
+
+        Returns:
+            Dict[str, int]
+
+        Raises:
+            Exception: If the database query fails
+        """
+        try:
+            return dict(self.db.execute(select(Page.url, Page.id)).all())
+        except Exception:
+            print(f"[PageCrud] @get_page_ids: Database error occurred")
+            raise
+
+    def get_page_importance(self) -> Dict[str, float]:
+        """
+        URL -> importance of the pages that have one
+
+        Returns:
+            Dict[str, float]
+
+        Raises:
+            Exception: If the database query fails
+        """
+        try:
+            return dict(self.db.execute(select(Page.url, Page.importance).where(Page.importance.is_not(None))).all())
+        except Exception:
+            print(f"[PageCrud] @get_page_importance: Database error occurred")
+            raise
+
+    def set_page_importance(self, importance: Dict[int, float]):
+        """
+        Store importance scores by page id in one bulk UPDATE
+
+        Returns:
+            None
+
+        Raises:
+            SQLAlchemyError: If the update or commit fails
+        """
+        if not importance:
+            return None
+        try:
+            self.db.execute(update(Page), [
+                {"id": page_id, "importance": score} for page_id, score in importance.items()
+            ])
+            self.db.commit()
+            return None
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[PageCrud] @set_page_importance: Database error occurred")
+            raise
+
+    def get_total_content_length(self) -> int:
+        """
+        Total number of content characters over all stored pages
+
+        Returns:
+            int
+
+        Raises:
+            Exception: If the database query fails
+        """
+        try:
+            return self.db.query(func.coalesce(func.sum(func.length(Page.content)), 0)).scalar()
+        except Exception:
+            print(f"[PageCrud] @get_total_content_length: Database error occurred")
+            raise
+
+    def get_corpus_version(self) -> str:
+        """
+        Compute a cheap fingerprint of the stored corpus. Pages are inserted, deleted or updated in place with
+        an incremented revision, so row count, highest id, newest timestamp or the revision sum change whenever
+        the corpus does. The number of ranked pages changes when importance scores are stored after a crawl
+
+        Returns:
+            str: Short hex fingerprint, e.g. "3f2a9c1b7d4e5f60"
+
+        Raises:
+            Exception: If the database query fails
+        """
+        try:
+            count, max_id, max_created_at, revisions, ranked = self.db.query(
+                func.count(Page.id), func.max(Page.id), func.max(Page.created_at),
+                func.coalesce(func.sum(Page.revision), 0), func.count(Page.importance),
+            ).one()
+            fingerprint = f"{count}:{max_id}:{max_created_at}:{revisions}:{ranked}"
+            return hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+        except Exception:
+            print(f"[PageCrud] @get_corpus_version: Database error occurred")
+            raise
+
     def delete_all_pages(self):
         """
         Delete all pages from the database.
@@ -0,0 +1,109 @@
+from typing import Iterable, Iterator, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from app.db.models.page_link import PageLink
+
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+class PageLinkCrud:
+    def __init__(self, db):
+        """
+        Initialize PageLinkCrud with a database session
+
+        Args:
+            db: SQLAlchemy database session for executing queries
+        """
+        self.db = db
+
+    def replace_links(self, source_url: str, target_urls: Iterable[str]):
+        """
+        Store the outgoing links of a page, replacing the links stored for it before
+
+        Args:
+            source_url (str): URL of the page
+            target_urls (Iterable[str]): Link targets, duplicates and self links are dropped
+
+        Returns:
+            None
+
+        Raises:
+            SQLAlchemyError: If the database operation fails
+        """
+        targets = [url for url in dict.fromkeys(target_urls) if url != source_url]
+        try:
+            self.db.query(PageLink).filter(PageLink.source_url == source_url).delete()
+            if targets:
+                self.db.execute(insert(PageLink), [{"source_url": source_url, "target_url": url} for url in targets])
+            self.db.commit()
+            return None
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[PageLinkCrud] @replace_links: Database error occurred")
+            raise
+
+    def iter_links(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Tuple[str, str]]:
+        """
+        Stream all (source_url, target_url) edges in id order with keyset-paged Core queries
+
+        Returns:
+            Iterator[Tuple[str, str]]
+
+        Raises:
+            Exception: If the database query fails
+        """
+        last_id = 0
+        try:
+            while True:
+                rows = self.db.execute(
+                    select(PageLink.id, PageLink.source_url, PageLink.target_url)
+                    .where(PageLink.id > last_id).order_by(PageLink.id).limit(batch_size)
+                ).all()
+                for _, source_url, target_url in rows:
+                    yield source_url, target_url
+                if len(rows) < batch_size:
+                    return
+                last_id = rows[-1][0]
+        except Exception:
+            print(f"[PageLinkCrud] @iter_links: Database error occurred")
+            raise
+
+    def delete_links(self, source_url: str):
+        """
+        Delete the outgoing links of a page
+
+        Returns:
+            None
+
+        Raises:
+            SQLAlchemyError: If the delete operation or commit fails
+        """
+        try:
+            self.db.query(PageLink).filter(PageLink.source_url == source_url).delete()
+            self.db.commit()
+            return None
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[PageLinkCrud] @delete_links: Database error occurred")
+            raise
+
+    def delete_all_links(self):
+        """
+        Delete the whole link graph
+
+        Returns:
+            None
+
+        Raises:
+            SQLAlchemyError: If the delete operation or commit fails
+        """
+        try:
+            self.db.query(PageLink).delete()
+            self.db.commit()
+            return None
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[PageLinkCrud] @delete_all_links: Database error occurred")
+            raise
@@ -0,0 +1,96 @@
+from typing import List, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from app.db.models.precomputed_answer import PrecomputedAnswer
+
+
+class PrecomputedAnswerCrud:
+    def __init__(self, db):
+        """
+        Initialize PrecomputedAnswerCrud with a database session
+
+        Args:
+            db: SQLAlchemy database session for executing queries
+        """
+        self.db = db
+
+    def add_answer(self, corpus_version: str, question_key: str, question: str, response: str) -> PrecomputedAnswer:
+        """
+        Store (or replace) the answer for a question of a corpus version
+
+        Returns:
+            PrecomputedAnswer
+
+        Raises:
+            SQLAlchemyError: If the database operation fails
+        """
+        try:
+            answer = self.db.query(PrecomputedAnswer).filter(
+                PrecomputedAnswer.corpus_version == corpus_version,
+                PrecomputedAnswer.question_key == question_key,
+            ).first()
+            if answer is None:
+                answer = PrecomputedAnswer(corpus_version=corpus_version, question_key=question_key)
+                self.db.add(answer)
+            answer.question = question
+            answer.response = response
+            self.db.commit()
+            return answer
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[PrecomputedAnswerCrud] @add_answer: Database error occurred")
+            raise
+
+    def get_answer(self, corpus_version: str, question_key: str) -> Optional[PrecomputedAnswer]:
+        """
+        Retrieve the answer for a normalized question of a corpus version
+
+        Returns:
+            Optional[PrecomputedAnswer]: None if no answer was precomputed
+
+        Raises:
+            Exception: If the database query fails
+        """
+        try:
+            return self.db.query(PrecomputedAnswer).filter(
+                PrecomputedAnswer.corpus_version == corpus_version,
+                PrecomputedAnswer.question_key == question_key,
+            ).first()
+        except Exception:
+            print(f"[PrecomputedAnswerCrud] @get_answer: Database error occurred")
+            raise
+
+    def get_answers(self, corpus_version: str) -> List[PrecomputedAnswer]:
+        """
+        Retrieve all answers of a corpus version
+
+        Returns:
+            List[PrecomputedAnswer]
+
+        Raises:
+            Exception: If the database query fails
+        """
+        try:
+            return self.db.query(PrecomputedAnswer).filter(PrecomputedAnswer.corpus_version == corpus_version).all()
+        except Exception:
+            print(f"[PrecomputedAnswerCrud] @get_answers: Database error occurred")
+            raise
+
+    def delete_other_versions(self, corpus_version: str):
+        """
+        Delete answers generated from any other corpus version
+
+        Returns:
+            None
+
+        Raises:
+            SQLAlchemyError: If the delete operation or commit fails
+        """
+        try:
+            self.db.query(PrecomputedAnswer).filter(PrecomputedAnswer.corpus_version != corpus_version).delete()
+            self.db.commit()
+            return None
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[PrecomputedAnswerCrud] @delete_other_versions: Database error occurred")
+            raise
@@ -0,0 +1,64 @@
+from typing import List
+
+from sqlalchemy import func, insert
+from sqlalchemy.exc import SQLAlchemyError
+from app.db.models.question_log import QuestionLog
+
+
+class QuestionLogCrud:
+    def __init__(self, db):
+        """
+        Initialize QuestionLogCrud with a database session
+
+        Args:
+            db: SQLAlchemy database session for executing queries
+        """
+        self.db = db
+
+    def add_entries(self, entries: List[dict]):
+        """
+        Bulk insert log entries in a single executemany statement
+
+        Args:
+            entries (List[dict]): Column values of QuestionLog rows
+
+        Returns:
+            None
+
+        Raises:
+            SQLAlchemyError: If the insert or commit fails
+        """
+        if not entries:
+            return None
+        try:
+            self.db.execute(insert(QuestionLog), entries)
+            self.db.commit()
+            return None
+        except SQLAlchemyError:
+            self.db.rollback()
+            print(f"[QuestionLogCrud] @add_entries: Database error occurred")
+            raise
+
+    def get_top_questions(self, limit: int) -> List[str]:
+        """
+        Most frequently asked questions, one representative wording per normalized question. Questions rejected
+        by the relevance gate (never worth an LLM call) and chat turns (follow-ups depend on earlier turns)
+        are left out
+
+        Returns:
+            List[str]: Questions ordered by how often they were asked
+
+        Raises:
+            Exception: If the database query fails
+        """
+        try:
+            rows = self.db.query(QuestionLog.question_key, func.min(QuestionLog.question), func.count(QuestionLog.id)) \
+                .filter(QuestionLog.answer_source.notin_(("gated", "chat"))) \
+                .group_by(QuestionLog.question_key) \
+                .order_by(func.count(QuestionLog.id).desc(), QuestionLog.question_key) \
+                .limit(limit) \
+                .all()
+            return [question for _, question, _ in rows]
+        except Exception:
+            print(f"[QuestionLogCrud] @get_top_questions: Database error occurred")
+            raise
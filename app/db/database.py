@@ -1,17 +1,189 @@
-from sqlalchemy import create_engine
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Receives (role, seconds waited) after every pool checkout and (role, None) when a checkout timed out.
+# Set by the application (app.main records them as metrics), the db layer does not depend on services
+_checkout_listener: Optional[Callable[[str, Optional[float]], None]] = None
+
+
+def set_checkout_listener(listener: Optional[Callable[[str, Optional[float]], None]]):
+    global _checkout_listener
+    _checkout_listener = listener
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool reporting how long checkouts wait for a connection to the checkout listener
+    """
+    role = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if _checkout_listener is not None:
+                _checkout_listener(self.role, None)
+            raise
+        if _checkout_listener is not None:
+            _checkout_listener(self.role, time.perf_counter() - started)
+        return connection
+
+
+def is_in_memory_database(url: str) -> bool:
+    database_url = make_url(url)
+    return database_url.get_backend_name() == "sqlite" and database_url.database in (None, "", ":memory:")
+
+
+def create_role_engine(role: str, url: str, options: dict) -> Engine:
+    """
+    Create the engine of a role ("read"/"write") with its own pool, pre-ping and statement timeout
+
+    Args:
+        role (str): Engine role, used as metric prefix
+        url (str): Database URL
+        options (dict): Role options from settings.DB_ENGINES
+
+    Returns:
+        Engine
+    """
+    if is_in_memory_database(url):
+        return create_engine(url)
+
+    database_url = make_url(url)
+
+    connect_args = {}
+    statement_timeout_ms = options.get("statement_timeout_ms")
+    if statement_timeout_ms and database_url.get_backend_name() == "postgresql":
+        connect_args["options"] = f"-c statement_timeout={int(statement_timeout_ms)}"
+
+    return create_engine(
+        url,
+        poolclass=type(f"{role.capitalize()}TimedQueuePool", (TimedQueuePool,), {"role": role}),
+        pool_size=options.get("pool_size", 5),
+        max_overflow=options.get("max_overflow", 10),
+        pool_timeout=options.get("pool_timeout", 30),
+        pool_recycle=options.get("pool_recycle", -1),
+        pool_pre_ping=options.get("pool_pre_ping", True),
+        connect_args=connect_args,
+    )
+
+
+write_engine = create_role_engine("write", settings.DATABASE_URL, settings.DB_ENGINES["write"])
+if settings.DATABASE_READ_URL or not is_in_memory_database(settings.DATABASE_URL):
+    read_engine = create_role_engine(
+        "read", settings.DATABASE_READ_URL or settings.DATABASE_URL, settings.DB_ENGINES["read"]
+    )
+else:
+    # An in-memory SQLite database is private to its engine, reads have to share it
+    read_engine = write_engine
+# Advisory lock id of init_db on PostgreSQL (any constant shared by all processes of the app)
+SCHEMA_LOCK_KEY = 724_301_905
+
+engine = write_engine
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 Base = declarative_base()
 
 
 def get_db():
+    """
+    Session of the write engine, for everything that writes (crawler, question log, precompute, leases)
+    """
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db():
+    """
+    Session of the read engine (read replica if configured), for the API read path
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def pool_metrics() -> Dict[str, float]:
+    """
+    Current connection counts of the read and write pools as db.<role>.* gauges
+    """
+    metrics = {}
+    for role, role_engine in (("write", write_engine), ("read", read_engine)):
+        pool = role_engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        metrics[f"db.{role}.pool_size"] = pool.size()
+        metrics[f"db.{role}.checked_out"] = pool.checkedout()
+        metrics[f"db.{role}.checked_in"] = pool.checkedin()
+        metrics[f"db.{role}.overflow"] = max(pool.overflow(), 0)
+    return metrics
+
+
+def init_db():
+    """
+    Create missing tables for all ORM models and add nullable columns introduced after a table was created.
+    Every worker runs it at startup; on PostgreSQL the workers take turns (advisory lock)
+    """
+    from app.db.models import page, page_link, crawl_lease, precomputed_answer, question_log  # noqa: F401 - register models on Base.metadata
+    with _schema_lock():
+        Base.metadata.create_all(bind=engine)
+        _add_missing_columns()
+
+
+@contextmanager
+def _schema_lock():
+    """
+    Session-level advisory lock on PostgreSQL, so workers starting together do not alter the same table at once.
+    Other databases are used by a single host (SQLite), there _add_missing_columns tolerates a lost race
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+
+
+def _add_missing_columns():
+    """
+    create_all never alters existing tables. Columns added to a model later are nullable, so they can be
+    added in place without a migration tool. Each column is added in its own transaction; a column another
+    process added in the meantime is skipped
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            except DBAPIError:
+                if column.name not in {added["name"] for added in inspect(engine).get_columns(table.name)}:
+                    raise
+                print(f"[Database] Column {table.name}.{column.name} was added by another process")
+                continue
+            print(f"[Database] Added column {table.name}.{column.name}")
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, DateTime
+
+from app.db.database import Base
+
+
+class CrawlLease(Base):
+    """
+    Lease row used to elect a single crawl leader among all workers and replicas sharing the database
+    Attributes:
+        name (str): Primary key, name of the leased job (e.g. "crawl")
+        owner (str): Identifier of the process holding the lease ("<hostname>:<pid>:<nonce>")
+        expires_at (datetime): UTC time after which the lease can be taken over by another process
+                              Renewed periodically by the owner while the crawl runs
+        completed_at (datetime): UTC time the last crawl finished successfully, None if never
+    """
+    __tablename__ = "crawl_leases"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
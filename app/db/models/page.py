@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import Column, Integer, String, DateTime, Float, func
 
 from app.db.database import Base
 
@@ -13,6 +13,13 @@ class Page(Base):
                   Must be unique across all pages
         content (str): Extracted and cleaned text content from the page
                       Excludes scripts, styles, and other non-text elements
+        summary (str): Extractive summary (headings, contact/price facts, key sentences) computed at crawl time
+                      None for pages stored before summaries existed
+        language (str): Page language code ("et"/"en") detected at crawl time, None if unknown
+        revision (int): Number of in-place updates (single-URL refreshes), part of the corpus version
+                       None for pages never updated
+        importance (float): PageRank of the page in the crawled link graph, scaled so the average page has 1.0
+                           Computed after every crawl (see PageRankService), None until then
         created_at (datetime): Timestamp when the page was stored in the database
                               Automatically set to current time on creation
     """
@@ -21,6 +28,10 @@ class Page(Base):
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String, unique=True, index=True, nullable=False)
     content = Column(String, nullable=False)
+    summary = Column(String, nullable=True)
+    language = Column(String(8), nullable=True, index=True)
+    revision = Column(Integer, nullable=True)
+    importance = Column(Float, nullable=True)
     created_at = Column(DateTime, default=func.now())
 
     def to_dict(self):
@@ -28,5 +39,9 @@ class Page(Base):
             "id": self.id,
             "url": self.url,
             "content": self.content,
+            "summary": self.summary,
+            "language": self.language,
+            "revision": self.revision,
+            "importance": self.importance,
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+
+from app.db.database import Base
+
+
+class PageLink(Base):
+    """
+    Internal link between two pages, recorded by the crawler for the link graph (see PageRankService)
+    Attributes:
+        id (int): Primary key, auto-incremented unique identifier
+        source_url (str): URL of the stored page containing the link
+        target_url (str): Absolute URL the link points to, without fragment
+                         The target does not have to be a stored page
+    """
+    __tablename__ = "page_links"
+    __table_args__ = (UniqueConstraint("source_url", "target_url"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_url = Column(String, nullable=False, index=True)
+    target_url = Column(String, nullable=False)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint, func
+
+from app.db.database import Base
+
+
+class PrecomputedAnswer(Base):
+    """
+    Answer generated in the background after a crawl for a frequent question
+    Attributes:
+        id (int): Primary key, auto-incremented unique identifier
+        corpus_version (str): Corpus version the answer was generated from (see PageCrud.get_corpus_version)
+                             Answers of other versions are never served
+        question_key (str): Normalized question used for lookups (see PrecomputeService.normalize_question)
+        question (str): Question as it was asked
+        response (str): AskResponse serialized as JSON
+        created_at (datetime): Timestamp when the answer was stored
+    """
+    __tablename__ = "precomputed_answers"
+    __table_args__ = (UniqueConstraint("corpus_version", "question_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    corpus_version = Column(String, nullable=False, index=True)
+    question_key = Column(String, nullable=False)
+    question = Column(String, nullable=False)
+    response = Column(String, nullable=False)
+    created_at = Column(DateTime, default=func.now())
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, func
+
+from app.db.database import Base
+
+
+class QuestionLog(Base):
+    """
+    One answered /ask request, written asynchronously in batches by QuestionLogService
+    Attributes:
+        id (int): Primary key, auto-incremented unique identifier
+        question (str): Question as it was asked
+        question_key (str): Normalized question (see ValidationService.normalize_question), used to find
+                           frequent questions
+        answer (str): Returned answer
+        sources (str): JSON list of source URLs
+        answer_source (str): How the answer was produced, e.g. "llm", "precomputed", "gated" or "chat"
+        corpus_version (str): Corpus version the answer is based on
+        input_tokens (int), output_tokens (int), cached_input_tokens (int): Token usage of the request
+        latency_ms (float): Time spent in AppService.ask_question
+        relevance_score (float): Relevance gate score of the question (see RelevanceService), None if not scored
+        created_at (datetime): Time the question was answered (not the time the row was written)
+    """
+    __tablename__ = "question_logs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    question = Column(String, nullable=False)
+    question_key = Column(String, nullable=False, index=True)
+    answer = Column(String, nullable=False)
+    sources = Column(String, nullable=False)
+    answer_source = Column(String, nullable=False)
+    corpus_version = Column(String, nullable=True)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cached_input_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Float, nullable=False)
+    relevance_score = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=func.now(), index=True)
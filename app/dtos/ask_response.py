@@ -3,6 +3,14 @@ from pydantic import BaseModel
 class Usage(BaseModel):
     input_tokens: int
     output_tokens: int
+    cached_input_tokens: int = 0
+
+    def __add__(self, other: "Usage") -> "Usage":
+        return Usage(
+            input_tokens=self.input_tokens + other.input_tokens,
+            output_tokens=self.output_tokens + other.output_tokens,
+            cached_input_tokens=self.cached_input_tokens + other.cached_input_tokens,
+        )
 
 class AskFormat(BaseModel):
     question: str
@@ -11,5 +19,7 @@ class AskFormat(BaseModel):
 
 class AskResponse(AskFormat):
     usage: Usage
+    # Degraded answer built locally from page passages because the LLM did not answer in time (see FallbackService)
+    fallback: bool = False
 
 
@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+
+class RefreshRequest(BaseModel):
+    urls: list[str]
@@ -0,0 +1,14 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class RefreshResult(BaseModel):
+    url: str
+    status: str
+    detail: Optional[str] = None
+
+
+class RefreshResponse(BaseModel):
+    corpus_version: str
+    results: list[RefreshResult]
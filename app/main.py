@@ -1,19 +1,55 @@
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware
-from app.api.routes import info
-from app.db.database import engine, Base
+from app.api.routes import admin, chat, info
+from app.db.database import init_db, pool_metrics, set_checkout_listener
 from app.services.crawler_service import CrawlerService
+from app.services.metrics_service import MetricsService
+from app.services.question_log_service import QuestionLogService
+from app.services.readiness_service import ReadinessService
 
 # ============================================================================
-# Application entry point. Initialises database tables, starts crawler(once),
-# launches fast api server
+# Application entry point. Initialises database tables, starts crawler(once
+# per deployment, see CrawlerService), launches fast api server
 # ============================================================================
 
-Base.metadata.create_all(bind=engine)
-crawler_service = CrawlerService()
 
-app = FastAPI(title="tehniliseintellekt.ee web chat api", version="1.0.0")
+def record_pool_checkout(role: str, waited: Optional[float]):
+    """
+    Checkout listener of the database pools: waits and timeouts as db.<role>.* metrics
+    """
+    if waited is None:
+        MetricsService.increment(f"db.{role}.checkout_timeouts")
+        return
+    MetricsService.increment(f"db.{role}.checkouts")
+    MetricsService.increment(f"db.{role}.checkout_wait_seconds", waited)
+    MetricsService.set_max(f"db.{role}.checkout_wait_max_seconds", waited)
+
+
+set_checkout_listener(record_pool_checkout)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    QuestionLogService.start()
+    crawler_service = CrawlerService()
+    crawler_service.start()
+    readiness_service = ReadinessService()
+    readiness_service.start()
+    yield
+    readiness_service.stop()
+    crawler_service.stop()
+    QuestionLogService.stop()
+
+
+app = FastAPI(title="tehniliseintellekt.ee web chat api", version="1.0.0", lifespan=lifespan)
 app.include_router(info.router, prefix="", tags=["info"])
+app.include_router(chat.router, prefix="", tags=["chat"])
+app.include_router(admin.router, prefix="", tags=["admin"])
 
 origins = [
     "http://localhost:3000",
@@ -32,3 +68,21 @@ app.add_middleware(
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+def readiness_check():
+    """
+    Readiness probe: 200 once the corpus snapshot is loaded and the worker is warm, 503 until then
+    """
+    if not ReadinessService.is_ready():
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready", "corpus_version": ReadinessService.corpus_version()}
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Process-local counters (per-route latency, tokens and cost, ...) and database pool gauges
+    """
+    return {**MetricsService.snapshot(), **pool_metrics()}
@@ -1,74 +1,307 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
 from fastapi import HTTPException
 
-from app.db.database import get_db
-from app.dtos.ask_response import AskResponse
+from app.config import settings
+from app.db.database import get_read_db
+from app.dtos.ask_response import AskResponse, Usage
 from app.cruds.page_crud import PageCrud
-from app.services.openai_service import OpenAIService
+from app.cruds.precomputed_answer_crud import PrecomputedAnswerCrud
+from app.services.corpus_service import CorpusService, CorpusSnapshot
+from app.services.fallback_service import FallbackService
+from app.services.language_service import LanguageService
+from app.services.metrics_service import MetricsService
+from app.services.openai_service import SHARD_RULES, OpenAIService, openai_caller
+from app.services.question_log_service import QuestionLogService
+from app.services.relevance_service import RelevanceService
+from app.services.resilience_service import (
+    Cancellation, CircuitOpenError, RequestCancelledError, is_retryable_openai_error,
+)
+from app.services.routing_service import Route, RoutingService
+from app.services.source_info_service import SourceInfoService
 from app.services.validation_service import ValidationService
 
 
+# Rough size of a token in characters, for estimating tokens of prompts that were never sent
+ESTIMATED_CHARS_PER_TOKEN = 4
+
+
 class AppService:
     """
     Entry point from user request to app functionality. Handles exceptions from lower application layers and process business logic
     """
 
     def __init__(self):
-        self.db = next(get_db())
+        self.db = next(get_read_db())
         self.page_crud = PageCrud(self.db)
+        self.corpus_service = CorpusService(self.page_crud)
+        self.precomputed_answer_crud = PrecomputedAnswerCrud(self.db)
         self.validation_service = ValidationService()
         self.openai_service = OpenAIService()
+        self.routing_service = RoutingService()
+        self.language_service = LanguageService()
+        self.source_info_service = SourceInfoService()
+        self.relevance_service = RelevanceService()
+        self.fallback_service = FallbackService()
 
-    def get_source_info(self) -> dict[str, str]:
+    def get_source_info_file(self, accept_encoding: Optional[str] = None) -> Tuple[str, Optional[str], str]:
         """
-        Retrieve all crawled pages and their content from the database.
+        Pre-rendered /source_info file of the current corpus version in the best encoding the client accepts
 
         Returns:
-            dict[str, str]
-            Example: {"https://example.com": "Page content..."}
+            Tuple[str, Optional[str], str]: File path, Content-Encoding (None for identity) and ETag
 
         Raises:
-            HTTPException: 500 status code if database retrieval fails
+            HTTPException: 500 status code if database retrieval or rendering fails
         """
         try:
-            pages_dict = {}
-            pages = self.page_crud.get_all_pages()
-
-            for page in pages:
-                pages_dict[page.url] = page.content
-            return pages_dict
+            return self.source_info_service.get_file(self.corpus_service.get_snapshot(), accept_encoding)
         except Exception as e:
-            print(f'[MainService] @get_source: {e}')
+            print(f'[MainService] @get_source_info_file: {e}')
             raise HTTPException(status_code=500, detail=str(e))
 
-    def ask_question(self, question: str) -> AskResponse:
+    def ask_question(self, question: str, cancellation: Optional[Cancellation] = None) -> AskResponse:
         """
             Process a user question and generate an AI-powered answer based on crawled content.
 
+            Args:
+                question (str): The user's question
+                cancellation (Optional[Cancellation]): Deadline and disconnect flag of the request. Checked before
+                    the corpus stage and before and during the LLM call; cancelled work is counted in metrics.
+                    With ASK_FALLBACK_ENABLED the LLM stage is bounded by ASK_FALLBACK_DEADLINE_SECONDS, see
+                    answer_or_fall_back
+
             Returns:
                 AskResponse
 
             Raises:
                 HTTPException:
                     - 400 status code if question validation fails
+                    - 499 status code if the client disconnected
                     - 500 status code if no pages are available in the database
                     - 500 status code if OpenAI processing fails or other unexpected errors occur
+                    - 503 status code if OpenAI calls are suspended by the circuit breaker (without ASK_FALLBACK_ENABLED)
+                    - 504 status code if the request deadline passed
             """
         result = self.validation_service.validate_question(question)
         if not result.is_valid:
             raise HTTPException(status_code=400, detail=result.details)
 
+        started = time.monotonic()
         try:
-            pages_dict = {}
-            pages = self.page_crud.get_all_pages()
+            if cancellation is not None:
+                cancellation.check("corpus")
+            snapshot = self.corpus_service.get_snapshot()
 
-            if not pages:
+            if not snapshot.pages:
                 raise HTTPException(status_code=500, detail='No information available')
 
-            for page in pages:
-                pages_dict[page.url] = page.content
+            question_key = self.validation_service.normalize_question(question)
+            precomputed = self.precomputed_answer_crud.get_answer(snapshot.version, question_key)
+            if precomputed is not None:
+                response = AskResponse.model_validate_json(precomputed.response)
+                # Tokens were spent when the answer was precomputed, this request used none
+                response = response.model_copy(
+                    update={"question": question, "usage": Usage(input_tokens=0, output_tokens=0)}
+                )
+                self.log_question(question_key, response, "precomputed", snapshot.version, started)
+                return response
+
+            relevance_score = None
+            if settings.RELEVANCE_GATE != "off":
+                decision = self.relevance_service.check(question, snapshot)
+                relevance_score = decision.score
+                if not decision.relevant:
+                    response = self.relevance_service.canned_response(question, self.language_service.detect(question))
+                    self.log_question(question_key, response, "gated", snapshot.version, started, relevance_score)
+                    return response
 
-            result = self.openai_service.answer_question(question, pages_dict)
-            return AskResponse.model_validate(result)
+            response, answer_source = self.answer_or_fall_back(question, snapshot, cancellation)
+            self.log_question(question_key, response, answer_source, snapshot.version, started, relevance_score)
+            return response
+        except RequestCancelledError as e:
+            print(f'[MainService] @ask: {e}')
+            self._record_cancellation(e)
+            raise HTTPException(status_code=504 if e.reason == "deadline" else 499, detail=str(e))
+        except CircuitOpenError as e:
+            print(f'[MainService] @ask: {e}')
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:
             print(f'[MainService] @ask: {e}')
             raise HTTPException(status_code=500, detail=str(e))
+
+    def answer_or_fall_back(self, question: str, snapshot: CorpusSnapshot,
+                            cancellation: Optional[Cancellation] = None) -> Tuple[AskResponse, str]:
+        """
+        generate_answer bounded by ASK_FALLBACK_DEADLINE_SECONDS: if the circuit breaker is open, OpenAI has not
+        answered within the deadline, or it failed with a transient error after the retries (timeout, connection,
+        rate limit, 5xx), a local extractive answer (FallbackService) is returned instead of an error.
+        The request's own deadline and client disconnects still cancel the request
+
+        Returns:
+            Tuple[AskResponse, str]: The answer and its source for the question log, "llm" or "fallback"
+
+        Raises:
+            RequestCancelledError: If the request (not only its LLM stage) was cancelled
+            CircuitOpenError: If the circuit breaker is open and fallback answers are disabled
+            Exception: Provider errors that are not transient (e.g. bad request, authentication)
+        """
+        if not settings.ASK_FALLBACK_ENABLED:
+            return self.generate_answer(question, snapshot, cancellation), "llm"
+
+        llm_cancellation = Cancellation(settings.ASK_FALLBACK_DEADLINE_SECONDS, parent=cancellation)
+        try:
+            return self.generate_answer(question, snapshot, llm_cancellation), "llm"
+        except CircuitOpenError as e:
+            reason = "circuit_open"
+            print(f'[MainService] @answer_or_fall_back: {e}, answering from page passages')
+        except RequestCancelledError:
+            if cancellation is not None and cancellation.cancelled:
+                raise
+            reason = "deadline"
+            print(f'[MainService] @answer_or_fall_back: no answer within {settings.ASK_FALLBACK_DEADLINE_SECONDS}s, '
+                  f'answering from page passages')
+        except Exception as e:
+            if not is_retryable_openai_error(e):
+                raise
+            reason = "error"
+            print(f'[MainService] @answer_or_fall_back: {type(e).__name__}: {e}, answering from page passages')
+
+        MetricsService.increment(f"fallbacks.{reason}")
+        return self.fallback_service.answer(question, snapshot, self.language_service.detect(question)), "fallback"
+
+    def generate_answer(self, question: str, snapshot: CorpusSnapshot,
+                        cancellation: Optional[Cancellation] = None) -> AskResponse:
+        """
+        Narrow the corpus to the question's language, route the question, select the context within the route
+        budget (CONTEXT_MODE) and ask OpenAI. A corpus above the budget of a map-reduce route is answered shard by
+        shard (see _answer_sharded) instead of trimmed. Shared by /ask and the post-crawl precompute stage.
+        Errors are not translated to HTTP errors here
+
+        Returns:
+            AskResponse
+        """
+        language = self.language_service.detect(question)
+        corpus = snapshot.language_view(language, question)
+        MetricsService.increment(f"languages.{language or 'unknown'}.requests")
+        if language and corpus is snapshot:
+            MetricsService.increment(f"languages.{language}.fallbacks")
+
+        route = self.routing_service.choose(
+            question, corpus.context_chars, latency_p95=openai_caller.latency_tracker.percentile(0.95)
+        )
+        mode = settings.CONTEXT_MODE
+        if settings.CONTEXT_MODE == "two_stage":
+            pages, context = corpus.select_two_stage(question, route.max_context_chars, settings.TWO_STAGE_MAX_PAGES)
+        elif route.map_reduce and settings.MAP_REDUCE_MAX_SHARDS > 1 and corpus.context_chars > route.max_context_chars:
+            mode = "map_reduce"
+            shards = corpus.select_shards(question, route.max_context_chars, settings.MAP_REDUCE_MAX_SHARDS)
+        else:
+            pages, context = corpus.select_context(question, route.max_context_chars)
+        context_chars = sum(len(shard) for _, _, shard in shards) if mode == "map_reduce" else len(context)
+
+        if cancellation is not None:
+            cancellation.check("llm_queued", tokens_saved=context_chars // ESTIMATED_CHARS_PER_TOKEN)
+
+        started = time.monotonic()
+        if mode == "map_reduce":
+            response = self._answer_sharded(question, corpus, route, shards, cancellation)
+        else:
+            result = self.openai_service.answer_question(
+                question, pages, context=context, cache_key=f"{corpus.version}-{route.name}", model=route.model,
+                cancellation=cancellation,
+            )
+            response = AskResponse.model_validate(result)
+        seconds = time.monotonic() - started
+        self.routing_service.record(route, seconds, context_chars, response.usage)
+        MetricsService.increment(f"context_modes.{mode}.requests")
+        MetricsService.increment(f"context_modes.{mode}.context_chars_total", context_chars)
+        MetricsService.increment(f"context_modes.{mode}.latency_seconds_total", seconds)
+        return response
+
+    def _answer_sharded(self, question: str, corpus: CorpusSnapshot, route: Route,
+                        shards: List[Tuple[int, Dict[str, str], str]],
+                        cancellation: Optional[Cancellation] = None) -> AskResponse:
+        """
+        Map-reduce answer: the question is asked against every shard in parallel (at most MAP_REDUCE_CONCURRENCY
+        calls at a time), then the partial answers that cite sources are combined by one more call. With a single
+        such answer the combine call is skipped. Shards whose call fails are left out unless all of them fail.
+        Each shard keeps its own prompt cache key, shards are stable per corpus version and budget
+
+        Returns:
+            AskResponse: Usage is the sum over all calls
+
+        Raises:
+            RequestCancelledError: If the cancellation fired
+            Exception: The error of the first shard if no shard was answered, or of the combine call
+        """
+        partials, errors = [], []
+        with ThreadPoolExecutor(max_workers=max(1, min(settings.MAP_REDUCE_CONCURRENCY, len(shards)))) as executor:
+            futures = [
+                executor.submit(
+                    self.openai_service.answer_question, question, pages, context=context,
+                    cache_key=f"{corpus.version}-{route.name}-{number}", model=route.model,
+                    cancellation=cancellation, rules=SHARD_RULES,
+                )
+                for number, pages, context in shards
+            ]
+            for future in futures:
+                try:
+                    partials.append(AskResponse.model_validate(future.result()))
+                except RequestCancelledError:
+                    raise
+                except Exception as e:
+                    print(f'[MainService] @_answer_sharded: {e}')
+                    errors.append(e)
+
+        MetricsService.increment("map_reduce.requests")
+        MetricsService.increment("map_reduce.shards", len(shards))
+        MetricsService.increment("map_reduce.failed_shards", len(errors))
+        if not partials:
+            raise errors[0]
+
+        usage = sum((partial.usage for partial in partials), Usage(input_tokens=0, output_tokens=0))
+        answered = [partial for partial in partials if partial.sources]
+        if len(answered) < 2:
+            response = (answered or partials)[0]
+        else:
+            response = AskResponse.model_validate(self.openai_service.combine_answers(
+                question, answered, model=route.model, cancellation=cancellation
+            ))
+            usage = usage + response.usage
+        return response.model_copy(update={"usage": usage})
+
+    @staticmethod
+    def _record_cancellation(error: RequestCancelledError):
+        """
+        Count cancelled work: by reason, by the stage that stopped it, and the input tokens of LLM calls that were
+        skipped. A call already in flight ("llm" stage) is still billed by the provider, only the wait is saved
+        """
+        MetricsService.increment(f"cancellations.{error.reason}")
+        MetricsService.increment(f"cancellations.stages.{error.stage}")
+        MetricsService.increment("cancellations.tokens_saved", error.tokens_saved)
+
+    @staticmethod
+    def log_question(question_key: str, response: AskResponse, answer_source: str, corpus_version: str,
+                      started: float, relevance_score: Optional[float] = None):
+        """
+        Queue the answered question for the asynchronous question log
+        """
+        QuestionLogService.log({
+            "question": response.question,
+            "question_key": question_key,
+            "answer": response.answer,
+            "sources": json.dumps(response.sources),
+            "answer_source": answer_source,
+            "corpus_version": corpus_version,
+            "input_tokens": response.usage.input_tokens,
+            "output_tokens": response.usage.output_tokens,
+            "cached_input_tokens": response.usage.cached_input_tokens,
+            "latency_ms": (time.monotonic() - started) * 1000,
+            "relevance_score": relevance_score,
+            "created_at": datetime.utcnow(),
+        })
@@ -0,0 +1,286 @@
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Deque, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.cruds.page_crud import PageCrud
+from app.db.database import ReadSessionLocal
+from app.dtos.ask_response import AskResponse
+from app.services.app_service import AppService
+from app.services.corpus_service import CorpusService, CorpusSnapshot
+from app.services.language_service import LanguageService
+from app.services.metrics_service import MetricsService
+from app.services.openai_service import OpenAIService, openai_caller
+from app.services.relevance_service import RelevanceService
+from app.services.resilience_service import CircuitOpenError
+from app.services.routing_service import RoutingService
+from app.services.validation_service import ValidationService
+
+
+class ChatSession:
+    """
+    Server-side state of one /chat conversation
+
+    Attributes:
+        id (str): Session id, sent to the client so it can resume the session after a reconnect
+        turns (Deque[Tuple[str, str]]): Last CHAT_MAX_TURNS (question, answer) pairs
+        corpus_version (Optional[str]): Version of the corpus (language view) the context was selected from
+        urls (List[str]): Pages in the context, in the order they were added
+        context (str): Serialized context of the session. New pages are appended, so earlier turns' context
+                       stays a stable, cacheable prompt prefix
+        context_shared (bool): The whole corpus fits, its context is taken from the snapshot on every turn and not
+                               kept by the session (`context` stays empty)
+        memory_bytes (int): Approximate memory held by the session (see update_memory)
+        last_active (float): time.monotonic() of the last turn or reconnect
+    """
+    id: str
+    turns: Deque[Tuple[str, str]]
+    corpus_version: Optional[str]
+    urls: List[str]
+    context: str
+    context_shared: bool
+    memory_bytes: int
+    last_active: float
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.turns = deque(maxlen=settings.CHAT_MAX_TURNS)
+        self.corpus_version = None
+        self.urls = []
+        self._url_set: Set[str] = set()
+        self.context = ""
+        self.context_shared = False
+        self.memory_bytes = 0
+        self.last_active = time.monotonic()
+        # One turn at a time, a second connection to the same session waits
+        self.lock = threading.Lock()
+
+    def extend_context(self, corpus: CorpusSnapshot, question: str, max_chars: int) -> str:
+        """
+        Context for the next turn: the pages selected on earlier turns plus the pages relevant to this question
+        (retrieved with the previous question, so short follow-ups still find their topic). New pages are
+        appended to the existing serialization instead of re-serializing. The context starts over when the
+        corpus changed or the new pages would not fit into max_chars
+
+        Returns:
+            str: Serialized context
+        """
+        if corpus.version != self.corpus_version:
+            self.corpus_version = corpus.version
+            self.urls, self._url_set, self.context, self.context_shared = [], set(), "", False
+
+        if corpus.context_chars <= max_chars:
+            # Not kept by the session: the snapshot holds (or maps) it already
+            self.urls, self._url_set = list(corpus.pages), set(corpus.pages)
+            self.context, self.context_shared = "", True
+            return corpus.context
+
+        query = " ".join([question for question, _ in list(self.turns)[-1:]] + [question])
+        selected, selected_context = corpus.select_context(query, max_chars)
+        new_urls = [url for url in selected if url not in self._url_set]
+        addition = "\n\n".join([f"[{url}]\n{selected[url]}" for url in new_urls])
+
+        if self.context and not self.context_shared and len(self.context) + len(addition) + 2 <= max_chars:
+            if addition:
+                self.context = f"{self.context}\n\n{addition}"
+                self.urls.extend(new_urls)
+                self._url_set.update(new_urls)
+        else:
+            self.urls, self._url_set = list(selected), set(selected)
+            self.context, self.context_shared = selected_context, False
+        return self.context
+
+    def update_memory(self) -> int:
+        """
+        Recount the memory held by the session: turn history, context (unless shared with the snapshot) and URLs
+        """
+        size = sum(sys.getsizeof(question) + sys.getsizeof(answer) for question, answer in self.turns)
+        size += sum(sys.getsizeof(url) for url in self.urls)
+        if not self.context_shared:
+            size += sys.getsizeof(self.context)
+        self.memory_bytes = size
+        return size
+
+
+class ChatSessionStore:
+    """
+    Process-wide LRU store of chat sessions. Sessions idle for CHAT_SESSION_IDLE_SECONDS are evicted, and the
+    least recently used ones while the store is over CHAT_MAX_SESSIONS or CHAT_MAX_MEMORY_BYTES. Eviction runs
+    whenever a session is opened or finishes a turn
+    """
+
+    _sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def open(cls, session_id: Optional[str] = None) -> ChatSession:
+        """
+        Resume the session with this id if it is still stored, otherwise start a new one
+        """
+        with cls._lock:
+            cls._evict_idle()
+            session = cls._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = ChatSession(uuid.uuid4().hex)
+                cls._sessions[session.id] = session
+                MetricsService.increment("chat.sessions_created")
+            session.last_active = time.monotonic()
+            cls._sessions.move_to_end(session.id)
+            cls._evict_over_capacity(session)
+            cls._update_gauges()
+            return session
+
+    @classmethod
+    def touch(cls, session: ChatSession):
+        """
+        Mark the session as used after a turn and re-account its memory. A session that was evicted while
+        its connection was still open is stored again
+        """
+        with cls._lock:
+            session.last_active = time.monotonic()
+            session.update_memory()
+            cls._sessions[session.id] = session
+            cls._sessions.move_to_end(session.id)
+            cls._evict_idle()
+            cls._evict_over_capacity(session)
+            cls._update_gauges()
+
+    @classmethod
+    def get(cls, session_id: str) -> Optional[ChatSession]:
+        with cls._lock:
+            return cls._sessions.get(session_id)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._sessions.clear()
+            cls._update_gauges()
+
+    @classmethod
+    def _evict_idle(cls):
+        # Sessions are kept in LRU order, so the idle ones are at the front
+        deadline = time.monotonic() - settings.CHAT_SESSION_IDLE_SECONDS
+        while cls._sessions:
+            session = next(iter(cls._sessions.values()))
+            if session.last_active > deadline:
+                break
+            cls._evict(session, "idle")
+
+    @classmethod
+    def _evict_over_capacity(cls, keep: ChatSession):
+        memory = sum(session.memory_bytes for session in cls._sessions.values())
+        while len(cls._sessions) > 1:
+            over_count = len(cls._sessions) > settings.CHAT_MAX_SESSIONS
+            over_memory = memory > settings.CHAT_MAX_MEMORY_BYTES
+            if not over_count and not over_memory:
+                break
+            session = next(iter(cls._sessions.values()))
+            if session is keep:
+                break
+            memory -= session.memory_bytes
+            cls._evict(session, "lru" if over_count else "memory")
+
+    @classmethod
+    def _evict(cls, session: ChatSession, reason: str):
+        del cls._sessions[session.id]
+        MetricsService.increment(f"chat.sessions_evicted.{reason}")
+
+    @classmethod
+    def _update_gauges(cls):
+        MetricsService.set("chat.sessions", len(cls._sessions))
+        MetricsService.set("chat.memory_bytes", sum(session.memory_bytes for session in cls._sessions.values()))
+
+
+class ChatService:
+    """
+    Answers the questions of a /chat session: like AppService.ask_question, but with the session's previous
+    turns in the prompt, the context selected on earlier turns reused and extended, and the answer streamed
+    """
+
+    def __init__(self):
+        self.validation_service = ValidationService()
+        self.openai_service = OpenAIService()
+        self.routing_service = RoutingService()
+        self.language_service = LanguageService()
+        self.relevance_service = RelevanceService()
+
+    def get_snapshot(self) -> CorpusSnapshot:
+        """
+        Current corpus snapshot. A session is used per turn, so a long-lived connection holds no database connection
+        """
+        db = ReadSessionLocal()
+        try:
+            return CorpusService(PageCrud(db)).get_snapshot()
+        finally:
+            db.close()
+
+    def ask(self, session: ChatSession, question: str, on_delta: Optional[Callable[[str], None]] = None) -> AskResponse:
+        """
+        Answer the next question of the session, passing answer text to `on_delta` while it is generated
+
+        Returns:
+            AskResponse
+
+        Raises:
+            HTTPException:
+                - 400 status code if question validation fails
+                - 500 status code if no pages are available or answering fails
+                - 503 status code if OpenAI calls are suspended by the circuit breaker
+        """
+        result = self.validation_service.validate_question(question)
+        if not result.is_valid:
+            raise HTTPException(status_code=400, detail=result.details)
+
+        started = time.monotonic()
+        with session.lock:
+            try:
+                snapshot = self.get_snapshot()
+                if not snapshot.pages:
+                    raise HTTPException(status_code=500, detail='No information available')
+
+                question_key = self.validation_service.normalize_question(question)
+                language = self.language_service.detect(question)
+                relevance_score = None
+                # Follow-ups ("and how much is it?") only make sense with the earlier turns, only the opening
+                # question is gated
+                if not session.turns and settings.RELEVANCE_GATE != "off":
+                    decision = self.relevance_service.check(question, snapshot)
+                    relevance_score = decision.score
+                    if not decision.relevant:
+                        response = self.relevance_service.canned_response(question, language)
+                        AppService.log_question(question_key, response, "gated", snapshot.version, started,
+                                                relevance_score)
+                        return response
+
+                corpus = snapshot.language_view(language, question)
+                route = self.routing_service.choose(
+                    question, corpus.context_chars, latency_p95=openai_caller.latency_tracker.percentile(0.95)
+                )
+                context = session.extend_context(corpus, question, route.max_context_chars)
+                cache_key = f"{corpus.version}-{route.name}" if session.context_shared else f"chat-{session.id}"
+
+                answer_started = time.monotonic()
+                response = self.openai_service.stream_answer(
+                    question, context, history=list(session.turns), cache_key=cache_key, model=route.model,
+                    on_delta=on_delta,
+                )
+                self.routing_service.record(route, time.monotonic() - answer_started, len(context), response.usage)
+                MetricsService.increment("chat.turns")
+
+                session.turns.append((question, response.answer))
+                ChatSessionStore.touch(session)
+                AppService.log_question(question_key, response, "chat", snapshot.version, started, relevance_score)
+                return response
+            except HTTPException:
+                raise
+            except CircuitOpenError as e:
+                print(f'[ChatService] @ask: {e}')
+                raise HTTPException(status_code=503, detail=str(e))
+            except Exception as e:
+                print(f'[ChatService] @ask: {e}')
+                raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,196 @@
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.config import settings
+
+MAGIC = b"CMTCORP2"
+# magic, page count, context offset, context length, corpus version length
+HEADER = struct.Struct("<8sIQQH")
+# url, content and summary (offset, length) pairs, language code, token count, importance (0: not ranked)
+RECORD = struct.Struct("<QIQIQI2sId")
+
+
+class MappedCorpus:
+    """
+    Read-only, memory-mapped corpus file written by CorpusFileService.export. The file is mapped, not read:
+    all workers on a host share its physical pages through the page cache, and page contents are decoded only
+    when a page is actually used. URLs, summaries and languages are small and decoded on open
+
+    Layout (little-endian): HEADER, corpus version (utf-8), one RECORD per page in URL order, then the utf-8
+    data (urls, contents, summaries and the serialized prompt context) the records point into
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, self._context_offset, self._context_length, version_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a corpus file")
+        self.version = self._mmap[HEADER.size:HEADER.size + version_length].decode()
+
+        self._records = []
+        offset = HEADER.size + version_length
+        for _ in range(count):
+            self._records.append(RECORD.unpack_from(self._mmap, offset))
+            offset += RECORD.size
+
+        self.urls: List[str] = [self._text(record[0], record[1]) for record in self._records]
+        self._positions = {url: position for position, url in enumerate(self.urls)}
+
+    def _text(self, offset: int, length: int) -> str:
+        return self._mmap[offset:offset + length].decode()
+
+    def content(self, url: str) -> str:
+        record = self._records[self._positions[url]]
+        return self._text(record[2], record[3])
+
+    def summaries(self) -> Dict[str, str]:
+        return {url: self._text(record[4], record[5]) for url, record in zip(self.urls, self._records) if record[5]}
+
+    def languages(self) -> Dict[str, str]:
+        return {
+            url: record[6].decode().strip() for url, record in zip(self.urls, self._records) if record[6].strip()
+        }
+
+    def token_counts(self) -> Dict[str, int]:
+        return {url: record[7] for url, record in zip(self.urls, self._records)}
+
+    def importance(self) -> Dict[str, float]:
+        return {url: record[8] for url, record in zip(self.urls, self._records) if record[8] > 0}
+
+    def context(self) -> str:
+        return self._text(self._context_offset, self._context_length)
+
+
+class MappedPages(Mapping):
+    """
+    URL -> content view of a MappedCorpus (or of a subset of its URLs), in URL order, decoding each content
+    on access. Subsets (language views) are views of the same mapping, not copies
+    """
+
+    def __init__(self, corpus: MappedCorpus, urls: Optional[List[str]] = None):
+        self.corpus = corpus
+        self.urls = corpus.urls if urls is None else urls
+        self._subset = None if urls is None else set(urls)
+
+    @property
+    def complete(self) -> bool:
+        return self._subset is None
+
+    def subset(self, urls: Iterable[str]) -> "MappedPages":
+        return MappedPages(self.corpus, [url for url in urls if url in self])
+
+    def __getitem__(self, url: str) -> str:
+        if self._subset is not None and url not in self._subset:
+            raise KeyError(url)
+        return self.corpus.content(url)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.urls)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def __contains__(self, url) -> bool:
+        return url in self.corpus._positions if self._subset is None else url in self._subset
+
+
+class CorpusFileService:
+    """
+    Exports a corpus snapshot into a versioned binary file (DATA_DIR/corpus/<version>.bin) and maps it back.
+    Written by the crawl leader after a crawl, or by the first worker that had to load a version from the
+    database, so every other worker on the host starts without scanning the pages table
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.CORPUS_FILE_DIR
+
+    def path(self, version: str) -> str:
+        return os.path.join(self.directory, f"{version}.bin")
+
+    def exists(self, version: str) -> bool:
+        return os.path.exists(self.path(version))
+
+    def export(self, snapshot) -> str:
+        """
+        Write the snapshot (CorpusSnapshot) to its version file. The file is written under a temporary name and
+        renamed, so readers map either nothing or the complete file. Old versions are deleted afterwards
+        (workers that still map them keep their mapping until they swap)
+
+        Returns:
+            str: Path of the version file
+        """
+        path = self.path(snapshot.version)
+        if os.path.exists(path):
+            return path
+        os.makedirs(self.directory, exist_ok=True)
+
+        urls = list(snapshot.pages)
+        version = snapshot.version.encode()
+        data_offset = HEADER.size + len(version) + RECORD.size * len(urls)
+        records, chunks = [], []
+        position = data_offset
+
+        def add(text: str):
+            nonlocal position
+            encoded = text.encode()
+            chunks.append(encoded)
+            position += len(encoded)
+            return position - len(encoded), len(encoded)
+
+        for url in urls:
+            content = snapshot.pages[url]
+            records.append(RECORD.pack(
+                *add(url),
+                *add(content),
+                *add(snapshot.summaries.get(url) or ""),
+                (snapshot.languages.get(url) or "").encode()[:2].ljust(2),
+                snapshot.index.length(url),
+                snapshot.importance.get(url, 0.0),
+            ))
+        context_offset, context_length = add(snapshot.context)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(urls), context_offset, context_length, len(version)))
+            f.write(version)
+            f.writelines(records)
+            f.writelines(chunks)
+        os.replace(tmp_path, path)
+        self._prune(snapshot.version)
+        print(f"[CorpusFileService] Exported corpus {snapshot.version}: {len(urls)} pages, {position} bytes")
+        return path
+
+    def load(self, version: str) -> Optional[MappedCorpus]:
+        """
+        Map the file of a corpus version
+
+        Returns:
+            Optional[MappedCorpus]: None if there is no (valid) file for the version. An unreadable file (e.g. of
+            an older format) is deleted, so the version is exported again
+        """
+        try:
+            corpus = MappedCorpus(self.path(version))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[CorpusFileService] @load: unreadable corpus file for {version}: {e}")
+            try:
+                os.remove(self.path(version))
+            except OSError:
+                pass
+            return None
+        return corpus if corpus.version == version else None
+
+    def _prune(self, current_version: str):
+        for name in os.listdir(self.directory):
+            if name.endswith(".bin") and name != f"{current_version}.bin":
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
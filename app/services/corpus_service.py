@@ -0,0 +1,319 @@
+import threading
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from app.config import settings
+from app.cruds.page_crud import PageCrud
+from app.services.corpus_file_service import CorpusFileService, MappedPages
+from app.services.lexical_index import LexicalIndex
+
+
+def serialize_pages(pages: Dict[str, str]) -> str:
+    """
+    Serialize pages into the prompt context block. Pages are always emitted in URL order so the same
+    corpus produces byte-identical context (a stable prefix is what provider-side prompt caching keys on)
+    """
+    return "\n\n".join([f"[{url}]\n{pages[url]}" for url in sorted(pages)])
+
+
+class CorpusSnapshot:
+    """
+    Immutable view of the crawled corpus for a single corpus version
+
+    Attributes:
+        version (str): Corpus version fingerprint (see PageCrud.get_corpus_version)
+        pages (Mapping[str, str]): URL -> content, ordered by URL (a dict, or MappedPages of a corpus file)
+        context (str): Pages serialized for the prompt (see the property)
+        context_chars (int): Length of `context`
+        index (LexicalIndex): BM25 index over page contents, used to trim the context to a budget
+        summary_index (LexicalIndex): BM25 index over crawl-time page summaries (first stage of two-stage mode)
+        languages (Dict[str, str]): URL -> language code of pages with a detected language
+        importance (Dict[str, float]): URL -> link graph importance of ranked pages (1.0 is an average page)
+
+    A snapshot built from the `previous` one (the snapshot of the version it replaces) updates its indexes
+    incrementally: only pages whose content or summary changed are tokenized, and the language views the previous
+    snapshot had built are rebuilt right away the same way. The previous snapshot is not referenced afterwards
+    """
+    version: str
+    pages: Mapping[str, str]
+    index: LexicalIndex
+    summary_index: LexicalIndex
+    languages: Dict[str, str]
+    importance: Dict[str, float]
+
+    def __init__(self, version: str, pages: Mapping[str, str], summaries: Optional[Dict[str, str]] = None,
+                 languages: Optional[Dict[str, str]] = None, context: Optional[str] = None,
+                 previous: Optional["CorpusSnapshot"] = None, importance: Optional[Dict[str, float]] = None):
+        self.version = version
+        self.pages = pages if isinstance(pages, MappedPages) else {url: pages[url] for url in sorted(pages)}
+        self._context = context
+        self._context_chars = len(context) if context is not None else None
+        self.index = LexicalIndex(self.pages, previous.index if previous else None)
+        self.summaries = summaries or {}
+        self.summary_index = LexicalIndex(
+            {url: self.summaries.get(url) or "" for url in self.pages}, previous.summary_index if previous else None
+        )
+        self.languages = {url: language for url, language in (languages or {}).items() if language}
+        self.importance = {url: score for url, score in (importance or {}).items() if url in self.pages}
+        self._language_views: Dict[str, Optional["CorpusSnapshot"]] = {}
+        self._language_views_lock = threading.Lock()
+        self._shards: Dict[int, List[List[str]]] = {}
+        self._shards_lock = threading.Lock()
+        if previous is not None:
+            for language, view in list(previous._language_views.items()):
+                self._build_language_view(language, view)
+
+    @property
+    def context(self) -> str:
+        """
+        Pages serialized for the prompt. Over a corpus file the context is decoded from the mapping (or serialized
+        from the mapped pages of a language view) on every access, so no corpus-sized string is kept per worker;
+        snapshots over a dict serialize it once
+        """
+        if self._context is not None:
+            return self._context
+        if isinstance(self.pages, MappedPages):
+            return self.pages.corpus.context() if self.pages.complete else serialize_pages(self.pages)
+        self._context = serialize_pages(self.pages)
+        return self._context
+
+    @property
+    def context_chars(self) -> int:
+        if self._context_chars is None:
+            self._context_chars = len(self.context)
+        return self._context_chars
+
+    def language_view(self, language: Optional[str], question: Optional[str] = None) -> "CorpusSnapshot":
+        """
+        The part of the corpus in `language` (plus pages of unknown language), so a question is answered from
+        pages in its own language instead of both language versions of every page. Falls back to the whole
+        corpus when the language is unknown, the corpus has no pages in it, or none of its pages match the
+        question while pages in other languages do (the topic only exists in the other language)
+
+        Returns:
+            CorpusSnapshot: A snapshot with version "<version>-<language>", or this snapshot on fallback
+        """
+        if not language:
+            return self
+
+        with self._language_views_lock:
+            if language not in self._language_views:
+                self._build_language_view(language)
+            view = self._language_views[language]
+
+        if view is None:
+            return self
+        if question and not view.index.search(question) and self.index.search(question):
+            return self
+        return view
+
+    def _build_language_view(self, language: str, previous: Optional["CorpusSnapshot"] = None):
+        urls = [url for url in self.pages if self.languages.get(url, language) == language]
+        has_language = any(self.languages.get(url) == language for url in urls)
+        self._language_views[language] = CorpusSnapshot(
+            f"{self.version}-{language}",
+            self.pages.subset(urls) if isinstance(self.pages, MappedPages) else {url: self.pages[url] for url in urls},
+            summaries={url: self.summaries[url] for url in urls if url in self.summaries},
+            languages={url: self.languages[url] for url in urls if url in self.languages},
+            previous=previous,
+            importance=self.importance,
+        ) if has_language and len(urls) < len(self.pages) else None
+
+    def rank(self, scores: List[Tuple[str, float]]) -> List[str]:
+        """
+        URLs ordered by relevance score weighted with page importance (score * importance ** weight, see
+        settings.CONTEXT_IMPORTANCE_WEIGHT), so central pages win when the context has to be trimmed.
+        Unranked pages count as average pages
+        """
+        weight = settings.CONTEXT_IMPORTANCE_WEIGHT
+        if not self.importance or not weight:
+            return [url for url, _ in scores]
+        weighted = [(url, score * self.importance.get(url, 1.0) ** weight) for url, score in scores]
+        weighted.sort(key=lambda item: (-item[1], item[0]))
+        return [url for url, _ in weighted]
+
+    def select_context(self, question: str, max_chars: int) -> Tuple[Dict[str, str], str]:
+        """
+        Pick the pages most relevant to the question that fit into `max_chars` of serialized context.
+        The full corpus (and its cacheable serialization) is returned unchanged when it fits
+
+        Returns:
+            Tuple[Dict[str, str], str]: Selected pages and their serialized context
+        """
+        if self.context_chars <= max_chars:
+            return self.pages, self.context
+
+        ranked = self.rank(self.index.search(question)) or self.rank([(url, 1.0) for url in self.pages])
+        selected = {}
+        used = 0
+        for url in ranked:
+            size = len(url) + len(self.pages[url]) + 4
+            if used + size <= max_chars:
+                selected[url] = self.pages[url]
+                used += size
+
+        if not selected:
+            url = ranked[0]
+            selected[url] = self.pages[url][:max(0, max_chars - len(url) - 4)]
+
+        return selected, serialize_pages(selected)
+
+    def shards(self, max_chars: int) -> List[List[str]]:
+        """
+        Partition of the corpus into consecutive runs of pages (URL order) whose serialized context fits into
+        `max_chars`. A page larger than the budget is a shard of its own and is truncated to fit when the shard is
+        serialized. The partition only depends on the corpus and the budget, so every shard is a stable, cacheable
+        prompt prefix. Only the URLs are cached (per budget), shard texts are serialized when selected
+
+        Returns:
+            List[List[str]]: URLs of every shard
+        """
+        with self._shards_lock:
+            if max_chars not in self._shards:
+                shards, shard, used = [], [], 0
+                for url in self.pages:
+                    size = min(len(url) + len(self.pages[url]), max_chars - 4) + 4
+                    if shard and used + size > max_chars:
+                        shards.append(shard)
+                        shard, used = [], 0
+                    shard.append(url)
+                    used += size
+                if shard:
+                    shards.append(shard)
+                self._shards[max_chars] = shards
+            return self._shards[max_chars]
+
+    def select_shards(self, question: str, max_chars: int, max_shards: int) -> List[Tuple[int, Dict[str, str], str]]:
+        """
+        Shards (see `shards`) to answer the question from when the corpus exceeds `max_chars`: those holding the
+        best ranked pages, at most `max_shards`, in partition order. Shards without a page matching the question
+        are skipped; if no page matches, the shards of the most important pages are used
+
+        Returns:
+            List[Tuple[int, Dict[str, str], str]]: Shard number in the partition, its pages and serialized context
+        """
+        if self.context_chars <= max_chars:
+            return [(0, self.pages, self.context)]
+
+        shards = self.shards(max_chars)
+        shard_of = {url: number for number, urls in enumerate(shards) for url in urls}
+        ranked = self.rank(self.index.search(question)) or self.rank([(url, 1.0) for url in self.pages])
+        selected = []
+        for url in ranked:
+            if shard_of[url] not in selected:
+                selected.append(shard_of[url])
+                if len(selected) == max_shards:
+                    break
+
+        result = []
+        for number in sorted(selected):
+            pages = {url: self.pages[url][:max(0, max_chars - len(url) - 4)] for url in shards[number]}
+            result.append((number, pages, serialize_pages(pages)))
+        return result
+
+    def select_two_stage(self, question: str, max_chars: int, max_pages: int) -> Tuple[Dict[str, str], str]:
+        """
+        Two-stage selection: rank pages by their summaries, then send the full text of the best `max_pages`
+        pages that fit into `max_chars`. Falls back to select_context when no summary matches the question
+
+        Returns:
+            Tuple[Dict[str, str], str]: Selected pages and their serialized context
+        """
+        ranked = self.rank(self.summary_index.search(question))[:max_pages]
+        if not ranked:
+            return self.select_context(question, max_chars)
+
+        selected = {}
+        used = 0
+        for url in ranked:
+            size = len(url) + len(self.pages[url]) + 4
+            if used + size <= max_chars:
+                selected[url] = self.pages[url]
+                used += size
+        if not selected:
+            return self.select_context(question, max_chars)
+        return selected, serialize_pages(selected)
+
+
+class CorpusService:
+    """
+    Keeps one serialized snapshot of the corpus per process and rebuilds it only when the corpus version
+    changes. Shared across AppService instances, which are created per request
+    """
+
+    _snapshot: Optional[CorpusSnapshot] = None
+    _lock = threading.Lock()
+
+    def __init__(self, page_crud: PageCrud, corpus_file_service: Optional[CorpusFileService] = None):
+        self.page_crud = page_crud
+        self.corpus_file_service = corpus_file_service or CorpusFileService()
+
+    def get_snapshot(self) -> CorpusSnapshot:
+        """
+        Return the snapshot for the current corpus version. On version change it is mapped from the corpus file
+        of that version if one exists (no pages query), otherwise loaded from the database and exported to a
+        corpus file for the other workers
+
+        Returns:
+            CorpusSnapshot
+
+        Raises:
+            Exception: If the database query fails
+        """
+        version = self.page_crud.get_corpus_version()
+        snapshot = CorpusService._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with CorpusService._lock:
+            snapshot = CorpusService._snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+
+            previous = CorpusService._snapshot
+            snapshot = self._load_file(version, previous) if settings.CORPUS_FILE_ENABLED else None
+            if snapshot is None:
+                snapshot = self._load_database(version, previous)
+            CorpusService._snapshot = snapshot
+            return snapshot
+
+    def _load_file(self, version: str, previous: Optional[CorpusSnapshot] = None) -> Optional[CorpusSnapshot]:
+        corpus = self.corpus_file_service.load(version)
+        if corpus is None:
+            return None
+        snapshot = CorpusSnapshot(
+            version, MappedPages(corpus), summaries=corpus.summaries(), languages=corpus.languages(),
+            previous=previous, importance=corpus.importance(),
+        )
+        print(f"[CorpusService] @get_snapshot: mapped corpus version {version} "
+              f"({len(snapshot.pages)} pages, {snapshot.index.reindexed} indexed)")
+        return snapshot
+
+    def _load_database(self, version: str, previous: Optional[CorpusSnapshot] = None) -> CorpusSnapshot:
+        pages, summaries, languages = {}, {}, {}
+        for url, content, summary, language in self.page_crud.iter_page_rows():
+            pages[url] = content
+            if summary:
+                summaries[url] = summary
+            if language:
+                languages[url] = language
+        snapshot = CorpusSnapshot(
+            version, pages, summaries=summaries, languages=languages, previous=previous,
+            importance=self.page_crud.get_page_importance(),
+        )
+        print(f"[CorpusService] @get_snapshot: loaded corpus version {version} "
+              f"({len(snapshot.pages)} pages, {snapshot.index.reindexed} indexed)")
+
+        if settings.CORPUS_FILE_ENABLED:
+            try:
+                self.corpus_file_service.export(snapshot)
+            except Exception as e:
+                print(f"[CorpusService] @get_snapshot: corpus file export failed: {e}")
+        return snapshot
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Drop the cached snapshot so the next call reloads it from the database
+        """
+        with cls._lock:
+            cls._snapshot = None
@@ -1,28 +1,208 @@
+import os
+from collections import deque
+import socket
 import subprocess
 import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.config import settings
+from app.cruds.crawl_lease_crud import CrawlLeaseCrud
+from app.cruds.page_crud import PageCrud
+from app.db.database import get_db
+from app.services.corpus_file_service import CorpusFileService
+from app.services.corpus_service import CorpusService
+from app.services.page_rank_service import PageRankService
+from app.services.precompute_service import PrecomputeService
+from app.services.source_info_service import SourceInfoService
+
+CRAWL_LEASE_NAME = "crawl"
 
 
 class CrawlerService:
     """
-         Runs text_spider.py in subprocess for web crawling once when application is started
+         Runs text_spider.py in subprocess for web crawling once when application is started.
+         Only the process holding the crawl lease runs the spider, every other worker/replica just serves reads
     """
     def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.process: Optional[subprocess.Popen] = None
         self.thread = threading.Thread(target=self._run_crawl, daemon=True)
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """
+        Start the crawl attempt in a background thread
+        """
         self.thread.start()
 
+    def stop(self):
+        """
+        Stop a running crawl (on application shutdown) and wait for the lease to be released
+        """
+        self._stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=settings.CRAWL_LEASE_TTL_SECONDS)
+
     def _run_crawl(self):
+        db = next(get_db())
+        lease_crud = CrawlLeaseCrud(db)
         try:
-            result = subprocess.run(
-                ["scrapy", "crawl", "text_spider"],
-                capture_output=True,
-                text=True,
-                timeout=3600,
-            )
-            if result.returncode == 0:
-                print("[CrawlerService] Crawl finished successfully")
-            else:
-                print(f"[CrawlerService] Crawl failed: {result.stderr}")
-        except subprocess.TimeoutExpired:
-            print("[CrawlerService] Crawl timed out")
+            if not self._wait_for_lease(lease_crud):
+                return
+
+            completed = False
+            try:
+                completed = self._run_spider(lease_crud)
+                if completed:
+                    # Precompute and exports can outlive the TTL, a follower must not take over (and restart
+                    # the crawl, which clears the pages) before completed_at is recorded
+                    finished = threading.Event()
+                    renewer = threading.Thread(target=self._renew_lease_until, args=(finished,), daemon=True)
+                    renewer.start()
+                    try:
+                        self._on_crawl_finished()
+                    finally:
+                        finished.set()
+                        renewer.join()
+            finally:
+                lease_crud.release(CRAWL_LEASE_NAME, self.owner, completed=completed)
         except Exception as e:
             print(f"[CrawlerService] Unexpected error: {e}")
+        finally:
+            db.close()
+
+    def _wait_for_lease(self, lease_crud: CrawlLeaseCrud) -> bool:
+        """
+        Follow the current leader until the lease can be taken. The lease is tried again every third of the TTL,
+        so when a leader dies another process takes over once its lease expired
+
+        Returns:
+            bool: True if this process became leader, False on shutdown or if a crawl finished recently
+        """
+        following = False
+        while not self._stop_event.is_set():
+            acquired = self._acquire_lease(lease_crud)
+            if acquired is not None:
+                return acquired
+            if not following:
+                print("[CrawlerService] Crawl is owned by another process, serving reads only")
+                following = True
+            self._stop_event.wait(settings.CRAWL_LEASE_TTL_SECONDS / 3)
+        return False
+
+    def _acquire_lease(self, lease_crud: CrawlLeaseCrud) -> Optional[bool]:
+        """
+        Become the crawl leader unless another process holds the lease or a recent crawl already finished
+
+        Returns:
+            Optional[bool]: True if this process is leader, False if a crawl finished recently,
+                            None if another process holds the lease
+        """
+        if not lease_crud.try_acquire(CRAWL_LEASE_NAME, self.owner, settings.CRAWL_LEASE_TTL_SECONDS):
+            return None
+
+        lease = lease_crud.get_lease(CRAWL_LEASE_NAME)
+        fresh_after = datetime.utcnow() - timedelta(seconds=settings.CRAWL_FRESHNESS_SECONDS)
+        if lease.completed_at is not None and lease.completed_at > fresh_after:
+            lease_crud.release(CRAWL_LEASE_NAME, self.owner)
+            print("[CrawlerService] Crawl finished recently, skipping")
+            return False
+
+        return True
+
+    def _run_spider(self, lease_crud: CrawlLeaseCrud) -> bool:
+        """
+        Run the spider while renewing the lease. The crawl is stopped on timeout, shutdown or lost lease
+
+        Returns:
+            bool: True if the crawl finished successfully
+        """
+        self.process = subprocess.Popen(
+            ["scrapy", "crawl", "text_spider"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        stderr_lines = deque(maxlen=200)
+        stderr_reader = threading.Thread(target=lambda: stderr_lines.extend(self.process.stderr), daemon=True)
+        stderr_reader.start()
+
+        deadline = time.monotonic() + settings.CRAWL_TIMEOUT_SECONDS
+        renew_interval = settings.CRAWL_LEASE_TTL_SECONDS / 3
+        while True:
+            try:
+                self.process.wait(timeout=renew_interval)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+
+            if self._stop_event.is_set():
+                print("[CrawlerService] Shutting down, stopping crawl")
+            elif time.monotonic() >= deadline:
+                print("[CrawlerService] Crawl timed out")
+            elif not lease_crud.renew(CRAWL_LEASE_NAME, self.owner, settings.CRAWL_LEASE_TTL_SECONDS):
+                print("[CrawlerService] Crawl lease lost, stopping crawl")
+            else:
+                continue
+            self._terminate()
+            return False
+
+        stderr_reader.join(timeout=5)
+        if self.process.returncode == 0:
+            print("[CrawlerService] Crawl finished successfully")
+            return True
+        print(f"[CrawlerService] Crawl failed: {''.join(stderr_lines)}")
+        return False
+
+    def _renew_lease_until(self, finished: threading.Event):
+        """
+        Renew the lease every third of the TTL until `finished` is set. Runs in its own thread with its own session
+        """
+        db = next(get_db())
+        try:
+            lease_crud = CrawlLeaseCrud(db)
+            while not finished.wait(settings.CRAWL_LEASE_TTL_SECONDS / 3):
+                if not lease_crud.renew(CRAWL_LEASE_NAME, self.owner, settings.CRAWL_LEASE_TTL_SECONDS):
+                    print("[CrawlerService] Crawl lease lost during post-crawl steps")
+                    return
+        except Exception as e:
+            print(f"[CrawlerService] Renewing crawl lease failed: {e}")
+        finally:
+            db.close()
+
+    def _on_crawl_finished(self):
+        """
+        Post-crawl steps, run by the crawl leader while it still holds the lease. Importance scores are stored
+        first, so the exported snapshot (a new corpus version) includes them
+        """
+        db = next(get_db())
+        try:
+            PageRankService().run(db)
+        except Exception as e:
+            print(f"[CrawlerService] Ranking pages failed: {e}")
+
+        try:
+            snapshot = CorpusService(PageCrud(db)).get_snapshot()
+            if settings.CORPUS_FILE_ENABLED:
+                CorpusFileService().export(snapshot)
+            SourceInfoService().render(snapshot)
+        except Exception as e:
+            print(f"[CrawlerService] Exporting corpus snapshot failed: {e}")
+        finally:
+            db.close()
+
+        try:
+            PrecomputeService().run()
+        except Exception as e:
+            print(f"[CrawlerService] Precompute failed: {e}")
+
+    def _terminate(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
@@ -0,0 +1,66 @@
+from typing import List, Optional
+
+from app.config import settings
+from app.dtos.ask_response import AskResponse, Usage
+from app.services.corpus_service import CorpusSnapshot
+from app.services.lexical_index import LexicalIndex
+from app.services.summary_service import SummaryService
+
+
+class FallbackService:
+    """
+    Degraded answers built locally, without the LLM, so /ask stays within its latency bound while OpenAI is
+    unavailable (circuit open) or slow: the passages that match the question best, taken from the best matching
+    pages in the question's language, with their pages as sources. Responses are marked with fallback=True
+    and use no tokens
+    """
+
+    def answer(self, question: str, snapshot: CorpusSnapshot, language: Optional[str]) -> AskResponse:
+        """
+        Returns:
+            AskResponse: Quoted passages and their URLs, or a "try again later" answer without sources if no page
+                         matches the question
+        """
+        corpus = snapshot.language_view(language, question)
+        urls = corpus.rank(corpus.index.search(question))[:settings.ASK_FALLBACK_MAX_PAGES]
+
+        passages = {}
+        for url in urls:
+            for number, passage in enumerate(self.split_passages(corpus.pages[url])):
+                passages[f"{url}#{number}"] = (url, passage)
+        index = LexicalIndex({key: passage for key, (_, passage) in passages.items()})
+        best = [passages[key] for key, _ in index.search(question)[:settings.ASK_FALLBACK_MAX_PASSAGES]]
+
+        if best:
+            intro = settings.ASK_FALLBACK_ANSWERS.get(language or "en", settings.ASK_FALLBACK_ANSWERS["en"])
+            answer = "\n\n".join([intro.format(domain=settings.DOMAIN), *(f"- {passage}" for _, passage in best)])
+        else:
+            answers = settings.ASK_FALLBACK_NO_MATCH_ANSWERS
+            answer = answers.get(language or "en", answers["en"]).format(domain=settings.DOMAIN)
+
+        return AskResponse(
+            question=question,
+            answer=answer,
+            sources=list(dict.fromkeys(url for url, _ in best)),
+            usage=Usage(input_tokens=0, output_tokens=0),
+            fallback=True,
+        )
+
+    @staticmethod
+    def split_passages(text: str) -> List[str]:
+        """
+        Consecutive sentences joined into passages of up to ASK_FALLBACK_PASSAGE_CHARS characters. Longer
+        sentences are cut at a word boundary
+        """
+        max_chars = settings.ASK_FALLBACK_PASSAGE_CHARS
+        passages, current = [], ""
+        for sentence in SummaryService.split_sentences(text):
+            if len(sentence) > max_chars:
+                sentence = sentence[:max_chars - 1].rsplit(" ", 1)[0] + "…"
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                passages.append(current)
+                current = ""
+            current = f"{current} {sentence}" if current else sentence
+        if current:
+            passages.append(current)
+        return passages
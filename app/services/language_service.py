@@ -0,0 +1,69 @@
+import re
+from typing import Optional
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+ESTONIAN_LETTERS = set("õäöüšž")
+
+# Short, frequent function words and the typical question words of the site's visitors
+ESTONIAN_WORDS = {
+    "ja", "on", "ei", "et", "see", "seda", "selle", "kui", "ka", "mis", "mida", "mille", "kas", "ning", "oma",
+    "või", "te", "teie", "teil", "teid", "me", "meie", "meil", "mind", "ma", "mul", "kus", "kes", "kuidas",
+    "miks", "millal", "milline", "milliseid", "mitu", "palju", "saab", "saan", "olla", "ole", "oli", "olen",
+    "siis", "nii", "veel", "ainult", "kõik", "vaid", "aga", "sest", "ehk", "üle", "ilma", "koos",
+    "jaoks", "kohta", "tere", "palun", "aitäh", "pakute", "pakume", "teenused", "teenuseid", "hind", "hinnad",
+}
+ENGLISH_WORDS = {
+    "the", "and", "is", "are", "was", "were", "be", "of", "to", "in", "for", "with", "on", "at", "by", "from",
+    "or", "an", "a", "it", "this", "that", "these", "those", "what", "which", "who", "whom", "where", "when",
+    "why", "how", "do", "does", "did", "can", "could", "would", "should", "will", "you", "your", "we", "our",
+    "us", "they", "their", "i", "my", "me", "have", "has", "about", "any", "offer", "services", "price",
+    "prices", "much", "many", "contact", "please", "hello", "thanks",
+}
+
+LANGUAGES = ("et", "en")
+
+
+class LanguageService:
+    """
+    Fast local language identification for the bilingual (Estonian/English) corpus: function word counts plus
+    the Estonian letters õ/ä/ö/ü/š/ž. Used at crawl time (Page.language) and for every /ask question,
+    no model or network call involved
+    """
+
+    MIN_SCORE = 1
+    MAX_WORDS = 400
+
+    @staticmethod
+    def normalize(language: Optional[str]) -> Optional[str]:
+        """
+        Map an HTML lang attribute ("et-EE", "en_US", "EN") to a supported language code, None otherwise
+        """
+        if not language:
+            return None
+        code = language.strip().lower().replace("_", "-").split("-")[0]
+        return code if code in LANGUAGES else None
+
+    def detect(self, text: str) -> Optional[str]:
+        """
+        Detect the language of a question or page text
+
+        Returns:
+            Optional[str]: "et", "en" or None when the text has no clear signal (too short, mixed, other language)
+        """
+        words = [word.lower() for word in WORD_PATTERN.findall(text or "")[:self.MAX_WORDS]]
+        if not words:
+            return None
+
+        estonian = sum(word in ESTONIAN_WORDS for word in words)
+        estonian += sum(2 for word in words if ESTONIAN_LETTERS.intersection(word))
+        english = sum(word in ENGLISH_WORDS for word in words)
+
+        if max(estonian, english) < self.MIN_SCORE or estonian == english:
+            return None
+        return "et" if estonian > english else "en"
+
+    def detect_page(self, content: str, html_lang: Optional[str] = None) -> Optional[str]:
+        """
+        Language of a crawled page: the HTML lang attribute if it names a supported language, detection otherwise
+        """
+        return self.normalize(html_lang) or self.detect(content)
@@ -0,0 +1,112 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens. Single characters and digits-only tokens shorter than 3 are dropped as noise
+    """
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and not (token.isdigit() and len(token) < 3)
+    ]
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 index over a set of documents (pages or passages), built once per corpus snapshot.
+    Built from a `previous` index (the snapshot of the previous corpus version), documents whose text did not
+    change reuse their term frequencies and only changed documents are tokenized again
+
+    Attributes:
+        doc_ids (List[str]): Document ids (e.g. URLs) in insertion order
+        reindexed (int): Number of documents tokenized by this index (all of them without `previous`)
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, documents: Dict[str, str], previous: Optional["LexicalIndex"] = None):
+        self.doc_ids: List[str] = list(documents)
+        self._term_freqs: List[Counter] = []
+        self._hashes: Dict[str, int] = {}
+        document_freqs = Counter(previous._document_freqs) if previous is not None else Counter()
+        reused = set()
+        for doc_id, text in documents.items():
+            text_hash = hash(text)
+            position = previous._positions.get(doc_id) if previous is not None else None
+            if position is not None and previous._hashes[doc_id] == text_hash:
+                freqs = previous._term_freqs[position]
+                reused.add(doc_id)
+            else:
+                freqs = Counter(tokenize(text))
+                document_freqs.update(freqs.keys())
+            self._term_freqs.append(freqs)
+            self._hashes[doc_id] = text_hash
+        if previous is not None:
+            # Documents that changed or are gone no longer contribute their old terms
+            for doc_id, freqs in zip(previous.doc_ids, previous._term_freqs):
+                if doc_id not in reused:
+                    document_freqs.subtract(freqs.keys())
+            document_freqs = Counter({term: count for term, count in document_freqs.items() if count > 0})
+        self.reindexed = len(self.doc_ids) - len(reused)
+
+        self._positions = {doc_id: position for position, doc_id in enumerate(self.doc_ids)}
+        self._doc_lengths = [sum(freqs.values()) for freqs in self._term_freqs]
+        self._avg_length = (sum(self._doc_lengths) / len(self._doc_lengths)) if self._doc_lengths else 0.0
+        self._document_freqs = document_freqs
+        total = len(self.doc_ids)
+        self._idf = {
+            term: math.log(1 + (total - count + 0.5) / (count + 0.5)) for term, count in document_freqs.items()
+        }
+        self._prefixes: Dict[int, Set[str]] = {}
+
+    def idf(self, term: str) -> float:
+        return self._idf.get(term, 0.0)
+
+    def length(self, doc_id: str) -> int:
+        """
+        Number of tokens of a document
+        """
+        return self._doc_lengths[self._positions[doc_id]]
+
+    def contains(self, term: str, prefix_chars: int = 0) -> bool:
+        """
+        Whether the term occurs in any document. With prefix_chars, a term at least that long also matches
+        indexed terms starting with the same prefix_chars characters (e.g. "koolitusi" matches "koolitus")
+        """
+        if term in self._idf:
+            return True
+        if not prefix_chars or len(term) < prefix_chars:
+            return False
+        if prefix_chars not in self._prefixes:
+            self._prefixes[prefix_chars] = {known[:prefix_chars] for known in self._idf if len(known) >= prefix_chars}
+        return term[:prefix_chars] in self._prefixes[prefix_chars]
+
+    def search(self, query: str) -> List[Tuple[str, float]]:
+        """
+        Score every document against the query
+
+        Returns:
+            List[Tuple[str, float]]: (doc_id, BM25 score) for documents with a positive score, best first
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.doc_ids:
+            return []
+
+        scores = []
+        for doc_id, freqs, length in zip(self.doc_ids, self._term_freqs, self._doc_lengths):
+            score = 0.0
+            norm = self.K1 * (1 - self.B + self.B * length / (self._avg_length or 1))
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.K1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((doc_id, score))
+        scores.sort(key=lambda item: (-item[1], item[0]))
+        return scores
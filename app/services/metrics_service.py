@@ -0,0 +1,43 @@
+import threading
+from typing import Dict
+
+
+class MetricsService:
+    """
+    Process-local counters exposed through GET /metrics. Metric names are dotted paths,
+    e.g. "routes.simple.requests"
+    """
+
+    _counters: Dict[str, float] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def increment(cls, name: str, value: float = 1):
+        with cls._lock:
+            cls._counters[name] = cls._counters.get(name, 0) + value
+
+    @classmethod
+    def set(cls, name: str, value: float):
+        """
+        Gauge: overwrite with the current value, e.g. the number of open chat sessions
+        """
+        with cls._lock:
+            cls._counters[name] = value
+
+    @classmethod
+    def set_max(cls, name: str, value: float):
+        """
+        Keep the highest value seen, e.g. the worst pool checkout wait
+        """
+        with cls._lock:
+            cls._counters[name] = max(cls._counters.get(name, value), value)
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, float]:
+        with cls._lock:
+            return dict(sorted(cls._counters.items()))
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._counters.clear()
@@ -1,13 +1,91 @@
-from typing import Dict
-import openai
+import json
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from app.config import settings
 from app.dtos.ask_response import AskResponse, AskFormat, Usage
+from app.services.corpus_service import serialize_pages
+from app.services.resilience_service import Cancellation, CircuitBreaker, LatencyTracker, ResilientCaller
+
+SYSTEM_RULES = """
+You are a helpful assistant.
+
+Answer questions using only the information provided.
+
+Always return valid JSON with 'answer' and 'sources'.
+Answer in the language of question.
+"""
+
+# Map step of map-reduce answering: the information is one shard of the corpus
+SHARD_RULES = SYSTEM_RULES + """
+The information is only a part of the website. If it does not answer the question, say so briefly
+and return empty 'sources'.
+"""
+
+# Reduce step of map-reduce answering: the information is the partial answers of all shards
+REDUCE_RULES = """
+You are a helpful assistant.
+
+The information consists of partial answers to the question, each written from a different part of a website,
+with the sources it used. Combine them into one answer using only the information in the partial answers.
+Ignore partial answers that say the question is not answered.
+
+Always return valid JSON with 'answer' and 'sources'. 'sources' may only contain sources of the partial answers
+you used.
+Answer in the language of question.
+"""
+
+
+def partial_json_string(buffer: str, key: str) -> Optional[str]:
+    """
+    Decoded prefix of the string value of `key` in an incomplete JSON object (a structured output that is
+    still streaming), e.g. '{"question": "Q", "answer": "Hel' -> "Hel". None while the value has not started.
+    A trailing, incomplete escape sequence is left out until the rest arrives
+    """
+    start = buffer.find(f'"{key}"')
+    colon = buffer.find(":", start + len(key) + 2) if start >= 0 else -1
+    start = buffer.find('"', colon + 1) if colon >= 0 else -1
+    if start < 0:
+        return None
+
+    position = start + 1
+    while position < len(buffer):
+        char = buffer[position]
+        if char == '"':
+            break
+        if char == "\\":
+            length = 6 if buffer[position + 1:position + 2] == "u" else 2
+            if position + length > len(buffer):
+                break
+            position += length
+        else:
+            position += 1
+    return json.loads(f'"{buffer[start + 1:position]}"')
+
+
+# Process-wide call layer shared by all OpenAIService instances, so breaker state and latency history
+# survive across requests
+openai_caller = ResilientCaller(
+    breaker=CircuitBreaker(
+        failure_rate_threshold=settings.CIRCUIT_FAILURE_RATE,
+        window_size=settings.CIRCUIT_WINDOW_SIZE,
+        min_calls=settings.CIRCUIT_MIN_CALLS,
+        open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+    ),
+    latency_tracker=LatencyTracker(),
+    attempt_timeout=settings.OPENAI_ATTEMPT_TIMEOUT_SECONDS,
+    max_attempts=settings.OPENAI_MAX_ATTEMPTS,
+    backoff_base=settings.OPENAI_BACKOFF_BASE_SECONDS,
+    backoff_max=settings.OPENAI_BACKOFF_MAX_SECONDS,
+    hedge_enabled=settings.OPENAI_HEDGE_ENABLED,
+    hedge_min_delay=settings.OPENAI_HEDGE_MIN_DELAY_SECONDS,
+    max_workers=settings.OPENAI_MAX_CONCURRENT_CALLS,
+)
 
 
 class OpenAIService:
     """
-    Requires OPENAI_API_KEY in .env
+    Requires OPENAI_API_KEY in .env. The openai SDK is imported lazily: it is the heaviest import of the
+    application and is only needed once a question is asked (ReadinessService imports it during warm-up)
     """
 
     def __init__(self):
@@ -21,63 +99,177 @@ class OpenAIService:
         if not settings.OPENAI_API_KEY:
             raise Exception('OPENAI_API_KEY not set')
 
+        import openai
         openai.api_key = settings.OPENAI_API_KEY
+        openai.base_url = settings.OPENAI_BASE_URL
+        # Retries are owned by openai_caller, the SDK's own retries would multiply them
+        openai.max_retries = 0
 
-    def answer_question(self, question: str, data: Dict[str, str]) -> AskResponse:
+    def answer_question(self, question: str, data: Dict[str, str], context: Optional[str] = None,
+                        cache_key: Optional[str] = None, model: Optional[str] = None,
+                        cancellation: Optional[Cancellation] = None, rules: str = SYSTEM_RULES) -> AskResponse:
         """
         Generate an AI-powered answer to a question using provided context.
 
+        The prompt is laid out from most to least shared: static system rules, then the corpus, then the
+        question. Everything before the question is identical across requests for the same corpus, so the
+        provider can serve it from its prompt cache.
+
         Args:
             question (str): The user's question to be answered
             data (Dict[str, str]):
                 Example: {"https://example.com": "Page content..."}
+            context (Optional[str]): Pre-serialized `data` (see CorpusSnapshot.context). Serialized here if omitted
+            cache_key (Optional[str]): Corpus version, forwarded as prompt cache key so requests sharing a
+                prefix are routed to the same cache
+            model (Optional[str]): Model chosen by RoutingService, settings.CHATGPT_MODEL if omitted
+            cancellation (Optional[Cancellation]): Request deadline/disconnect flag, the wait for OpenAI stops
+                when it fires
+            rules (str): System prompt, SHARD_RULES when `data` is one shard of a map-reduce answer
 
         Returns:
             AskResponse
 
         Raises:
-            Exception: If the OpenAI API call fails
+            CircuitOpenError: If recent OpenAI calls failed too often and calls are suspended
+            RequestCancelledError: If the cancellation fired
+            Exception: If the OpenAI API call fails after retries
         """
+        import openai
+
         try:
-            context = self._concatinate_content(data)
+            if context is None:
+                context = self._concatinate_content(data)
 
-            system_rules = """
-You are a helpful assistant.
+            request = self._build_request(question, context, cache_key, model, rules=rules)
+            response = openai_caller.call(
+                lambda timeout: openai.responses.parse(**request, timeout=timeout), cancellation=cancellation
+            )
+            return self._to_ask_response(response)
 
-Answer questions using only the information provided.
+        except Exception as e:
+            print(f"[OpenAIService] @answer_question: {e}")
+            raise e
 
-Always return valid JSON with 'answer' and 'sources'.
-Answer in the language of question.
-"""
+    def combine_answers(self, question: str, partials: List[AskResponse], model: Optional[str] = None,
+                        cancellation: Optional[Cancellation] = None) -> AskResponse:
+        """
+        Reduce step of map-reduce answering: one call that merges the partial answers of several corpus shards.
+        Sources of the result are limited to sources of the partial answers (all of them if the model cites none)
 
-            user_prompt = f"""Question: {question}
+        Returns:
+            AskResponse: Combined answer, usage of the reduce call only
 
-Information: {context}"""
+        Raises:
+            CircuitOpenError: If recent OpenAI calls failed too often and calls are suspended
+            RequestCancelledError: If the cancellation fired
+            Exception: If the OpenAI API call fails after retries
+        """
+        import openai
 
-            response = openai.responses.parse(
-                model=settings.CHATGPT_MODEL,
-                input=[
-                    {"role": "system", "content": system_rules},
-                    {"role": "user", "content": user_prompt},
-                ],
-                text_format=AskFormat,
+        try:
+            context = "\n\n".join(
+                f"[Partial answer {number}]\n{partial.answer}\nSources: {', '.join(partial.sources) or '-'}"
+                for number, partial in enumerate(partials, start=1)
             )
+            request = self._build_request(question, context, None, model, rules=REDUCE_RULES)
+            response = self._to_ask_response(openai_caller.call(
+                lambda timeout: openai.responses.parse(**request, timeout=timeout), cancellation=cancellation
+            ))
 
-            structured_answer = response.output_parsed
+            partial_sources = list(dict.fromkeys(source for partial in partials for source in partial.sources))
+            sources = [source for source in response.sources if source in partial_sources] or partial_sources
+            return response.model_copy(update={"sources": sources})
+        except Exception as e:
+            print(f"[OpenAIService] @combine_answers: {e}")
+            raise e
 
-            return AskResponse(
-                question=structured_answer.question,
-                answer=structured_answer.answer,
-                sources=structured_answer.sources,
-                usage=Usage(
-                    input_tokens=response.usage.input_tokens,
-                    output_tokens=response.usage.output_tokens
-                )
-            )
+    def stream_answer(self, question: str, context: str, history: Iterable[Tuple[str, str]] = (),
+                      cache_key: Optional[str] = None, model: Optional[str] = None,
+                      on_delta: Optional[Callable[[str], None]] = None) -> AskResponse:
+        """
+        Same as answer_question, but the answer text is passed to `on_delta` piece by piece while the model
+        generates it, and earlier (question, answer) turns of a conversation are sent between the corpus and
+        the question (the corpus prefix stays cacheable).
+
+        Streamed calls are not hedged. If an attempt fails after text was streamed and is retried, only text
+        beyond what was already streamed is passed on, so the returned AskResponse is the authoritative answer
+
+        Returns:
+            AskResponse
+
+        Raises:
+            CircuitOpenError: If recent OpenAI calls failed too often and calls are suspended
+            Exception: If the OpenAI API call fails after retries
+        """
+        import openai
 
+        request = self._build_request(question, context, cache_key, model, history)
+        streamed = 0
+
+        def attempt(timeout: float):
+            nonlocal streamed
+            buffer = ""
+            with openai.responses.stream(**request, timeout=timeout) as stream:
+                for event in stream:
+                    if event.type != "response.output_text.delta":
+                        continue
+                    buffer += event.delta
+                    answer = partial_json_string(buffer, "answer")
+                    if on_delta and answer and len(answer) > streamed:
+                        on_delta(answer[streamed:])
+                        streamed = len(answer)
+                return stream.get_final_response()
+
+        try:
+            return self._to_ask_response(openai_caller.call(attempt, hedge=False))
         except Exception as e:
-            print(f"[OpenAIService] @answer_question: {e}")
+            print(f"[OpenAIService] @stream_answer: {e}")
             raise e
 
+    @staticmethod
+    def _build_request(question: str, context: str, cache_key: Optional[str], model: Optional[str],
+                       history: Iterable[Tuple[str, str]] = (), rules: str = SYSTEM_RULES) -> dict:
+        turns = []
+        for previous_question, previous_answer in history:
+            turns.append({"role": "user", "content": f"Question: {previous_question}"})
+            turns.append({"role": "assistant", "content": previous_answer})
+
+        request = {
+            "model": model or settings.CHATGPT_MODEL,
+            "input": [
+                {"role": "system", "content": rules},
+                {"role": "user", "content": f"Information:\n{context}"},
+                *turns,
+                {"role": "user", "content": f"Question: {question}"},
+            ],
+            "text_format": AskFormat,
+        }
+        if cache_key:
+            request["prompt_cache_key"] = f"corpus-{cache_key}"
+        return request
+
+    def _to_ask_response(self, response) -> AskResponse:
+        structured_answer = response.output_parsed
+        return AskResponse(
+            question=structured_answer.question,
+            answer=structured_answer.answer,
+            sources=structured_answer.sources,
+            usage=Usage(
+                input_tokens=response.usage.input_tokens,
+                output_tokens=response.usage.output_tokens,
+                cached_input_tokens=self._cached_tokens(response.usage),
+            )
+        )
+
     def _concatinate_content(self, data: Dict[str, str]) -> str:
-        return "\n\n".join([f"[{url}]\n{content}" for url, content in data.items()])
+        return serialize_pages(data)
+
+    @staticmethod
+    def _cached_tokens(usage) -> int:
+        """
+        Read prompt-cache hits from usage. Details are optional in the API response
+        """
+        details = getattr(usage, "input_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None)
+        return cached_tokens if isinstance(cached_tokens, int) else 0
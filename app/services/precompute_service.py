@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List
+
+from app.config import settings
+from app.cruds.precomputed_answer_crud import PrecomputedAnswerCrud
+from app.cruds.question_log_crud import QuestionLogCrud
+from app.db.database import get_db
+from app.services.app_service import AppService
+from app.services.validation_service import ValidationService
+
+
+class PrecomputeService:
+    """
+    Answers frequent questions in the background once a crawl has finished, so /ask can serve them without
+    an LLM call until the corpus changes
+    """
+
+    def get_questions(self, db) -> List[str]:
+        """
+        Questions to precompute: the most frequent questions from the question log, topped up with the
+        configured FAQ list, deduplicated by normalized form
+
+        Returns:
+            List[str]: At most PRECOMPUTE_TOP_N questions
+        """
+        try:
+            logged = QuestionLogCrud(db).get_top_questions(settings.PRECOMPUTE_TOP_N)
+        except Exception as e:
+            print(f"[PrecomputeService] @get_questions: question log unavailable: {e}")
+            logged = []
+
+        questions = {}
+        for question in logged + list(settings.PRECOMPUTE_QUESTIONS):
+            questions.setdefault(ValidationService.normalize_question(question), question)
+        return list(questions.values())[:settings.PRECOMPUTE_TOP_N]
+
+    def run(self) -> int:
+        """
+        Answer all precompute questions against the current corpus snapshot at PRECOMPUTE_CONCURRENCY and store
+        them keyed by corpus version. Answers of older versions are deleted afterwards
+
+        Returns:
+            int: Number of stored answers
+        """
+        app_service = AppService()
+        db = next(get_db())
+        try:
+            questions = self.get_questions(db)
+            if not questions:
+                return 0
+
+            answer_crud = PrecomputedAnswerCrud(db)
+            snapshot = app_service.corpus_service.get_snapshot()
+            if not snapshot.pages:
+                print("[PrecomputeService] @run: corpus is empty, nothing to precompute")
+                return 0
+
+            stored = 0
+            with ThreadPoolExecutor(max_workers=settings.PRECOMPUTE_CONCURRENCY) as executor:
+                futures = {
+                    executor.submit(app_service.generate_answer, question, snapshot): question
+                    for question in questions
+                }
+                for future in as_completed(futures):
+                    question = futures[future]
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        print(f"[PrecomputeService] @run: failed to answer '{question}': {e}")
+                        continue
+                    answer_crud.add_answer(
+                        snapshot.version, ValidationService.normalize_question(question), question,
+                        response.model_dump_json(),
+                    )
+                    stored += 1
+
+            answer_crud.delete_other_versions(snapshot.version)
+            print(f"[PrecomputeService] Precomputed {stored}/{len(questions)} answers for corpus {snapshot.version}")
+            return stored
+        finally:
+            db.close()
+            app_service.db.close()
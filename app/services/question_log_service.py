@@ -0,0 +1,180 @@
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from app.config import settings
+from app.cruds.question_log_crud import QuestionLogCrud
+from app.db.database import get_db
+from app.services.metrics_service import MetricsService
+
+
+class QuestionLogService:
+    """
+    Non-blocking question/answer log. Requests only put an entry on a bounded in-memory queue; a background
+    writer bulk-inserts batches when QUESTION_LOG_BATCH_SIZE entries are queued or QUESTION_LOG_FLUSH_SECONDS
+    have passed. When the queue is full (database too slow) or a write fails, entries are spilled to a JSONL
+    file and replayed later, or dropped, depending on QUESTION_LOG_OVERFLOW_POLICY
+    """
+
+    _queue: "queue.Queue[dict]" = queue.Queue(maxsize=settings.QUESTION_LOG_QUEUE_SIZE)
+    _thread: Optional[threading.Thread] = None
+    _stop_event = threading.Event()
+    _spill_lock = threading.Lock()
+
+    @classmethod
+    def log(cls, entry: dict):
+        """
+        Queue a QuestionLog row (column -> value). Never blocks and never raises
+        """
+        try:
+            cls._queue.put_nowait(entry)
+        except queue.Full:
+            cls._overflow([entry])
+
+    @classmethod
+    def start(cls):
+        """
+        Start the background writer (once per process)
+        """
+        if cls._thread is not None and cls._thread.is_alive():
+            return
+        cls._stop_event.clear()
+        cls._thread = threading.Thread(target=cls._run, daemon=True, name="question-log-writer")
+        cls._thread.start()
+
+    @classmethod
+    def stop(cls, timeout: float = 10):
+        """
+        Flush everything still queued and stop the writer (on application shutdown)
+        """
+        cls._stop_event.set()
+        if cls._thread is not None:
+            cls._thread.join(timeout=timeout)
+            cls._thread = None
+
+    @classmethod
+    def _run(cls):
+        cls._safe_replay_spill()
+        while True:
+            batch = cls._next_batch()
+            if batch:
+                cls._write(batch)
+            elif cls._stop_event.is_set():
+                return
+
+    @classmethod
+    def _next_batch(cls) -> List[dict]:
+        batch = []
+        deadline = time.monotonic() + settings.QUESTION_LOG_FLUSH_SECONDS
+        while len(batch) < settings.QUESTION_LOG_BATCH_SIZE:
+            try:
+                if cls._stop_event.is_set():
+                    batch.append(cls._queue.get_nowait())
+                else:
+                    batch.append(cls._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    @classmethod
+    def _write(cls, batch: List[dict]) -> bool:
+        db = next(get_db())
+        try:
+            QuestionLogCrud(db).add_entries(batch)
+            MetricsService.increment("question_log.written", len(batch))
+        except Exception as e:
+            print(f"[QuestionLogService] @write: {e}")
+            cls._overflow(batch)
+            return False
+        finally:
+            db.close()
+
+        cls._safe_replay_spill()
+        return True
+
+    @classmethod
+    def _overflow(cls, entries: List[dict]):
+        if settings.QUESTION_LOG_OVERFLOW_POLICY != "spill":
+            MetricsService.increment("question_log.dropped", len(entries))
+            return
+        try:
+            with cls._spill_lock:
+                os.makedirs(os.path.dirname(settings.QUESTION_LOG_SPILL_PATH) or ".", exist_ok=True)
+                with open(settings.QUESTION_LOG_SPILL_PATH, "a", encoding="utf-8") as spill_file:
+                    for entry in entries:
+                        spill_file.write(json.dumps(entry, default=datetime.isoformat) + "\n")
+            MetricsService.increment("question_log.spilled", len(entries))
+        except Exception as e:
+            print(f"[QuestionLogService] @overflow: failed to spill {len(entries)} entries: {e}")
+            MetricsService.increment("question_log.dropped", len(entries))
+
+    @classmethod
+    def _safe_replay_spill(cls):
+        """
+        _replay_spill for the writer thread: an error leaves the files in place for the next replay instead of
+        ending the thread
+        """
+        try:
+            cls._replay_spill()
+        except Exception as e:
+            print(f"[QuestionLogService] @replay_spill: {e}")
+
+    @classmethod
+    def _replay_spill(cls):
+        """
+        Write spilled entries back to the database. The spill file is moved to a .replay file first, so entries
+        spilled meanwhile go to a new file; a .replay file left by an interrupted replay is extended, not replaced.
+        Lines that cannot be parsed (a crash in the middle of a spill) are moved to a .corrupt file.
+        The .replay file is deleted once its entries are inserted; whatever fails to insert is spilled again
+        """
+        replay_path = settings.QUESTION_LOG_SPILL_PATH + ".replay"
+        with cls._spill_lock:
+            if os.path.exists(settings.QUESTION_LOG_SPILL_PATH):
+                if os.path.exists(replay_path):
+                    with open(settings.QUESTION_LOG_SPILL_PATH, encoding="utf-8") as spill_file, \
+                            open(replay_path, "a", encoding="utf-8") as replay_file:
+                        shutil.copyfileobj(spill_file, replay_file)
+                    os.remove(settings.QUESTION_LOG_SPILL_PATH)
+                else:
+                    os.replace(settings.QUESTION_LOG_SPILL_PATH, replay_path)
+            if not os.path.exists(replay_path):
+                return
+
+        entries, corrupt = [], []
+        with open(replay_path, encoding="utf-8") as replay_file:
+            for line in replay_file:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    if isinstance(entry.get("created_at"), str):
+                        entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+                    entries.append(entry)
+                except (ValueError, AttributeError):
+                    corrupt.append(line if line.endswith("\n") else line + "\n")
+        if corrupt:
+            with open(settings.QUESTION_LOG_SPILL_PATH + ".corrupt", "a", encoding="utf-8") as corrupt_file:
+                corrupt_file.writelines(corrupt)
+            print(f"[QuestionLogService] @replay_spill: {len(corrupt)} unreadable spill lines quarantined")
+            MetricsService.increment("question_log.corrupt", len(corrupt))
+
+        db = next(get_db())
+        try:
+            crud = QuestionLogCrud(db)
+            for start in range(0, len(entries), settings.QUESTION_LOG_BATCH_SIZE):
+                batch = entries[start:start + settings.QUESTION_LOG_BATCH_SIZE]
+                try:
+                    crud.add_entries(batch)
+                    MetricsService.increment("question_log.replayed", len(batch))
+                except Exception as e:
+                    print(f"[QuestionLogService] @replay_spill: {e}")
+                    cls._overflow(entries[start:])
+                    break
+        finally:
+            db.close()
+        os.remove(replay_path)
@@ -0,0 +1,64 @@
+import threading
+from typing import Optional
+
+from app.config import settings
+from app.cruds.page_crud import PageCrud
+from app.db.database import get_read_db
+from app.services.corpus_service import CorpusService
+
+
+class ReadinessService:
+    """
+    Warms the worker up in the background and reports when it can answer questions. /health only says the
+    process is alive, /ready says traffic can be routed to it
+    """
+
+    _ready = threading.Event()
+    _corpus_version: Optional[str] = None
+
+    def __init__(self):
+        self._stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._warm_up, daemon=True)
+
+    def start(self):
+        """
+        Start warm-up in a background thread
+        """
+        self.thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        return cls._ready.is_set()
+
+    @classmethod
+    def corpus_version(cls) -> Optional[str]:
+        return cls._corpus_version
+
+    def _warm_up(self):
+        """
+        Import the lazily loaded dependencies and load the corpus snapshot. Retries until the corpus has
+        pages, e.g. while the first crawl of a fresh deployment is still running
+        """
+        import openai  # noqa: F401 - pay the SDK import before the first request does
+
+        while not self._stop_event.is_set():
+            try:
+                if self._load_corpus():
+                    ReadinessService._ready.set()
+                    print(f"[ReadinessService] Ready, corpus version {ReadinessService._corpus_version}")
+                    return
+            except Exception as e:
+                print(f"[ReadinessService] @warm_up: {e}")
+            self._stop_event.wait(settings.READINESS_RETRY_SECONDS)
+
+    def _load_corpus(self) -> bool:
+        db = next(get_read_db())
+        try:
+            snapshot = CorpusService(PageCrud(db)).get_snapshot()
+            ReadinessService._corpus_version = snapshot.version
+            return bool(snapshot.pages)
+        finally:
+            db.close()
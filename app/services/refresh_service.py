@@ -0,0 +1,230 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urlparse
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.cruds.crawl_lease_crud import CrawlLeaseCrud
+from app.cruds.page_crud import PageCrud
+from app.cruds.page_link_crud import PageLinkCrud
+from app.cruds.precomputed_answer_crud import PrecomputedAnswerCrud
+from app.db.database import get_db
+from app.dtos.refresh_response import RefreshResponse, RefreshResult
+from app.services.corpus_file_service import CorpusFileService
+from app.services.corpus_service import CorpusService, CorpusSnapshot
+from app.services.crawler_service import CRAWL_LEASE_NAME
+from app.services.lexical_index import tokenize
+from app.services.metrics_service import MetricsService
+from app.services.relevance_service import STOP_WORDS
+from app.services.source_info_service import SourceInfoService
+
+USER_AGENT = "cmt-backend-refresh/1.0"
+# Result statuses that change the stored corpus
+CHANGED_STATUSES = ("created", "updated", "deleted")
+
+
+class DomainRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """
+    Follows redirects within the crawled domain only. A redirect to another host ends the fetch with an
+    HTTPError carrying the redirect status and target, before that host is contacted
+    """
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not RefreshService.is_allowed_url(newurl):
+            raise urllib.error.HTTPError(newurl, code, f"Redirect to {newurl} is not followed", headers, fp)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+class RefreshService:
+    """
+    Push-based refresh of single pages, for editors who changed a page and do not want to wait for the next crawl.
+    Each URL is fetched and extracted like TextSpider does (crawler/extraction.py, same content budget) and
+    upserted through PageCrud; pages that are gone (404/410) are deleted. The new corpus version is then built
+    incrementally from the previous snapshot: only the refreshed pages are indexed again, and precomputed
+    answers that neither cite a refreshed page nor match its old or new text are carried over to the new version
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, db=None):
+        self.db = db if db is not None else next(get_db())
+        self.page_crud = PageCrud(self.db)
+        self.link_crud = PageLinkCrud(self.db)
+        self.corpus_service = CorpusService(self.page_crud)
+
+    @staticmethod
+    def validate_urls(urls: List[str]) -> List[str]:
+        """
+        Deduplicated URLs of a refresh request
+
+        Raises:
+            HTTPException: 400 status code if there are no URLs or more than REFRESH_MAX_URLS
+        """
+        urls = list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+        if not urls:
+            raise HTTPException(status_code=400, detail="No URLs to refresh")
+        if len(urls) > settings.REFRESH_MAX_URLS:
+            raise HTTPException(status_code=400, detail=f"At most {settings.REFRESH_MAX_URLS} URLs per request")
+        return urls
+
+    @staticmethod
+    def is_allowed_url(url: str) -> bool:
+        """
+        Only http(s) URLs of the crawled domain and its subdomains are fetched
+        """
+        parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+        return parsed.scheme in ("http", "https") and (
+            host == settings.DOMAIN or host.endswith(f".{settings.DOMAIN}")
+        )
+
+    def refresh(self, urls: List[str]) -> RefreshResponse:
+        """
+        Fetch, extract and store the given pages, then switch this process to the new corpus version
+
+        Returns:
+            RefreshResponse: New corpus version and the result per URL
+
+        Raises:
+            HTTPException:
+                - 400 status code if the URL list is invalid
+                - 409 status code if a crawl is running (it rewrites the pages table)
+        """
+        urls = self.validate_urls(urls)
+        with RefreshService._lock:
+            if self.crawl_running():
+                raise HTTPException(status_code=409, detail="A crawl is running, refresh the pages after it finished")
+
+            previous = self.corpus_service.get_snapshot()
+            results = [self._refresh_url(url, previous) for url in urls]
+            for result in results:
+                MetricsService.increment(f"refresh.pages.{result.status}")
+
+            changed = {result.url for result in results if result.status in CHANGED_STATUSES}
+            snapshot = previous
+            if changed:
+                snapshot = self.corpus_service.get_snapshot()
+                self._on_corpus_changed(previous, snapshot, changed)
+            print(f"[RefreshService] Refreshed {len(urls)} URLs, {len(changed)} changed, "
+                  f"corpus version {snapshot.version}")
+            return RefreshResponse(corpus_version=snapshot.version, results=results)
+
+    def fetch(self, url: str) -> Tuple[int, str, bytes, Optional[str]]:
+        """
+        GET a page. Redirects are only followed within the crawled domain
+
+        Returns:
+            Tuple[int, str, bytes, Optional[str]]: HTTP status, final URL (after redirects, or the rejected
+                                                   redirect target), body and Content-Type
+
+        Raises:
+            ValueError: If the body is larger than REFRESH_MAX_RESPONSE_BYTES
+        """
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        opener = urllib.request.build_opener(DomainRedirectHandler)
+        try:
+            with opener.open(request, timeout=settings.REFRESH_FETCH_TIMEOUT_SECONDS) as response:
+                body = response.read(settings.REFRESH_MAX_RESPONSE_BYTES + 1)
+                if len(body) > settings.REFRESH_MAX_RESPONSE_BYTES:
+                    raise ValueError(f"Response larger than {settings.REFRESH_MAX_RESPONSE_BYTES} bytes")
+                return response.status, response.geturl(), body, response.headers.get("Content-Type")
+        except urllib.error.HTTPError as e:
+            return e.code, e.geturl() or url, b"", e.headers.get("Content-Type") if e.headers else None
+
+    def _refresh_url(self, url: str, previous: CorpusSnapshot) -> RefreshResult:
+        # parsel/lxml are only loaded when a page is refreshed, not at application startup
+        from crawler.extraction import extract_page
+
+        if not self.is_allowed_url(url):
+            return RefreshResult(url=url, status="skipped", detail=f"Not a {settings.DOMAIN} URL")
+        try:
+            status, final_url, body, content_type = self.fetch(url)
+            if final_url != url and not self.is_allowed_url(final_url):
+                return RefreshResult(url=url, status="skipped", detail=f"Redirected to {final_url}")
+            if status in (404, 410):
+                deleted = self.page_crud.delete_page(url)
+                self.link_crud.delete_links(url)
+                return RefreshResult(url=url, status="deleted" if deleted else "not_found")
+            if status != 200:
+                return RefreshResult(url=url, status="failed", detail=f"HTTP {status}")
+            if content_type and not any(kind in content_type for kind in ("text/", "html", "xml")):
+                return RefreshResult(url=url, status="skipped", detail=f"Not a text page ({content_type})")
+
+            # Same budget rule as the spider: the corpus must stay within MAX_CONTENT_SIZE
+            stored = len(previous.pages[final_url]) if final_url in previous.pages else 0
+            remaining = settings.MAX_CONTENT_SIZE - self.page_crud.get_total_content_length() + stored
+            page = extract_page(body, final_url, content_type, max_summary_chars=remaining)
+            if len(page["content"]) > remaining:
+                return RefreshResult(url=final_url, status="over_budget",
+                                     detail=f"{len(page['content'])} characters, {remaining} left in the budget")
+
+            _, status = self.page_crud.upsert_page(
+                final_url, page["content"], summary=page["summary"], language=page["language"]
+            )
+            # Keeps the link graph current, importance scores are recomputed by the next crawl
+            self.link_crud.replace_links(
+                final_url, [urldefrag(link)[0] for link in page["links"] if self.is_allowed_url(link)]
+            )
+            return RefreshResult(url=final_url, status=status)
+        except Exception as e:
+            print(f"[RefreshService] @_refresh_url: {url}: {e}")
+            return RefreshResult(url=url, status="failed", detail=str(e))
+
+    def crawl_running(self) -> bool:
+        """
+        Whether a crawl holds the crawl lease. Refreshes are rejected meanwhile, the crawl rewrites the pages table
+        """
+        lease = CrawlLeaseCrud(self.db).get_lease(CRAWL_LEASE_NAME)
+        return lease is not None and lease.owner is not None and lease.expires_at > datetime.utcnow()
+
+    def _on_corpus_changed(self, previous: CorpusSnapshot, snapshot: CorpusSnapshot, changed: Set[str]):
+        """
+        Update what is derived from the corpus version: corpus file, /source_info files and precomputed answers
+        """
+        MetricsService.increment("refresh.reindexed_pages", snapshot.index.reindexed)
+        try:
+            if settings.CORPUS_FILE_ENABLED:
+                CorpusFileService().export(snapshot)
+            SourceInfoService().render(snapshot)
+        except Exception as e:
+            print(f"[RefreshService] Exporting corpus snapshot failed: {e}")
+
+        try:
+            kept = self._carry_over_answers(previous, snapshot, changed)
+            MetricsService.increment("refresh.precomputed_kept", kept)
+        except Exception as e:
+            print(f"[RefreshService] Carrying over precomputed answers failed: {e}")
+
+    def _carry_over_answers(self, previous: CorpusSnapshot, snapshot: CorpusSnapshot, changed: Set[str]) -> int:
+        """
+        Copy the precomputed answers of the previous version that cannot be affected by the changed pages to the
+        new version. An answer is affected if it cites a changed page or an informative term of its question
+        (stop words do not count) was added to or removed from a changed page. The others are dropped and answered
+        live until the next crawl precomputes them again
+
+        Returns:
+            int: Number of answers carried over
+        """
+        changed_terms = set()
+        for url in changed:
+            old = Counter(tokenize(previous.pages[url])) if url in previous.pages else Counter()
+            new = Counter(tokenize(snapshot.pages[url])) if url in snapshot.pages else Counter()
+            changed_terms.update(term for term in old.keys() | new.keys() if old[term] != new[term])
+        changed_terms -= STOP_WORDS
+
+        answer_crud = PrecomputedAnswerCrud(self.db)
+        kept = 0
+        for answer in answer_crud.get_answers(previous.version):
+            sources = set(json.loads(answer.response).get("sources") or [])
+            if sources & changed or changed_terms.intersection(tokenize(answer.question)):
+                continue
+            answer_crud.add_answer(snapshot.version, answer.question_key, answer.question, answer.response)
+            kept += 1
+        answer_crud.delete_other_versions(snapshot.version)
+        return kept
@@ -0,0 +1,76 @@
+from typing import Optional
+
+from app.config import settings
+from app.dtos.ask_response import AskResponse, Usage
+from app.services.corpus_service import CorpusSnapshot
+from app.services.language_service import ENGLISH_WORDS, ESTONIAN_WORDS
+from app.services.lexical_index import tokenize
+from app.services.metrics_service import MetricsService
+
+# Function and question words say nothing about the topic of a question
+STOP_WORDS = ESTONIAN_WORDS | ENGLISH_WORDS
+
+
+class RelevanceDecision:
+    """
+    Outcome of the relevance gate for one question
+
+    Attributes:
+        relevant (bool): The question may be answered from the corpus and goes to the LLM
+        score (Optional[float]): Share of the question's informative terms found in the corpus (0..1),
+                                 None when the question has no informative terms (not judged, passed)
+        terms (int): Number of informative terms in the question
+    """
+    relevant: bool
+    score: Optional[float]
+    terms: int
+
+    def __init__(self, relevant: bool, score: Optional[float], terms: int):
+        self.relevant = relevant
+        self.score = score
+        self.terms = terms
+
+
+class RelevanceService:
+    """
+    Local pre-filter in front of the LLM: questions whose terms do not occur in the crawled corpus
+    (greetings with a topic, unrelated topics, gibberish) get a canned answer instantly instead of a full-context
+    LLM call. Terms match the corpus vocabulary exactly or by their first RELEVANCE_GATE_PREFIX_CHARS characters,
+    a cheap stand-in for stemming of Estonian and English inflections
+    """
+
+    def check(self, question: str, snapshot: CorpusSnapshot) -> RelevanceDecision:
+        """
+        Score the question against the corpus vocabulary and decide whether it goes to the LLM.
+        Every decision is logged and counted, so RELEVANCE_GATE_MIN_SCORE can be tuned from real traffic.
+        In "log_only" mode rejected questions are counted but still passed
+        """
+        terms = {term for term in tokenize(question) if term not in STOP_WORDS}
+        if not terms:
+            MetricsService.increment("relevance_gate.unscored")
+            return RelevanceDecision(True, None, 0)
+
+        matched = sum(snapshot.index.contains(term, settings.RELEVANCE_GATE_PREFIX_CHARS) for term in terms)
+        score = matched / len(terms)
+        relevant = score >= settings.RELEVANCE_GATE_MIN_SCORE
+
+        MetricsService.increment(f"relevance_gate.{'passed' if relevant else 'rejected'}")
+        if not relevant:
+            print(f"[RelevanceService] @check: rejected (score {score:.2f} < {settings.RELEVANCE_GATE_MIN_SCORE}, "
+                  f"{matched}/{len(terms)} terms) {question[:80]!r}")
+        if settings.RELEVANCE_GATE == "log_only":
+            relevant = True
+        return RelevanceDecision(relevant, score, len(terms))
+
+    @staticmethod
+    def canned_response(question: str, language: Optional[str]) -> AskResponse:
+        """
+        "Not covered by the site" answer in the question's language, no sources and no token usage
+        """
+        answers = settings.RELEVANCE_GATE_ANSWERS
+        return AskResponse(
+            question=question,
+            answer=answers.get(language or "en", answers["en"]).format(domain=settings.DOMAIN),
+            sources=[],
+            usage=Usage(input_tokens=0, output_tokens=0),
+        )
@@ -0,0 +1,374 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling the provider while the circuit breaker is open
+    """
+
+
+class AttemptTimeoutError(TimeoutError):
+    """
+    Raised when a single attempt (including its hedge) does not finish within the per-attempt deadline
+    """
+
+
+class RequestCancelledError(Exception):
+    """
+    Raised when the request's client disconnected or its deadline passed, so the remaining work is skipped
+
+    Attributes:
+        reason (str): "disconnect" or "deadline"
+        stage (str): Stage that noticed the cancellation, e.g. "corpus", "llm_queued" (before the LLM call) or
+                     "llm" (while waiting for it)
+        tokens_saved (int): Estimated input tokens not spent because the LLM call was never made
+    """
+
+    def __init__(self, reason: str, stage: str, tokens_saved: int = 0):
+        super().__init__(f"Request cancelled ({reason}) during {stage}")
+        self.reason = reason
+        self.stage = stage
+        self.tokens_saved = tokens_saved
+
+
+class Cancellation:
+    """
+    Deadline and cancel flag of one request. Checked cooperatively between stages and while waiting for the
+    provider, so work for a client that is gone (or will time out anyway) stops early.
+    A cancellation with a `parent` covers one stage of the request: it fires at its own (shorter) deadline or when
+    the parent fires, taking over the parent's reason
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["Cancellation"] = None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        if parent is not None and parent.deadline is not None:
+            self.deadline = parent.deadline if self.deadline is None else min(self.deadline, parent.deadline)
+        self.parent = parent
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+
+    def cancel(self, reason: str):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.parent is not None and self.parent.cancelled:
+            self.cancel(self.parent.reason)
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline")
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """
+        Seconds left until the deadline, None without a deadline
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self, stage: str, tokens_saved: int = 0):
+        """
+        Raises:
+            RequestCancelledError: If the request is cancelled
+        """
+        if self.cancelled:
+            raise RequestCancelledError(self.reason, stage, tokens_saved)
+
+    def wait(self, seconds: float) -> bool:
+        """
+        Sleep up to `seconds`, waking up early on cancellation
+
+        Returns:
+            bool: True if the request is cancelled
+        """
+        remaining = self.remaining()
+        self._event.wait(seconds if remaining is None else min(seconds, remaining))
+        return self.cancelled
+
+
+def is_retryable_openai_error(error: Exception) -> bool:
+    """
+    Transient provider failures: timeouts, connection errors, rate limits and 5xx responses.
+    Client errors (bad request, authentication) are not retried and do not count against the circuit
+    """
+    if isinstance(error, TimeoutError):
+        return True
+
+    import openai
+    return isinstance(error, (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    ))
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker. Opens when the failure rate over the last `window_size` calls reaches
+    `failure_rate_threshold`, fails fast for `open_seconds`, then lets a single probe call through (half-open)
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate_threshold: float, window_size: int, min_calls: int, open_seconds: float):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._outcomes = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+                self._probe_in_flight = False
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate_threshold:
+                self._open()
+
+    def release_probe(self):
+        """
+        End a half-open probe that has no outcome (the request was cancelled), so the next call probes again
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._outcomes.clear()
+            self._probe_in_flight = False
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        print(f"[CircuitBreaker] Circuit opened for {self.open_seconds}s")
+
+
+class LatencyTracker:
+    """
+    Keeps the latencies of the last calls to derive the hedge delay and route on slowness. Calls abandoned at a
+    deadline count with the time waited for them (a lower bound), so deadlines do not hide slow calls
+    """
+
+    def __init__(self, window_size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: Latency in seconds, None until `min_samples` calls were recorded
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ResilientCaller:
+    """
+    Wraps a blocking provider call with a per-attempt deadline, retries with full-jitter exponential backoff,
+    optional hedging and a circuit breaker.
+
+    The wrapped function receives the time left until the attempt deadline in seconds and must pass it on to its
+    client, so abandoned attempts (lost hedges, timed out calls) release their worker thread once it expires.
+    At most `max_workers` calls run at once, attempts that are still queued when the caller gives up are dropped
+    """
+
+    CANCELLATION_POLL_SECONDS = 0.1
+
+    def __init__(self, breaker: CircuitBreaker, latency_tracker: LatencyTracker, attempt_timeout: float,
+                 max_attempts: int, backoff_base: float, backoff_max: float, hedge_enabled: bool = False,
+                 hedge_min_delay: float = 0.0, max_workers: int = 16,
+                 is_retryable: Callable[[Exception], bool] = is_retryable_openai_error):
+        self.breaker = breaker
+        self.latency_tracker = latency_tracker
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay = hedge_min_delay
+        self.is_retryable = is_retryable
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resilient-call")
+
+    def call(self, fn: Callable[[float], T], hedge: bool = True, cancellation: Optional[Cancellation] = None) -> T:
+        """
+        Call `fn(timeout)` until it succeeds, fails with a non-retryable error or attempts run out.
+        hedge=False never sends a second concurrent call, for functions with side effects (streaming to a client).
+        With a cancellation, attempts are capped at its deadline, and the caller stops waiting (and retrying) as
+        soon as it is cancelled. An attempt that is still queued is dropped, one already sent keeps running in its
+        worker thread until its timeout
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            RequestCancelledError: If the cancellation fired
+            Exception: The last error raised by `fn`, or AttemptTimeoutError
+        """
+        for attempt in range(self.max_attempts):
+            if cancellation is not None:
+                cancellation.check("llm")
+            if not self.breaker.allow_request():
+                raise CircuitOpenError("Circuit breaker is open, provider calls are suspended")
+
+            try:
+                result = self._attempt(fn, hedge, cancellation)
+                self.breaker.record_success()
+                return result
+            except RequestCancelledError:
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                retryable = self.is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if not retryable or attempt == self.max_attempts - 1:
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                print(f"[ResilientCaller] @call: attempt {attempt + 1} failed ({e!r}), retrying in {delay:.2f}s")
+                if cancellation is not None:
+                    cancellation.wait(delay)
+                else:
+                    time.sleep(delay)
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Delay after which a second request is sent: the recent p95 latency, but at least `hedge_min_delay`.
+        None while hedging is disabled or there is not enough latency history
+        """
+        if not self.hedge_enabled:
+            return None
+        p95 = self.latency_tracker.percentile(0.95)
+        if p95 is None:
+            return None
+        return max(self.hedge_min_delay, p95)
+
+    def _attempt(self, fn: Callable[[float], T], hedge: bool = True, cancellation: Optional[Cancellation] = None) -> T:
+        started = time.monotonic()
+        attempt_timeout = self.attempt_timeout
+        if cancellation is not None and cancellation.remaining() is not None:
+            attempt_timeout = min(attempt_timeout, cancellation.remaining())
+        deadline = started + attempt_timeout
+        futures = {self._executor.submit(self._start, fn, deadline)}
+
+        try:
+            hedge_delay = self.hedge_delay() if hedge else None
+            if hedge_delay is not None and hedge_delay < attempt_timeout:
+                done, _ = self._wait(futures, hedge_delay, cancellation)
+                if not done:
+                    print(f"[ResilientCaller] @attempt: no answer after {hedge_delay:.2f}s, sending hedged request")
+                    futures.add(self._executor.submit(self._start, fn, deadline))
+
+            error: Optional[Exception] = None
+            pending = futures
+            while pending:
+                done, pending = self._wait(pending, max(0.0, deadline - time.monotonic()), cancellation)
+                if not done:
+                    break
+                for future in done:
+                    if future.exception() is None:
+                        self.latency_tracker.record(time.monotonic() - started)
+                        return future.result()
+                    error = future.exception()
+
+            if error is not None and not pending:
+                raise error
+            if cancellation is not None:
+                cancellation.check("llm")
+            self.latency_tracker.record(time.monotonic() - started)
+            raise AttemptTimeoutError(f"No response within {attempt_timeout}s")
+        except RequestCancelledError as e:
+            if e.reason == "deadline":
+                self.latency_tracker.record(time.monotonic() - started)
+            raise
+        finally:
+            # Calls still queued behind a full pool are dropped instead of being sent after the caller gave up
+            for future in futures:
+                future.cancel()
+
+    @staticmethod
+    def _start(fn: Callable[[float], T], deadline: float) -> T:
+        """
+        Run `fn` with the time left until the attempt deadline when a worker thread picks it up, not when it was
+        submitted
+
+        Raises:
+            AttemptTimeoutError: If the deadline passed while the call was queued
+        """
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            raise AttemptTimeoutError("Attempt deadline passed before a worker thread was free")
+        return fn(timeout)
+
+    def _wait(self, futures, timeout: float, cancellation: Optional[Cancellation]):
+        """
+        wait(FIRST_COMPLETED) that also returns once the cancellation fires, checked every
+        CANCELLATION_POLL_SECONDS
+
+        Raises:
+            RequestCancelledError: If the cancellation fired before a future completed
+        """
+        if cancellation is None:
+            return wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            timeout = min(self.CANCELLATION_POLL_SECONDS, max(0.0, deadline - time.monotonic()))
+            done, pending = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            if done or time.monotonic() >= deadline:
+                return done, pending
+            cancellation.check("llm")
@@ -0,0 +1,128 @@
+import re
+from typing import List, Optional
+
+from app.config import settings
+from app.dtos.ask_response import Usage
+from app.services.metrics_service import MetricsService
+
+COMPLEX_QUESTION_PATTERN = re.compile(
+    r"\b(compare|comparison|difference|differences|versus|vs|pros|cons|both|advantages|disadvantages|"
+    r"võrdle|võrdlus|erinevus|erinevused|erineb|vahe|mõlemad|eelised|puudused)\b",
+    re.IGNORECASE,
+)
+
+
+class RoutingSignals:
+    """
+    Per-request inputs of the routing decision
+
+    Attributes:
+        question_length (int): Question length in characters
+        is_complex (bool): Multi-part or comparison question
+        context_chars (int): Size of the serialized corpus that would be sent in full
+        latency_p95 (Optional[float]): Recent p95 OpenAI latency in seconds, None without enough history
+    """
+    question_length: int
+    is_complex: bool
+    context_chars: int
+    latency_p95: Optional[float]
+
+    def __init__(self, question_length: int, is_complex: bool, context_chars: int, latency_p95: Optional[float]):
+        self.question_length = question_length
+        self.is_complex = is_complex
+        self.context_chars = context_chars
+        self.latency_p95 = latency_p95
+
+
+class Route:
+    """
+    One row of the routing table (settings.MODEL_ROUTES). Conditions left as None match anything
+
+    Attributes:
+        name (str): Route name used in metrics
+        model (str): OpenAI model to call
+        max_context_chars (int): Context budget, the corpus is trimmed to the most relevant pages above it
+        max_question_chars (Optional[int]): Only questions up to this length
+        complex (Optional[bool]): Only complex (True) or only simple (False) questions
+        min_context_chars (Optional[int]): Only when the full corpus is at least this large
+        min_latency_p95_seconds (Optional[float]): Only while recent p95 latency is at least this high
+        input_cost_per_mtok (float): USD per 1M input tokens, for cost metrics
+        output_cost_per_mtok (float): USD per 1M output tokens, for cost metrics
+        map_reduce (bool): Answer a corpus above max_context_chars shard by shard instead of trimming it
+    """
+
+    def __init__(self, name: str, model: str, max_context_chars: int, max_question_chars: Optional[int] = None,
+                 complex: Optional[bool] = None, min_context_chars: Optional[int] = None,
+                 min_latency_p95_seconds: Optional[float] = None, input_cost_per_mtok: float = 0.0,
+                 output_cost_per_mtok: float = 0.0, map_reduce: bool = False):
+        self.name = name
+        self.model = model
+        self.max_context_chars = max_context_chars
+        self.max_question_chars = max_question_chars
+        self.complex = complex
+        self.min_context_chars = min_context_chars
+        self.min_latency_p95_seconds = min_latency_p95_seconds
+        self.input_cost_per_mtok = input_cost_per_mtok
+        self.output_cost_per_mtok = output_cost_per_mtok
+        self.map_reduce = map_reduce
+
+    def matches(self, signals: RoutingSignals) -> bool:
+        if self.max_question_chars is not None and signals.question_length > self.max_question_chars:
+            return False
+        if self.complex is not None and signals.is_complex != self.complex:
+            return False
+        if self.min_context_chars is not None and signals.context_chars < self.min_context_chars:
+            return False
+        if self.min_latency_p95_seconds is not None and (
+                signals.latency_p95 is None or signals.latency_p95 < self.min_latency_p95_seconds):
+            return False
+        return True
+
+    def cost(self, usage: Usage) -> float:
+        return (usage.input_tokens * self.input_cost_per_mtok + usage.output_tokens * self.output_cost_per_mtok) / 1e6
+
+
+class RoutingService:
+    """
+    Picks the model and context budget per question. Routes are checked in table order, first match wins,
+    so the last route should have no conditions
+    """
+
+    def __init__(self, routes: Optional[List[dict]] = None):
+        self.routes = [Route(**route) for route in (routes if routes is not None else settings.MODEL_ROUTES)]
+        if not self.routes:
+            raise ValueError("Routing table is empty")
+
+    @staticmethod
+    def is_complex_question(question: str) -> bool:
+        return question.count("?") > 1 or bool(COMPLEX_QUESTION_PATTERN.search(question))
+
+    def choose(self, question: str, context_chars: int, latency_p95: Optional[float] = None) -> Route:
+        """
+        Returns:
+            Route: First route matching the request signals, the last route if none does
+        """
+        signals = RoutingSignals(
+            question_length=len(question),
+            is_complex=self.is_complex_question(question),
+            context_chars=context_chars,
+            latency_p95=latency_p95,
+        )
+        for route in self.routes:
+            if route.matches(signals):
+                return route
+        return self.routes[-1]
+
+    @staticmethod
+    def record(route: Route, seconds: float, context_chars: int, usage: Usage):
+        """
+        Record per-route latency, context size, token usage and cost
+        """
+        prefix = f"routes.{route.name}"
+        MetricsService.increment(f"{prefix}.requests")
+        MetricsService.increment(f"{prefix}.latency_seconds_total", seconds)
+        MetricsService.increment(f"{prefix}.context_chars_total", context_chars)
+        MetricsService.increment(f"{prefix}.input_tokens", usage.input_tokens)
+        MetricsService.increment(f"{prefix}.cached_input_tokens", usage.cached_input_tokens)
+        MetricsService.increment(f"{prefix}.output_tokens", usage.output_tokens)
+        MetricsService.increment(f"{prefix}.cost_usd", route.cost(usage))
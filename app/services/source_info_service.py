@@ -0,0 +1,180 @@
+import gzip
+import os
+import threading
+from typing import Iterable, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.corpus_service import CorpusSnapshot
+
+# Content-Encoding -> file suffix, in server preference order (brotli is ~15-20% smaller than gzip on text)
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+class SourceInfoService:
+    """
+    Renders the /source_info JSON once per corpus version into identity, gzip and brotli files, so the endpoint
+    only picks a file and sends it, without querying pages or serializing/compressing JSON per request.
+    Rendered by the crawl leader after every crawl, or on first request by a worker that finds no file
+    for the current version (another host, crawl skipped on startup). Brotli at quality 11 takes seconds on
+    a large corpus, so the request path never waits for it
+    """
+
+    _lock = threading.Lock()
+    # Versions whose brotli file is being rendered in the background
+    _brotli_pending: Set[str] = set()
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.SOURCE_INFO_DIR
+
+    def path(self, version: str, encoding: Optional[str] = None) -> str:
+        return os.path.join(self.directory, f"{version}.json{ENCODINGS.get(encoding, '')}")
+
+    @staticmethod
+    def etag(version: str, encoding: Optional[str] = None) -> str:
+        """
+        Strong ETag of one variant. Encodings are different representations, so each gets its own tag
+        """
+        return f'"{version}-{encoding or "identity"}"'
+
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        """
+        If-None-Match check (weak comparison, as RFC 9110 requires for it)
+        """
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+    @staticmethod
+    def choose_encoding(accept_encoding: Optional[str], available: Iterable[str] = tuple(ENCODINGS)) -> Optional[str]:
+        """
+        Best supported encoding the client accepts, None for identity
+
+        Args:
+            accept_encoding (Optional[str]): Accept-Encoding header, e.g. "gzip, deflate, br;q=0.9"
+            available (Iterable[str]): Encodings rendered for the version
+        """
+        accepted = {}
+        for item in (accept_encoding or "").split(","):
+            name, _, params = item.strip().partition(";")
+            quality = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+            if name:
+                accepted[name.strip().lower()] = quality
+        for encoding in ENCODINGS:
+            if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return None
+
+    def is_rendered(self, version: str) -> bool:
+        return all(os.path.exists(self.path(version, encoding)) for encoding in (None, *ENCODINGS))
+
+    def render(self, snapshot: CorpusSnapshot):
+        """
+        Write all variants of the snapshot (pages in URL order) at the highest compression and delete old
+        versions. Run off the request path, by the crawl leader and by page refreshes
+        """
+        if self.is_rendered(snapshot.version):
+            return
+        body = self._render_fast(snapshot, gzip_level=9)
+        self._render_brotli(snapshot.version, body)
+        print(f"[SourceInfoService] Rendered corpus {snapshot.version}: {len(body)} bytes")
+
+    def get_file(self, snapshot: CorpusSnapshot, accept_encoding: Optional[str]) -> Tuple[str, Optional[str], str]:
+        """
+        Variant of the snapshot to send for an Accept-Encoding header. A version that is not rendered yet
+        gets its identity and gzip files right away (SOURCE_INFO_REQUEST_GZIP_LEVEL), the slow brotli file is
+        rendered in a background thread and served once it exists
+
+        Returns:
+            Tuple[str, Optional[str], str]: File path, Content-Encoding (None for identity) and ETag
+        """
+        version = snapshot.version
+        if not all(os.path.exists(self.path(version, encoding)) for encoding in (None, "gzip")):
+            self._render_fast(snapshot, gzip_level=settings.SOURCE_INFO_REQUEST_GZIP_LEVEL)
+        if not os.path.exists(self.path(version, "br")):
+            self._render_brotli_in_background(snapshot)
+
+        available = [encoding for encoding in ENCODINGS if os.path.exists(self.path(version, encoding))]
+        encoding = self.choose_encoding(accept_encoding, available)
+        return self.path(version, encoding), encoding, self.etag(version, encoding)
+
+    def _render_fast(self, snapshot: CorpusSnapshot, gzip_level: int) -> bytes:
+        """
+        Write the identity and gzip files of the snapshot (once per process and version) and prune old versions
+
+        Returns:
+            bytes: Identity body
+        """
+        import orjson
+
+        with SourceInfoService._lock:
+            body = orjson.dumps(dict(snapshot.pages))
+            if not all(os.path.exists(self.path(snapshot.version, encoding)) for encoding in (None, "gzip")):
+                os.makedirs(self.directory, exist_ok=True)
+                self._write(self.path(snapshot.version), body)
+                self._write(self.path(snapshot.version, "gzip"), gzip.compress(body, compresslevel=gzip_level))
+                self._prune(snapshot.version)
+            return body
+
+    def _render_brotli(self, version: str, body: bytes):
+        import brotli
+
+        self._write(self.path(version, "br"), brotli.compress(body, quality=11, mode=brotli.MODE_TEXT))
+
+    def _render_brotli_in_background(self, snapshot: CorpusSnapshot):
+        with SourceInfoService._lock:
+            if snapshot.version in SourceInfoService._brotli_pending:
+                return
+            SourceInfoService._brotli_pending.add(snapshot.version)
+
+        def run():
+            try:
+                import orjson
+
+                self._render_brotli(snapshot.version, orjson.dumps(dict(snapshot.pages)))
+            except Exception as e:
+                print(f"[SourceInfoService] Rendering brotli variant of {snapshot.version} failed: {e}")
+            finally:
+                with SourceInfoService._lock:
+                    SourceInfoService._brotli_pending.discard(snapshot.version)
+
+        threading.Thread(target=run, daemon=True, name="source-info-brotli").start()
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        """
+        Write under a temporary name and rename, so concurrent readers never see a partial file
+        """
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _prune(self, current_version: str):
+        """
+        Keep the current and the previous version, a request may still be sending the previous one
+        """
+        versions = {}
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.directory, name)
+            versions.setdefault(name.split(".json")[0], []).append(path)
+
+        previous = sorted(
+            (version for version in versions if version != current_version),
+            key=lambda version: max(os.path.getmtime(path) for path in versions[version]),
+            reverse=True,
+        )
+        for version in previous[settings.SOURCE_INFO_KEEP_VERSIONS - 1:]:
+            for path in versions[version]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,102 @@
+import math
+import re
+from typing import List
+
+from app.config import settings
+from app.services.lexical_index import tokenize
+
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-ZÕÄÖÜŠŽ0-9])")
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_PATTERN = re.compile(r"(?:\+\d{1,3}[\s-]?)?\(?\d{2,4}\)?[\s-]?\d{3,4}[\s-]?\d{3,4}")
+PRICE_PATTERN = re.compile(r"(?:€\s?\d[\d\s.,]*|\d[\d\s.,]*\s?(?:€|EUR|eur|eurot?)\b)")
+
+
+class SummaryService:
+    """
+    Deterministic extractive page summaries computed at crawl time: headings, contact/price facts and the
+    most central sentences by TextRank. Used as a compact first-stage context (see CorpusSnapshot.select_two_stage)
+    """
+
+    DAMPING = 0.85
+    ITERATIONS = 30
+
+    @staticmethod
+    def split_sentences(text: str) -> List[str]:
+        return [sentence.strip() for sentence in SENTENCE_SPLIT_PATTERN.split(text) if sentence.strip()]
+
+    @staticmethod
+    def extract_facts(text: str) -> List[str]:
+        """
+        Emails, phone numbers and prices, deduplicated in order of appearance
+        """
+        facts = []
+        for pattern in (EMAIL_PATTERN, PHONE_PATTERN, PRICE_PATTERN):
+            for match in pattern.findall(text):
+                fact = match.strip(" .,")
+                if fact and fact not in facts:
+                    facts.append(fact)
+        return facts
+
+    def rank_sentences(self, sentences: List[str]) -> List[float]:
+        """
+        TextRank: sentences are graph nodes, edges are weighted by word overlap normalized by sentence lengths
+        (Mihalcea & Tarau, 2004), scores come from weighted PageRank power iteration
+        """
+        token_sets = [set(tokenize(sentence)) for sentence in sentences]
+        count = len(sentences)
+        weights = [[0.0] * count for _ in range(count)]
+        for i in range(count):
+            for j in range(i + 1, count):
+                if len(token_sets[i]) < 2 or len(token_sets[j]) < 2:
+                    continue
+                overlap = len(token_sets[i] & token_sets[j])
+                if overlap:
+                    weight = overlap / (math.log(len(token_sets[i])) + math.log(len(token_sets[j])))
+                    weights[i][j] = weights[j][i] = weight
+
+        out_weights = [sum(row) for row in weights]
+        scores = [1.0] * count
+        for _ in range(self.ITERATIONS):
+            scores = [
+                (1 - self.DAMPING) + self.DAMPING * sum(
+                    weights[j][i] / out_weights[j] * scores[j] for j in range(count) if weights[j][i]
+                )
+                for i in range(count)
+            ]
+        return scores
+
+    def summarize(self, text: str, headings: List[str] = None, max_chars: int = None) -> str:
+        """
+        Build the summary of a page
+
+        Args:
+            text (str): Extracted page text
+            headings (List[str]): Page headings (h1-h3)
+            max_chars (int): Summary size limit, settings.SUMMARY_MAX_CHARS by default
+
+        Returns:
+            str: Headings line, facts line and top sentences in page order, at most `max_chars` long
+        """
+        max_chars = max_chars or settings.SUMMARY_MAX_CHARS
+        parts = []
+        headings = [heading.strip() for heading in (headings or []) if heading.strip()]
+        if headings:
+            parts.append("Headings: " + " | ".join(dict.fromkeys(headings)))
+        facts = self.extract_facts(text)
+        if facts:
+            parts.append("Facts: " + ", ".join(facts))
+
+        sentences = self.split_sentences(text)[:settings.SUMMARY_MAX_SENTENCES_RANKED]
+        budget = max_chars - sum(len(part) + 1 for part in parts)
+        if sentences and budget > 0:
+            scores = self.rank_sentences(sentences)
+            ranked = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+            chosen = []
+            for i in ranked:
+                if len(sentences[i]) + 1 <= budget:
+                    chosen.append(i)
+                    budget -= len(sentences[i]) + 1
+            if chosen:
+                parts.append(" ".join(sentences[i] for i in sorted(chosen)))
+
+        return "\n".join(parts)[:max_chars]
@@ -1,3 +1,5 @@
+import re
+
 from app.dtos.validation_response import ValidationResponse
 from app.config import settings
 
@@ -19,3 +21,10 @@ class ValidationService:
             return ValidationResponse(False, f'Question is too long. Maximum length is {MAX_QUESTION_LENGTH} characters')
 
         return ValidationResponse(True, 'Question is valid')
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """
+        Canonical form used to match repeated questions: case-folded, single spaces, no trailing punctuation
+        """
+        return re.sub(r"\s+", " ", question).strip().rstrip("?!.").strip().casefold()
@@ -0,0 +1,94 @@
+"""
+Compares the "full" and "two_stage" context modes: prompt size per question and, with --live, answer latency.
+
+The corpus is read from DATABASE_URL (pages stored by the crawler) or generated with --synthetic N.
+
+Usage:
+    python -m benchmarks.bench_context_modes [--synthetic 200] [--live]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.config import settings
+from app.services.corpus_service import CorpusSnapshot
+from app.services.summary_service import SummaryService
+
+QUESTIONS = [
+    "What services do you offer?",
+    "How can I contact you?",
+    "What does machine learning consulting cost?",
+    "Milliseid teenuseid te pakute?",
+    "Compare your training courses and consulting services",
+]
+
+WORDS = (
+    "machine learning consulting training course language model data analysis pricing contact office "
+    "team project customer solution research estonian english service support workshop"
+).split()
+
+
+def synthetic_pages(count: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    pages = {}
+    for i in range(count):
+        sentences = [" ".join(rng.choices(WORDS, k=rng.randint(8, 20))).capitalize() + "." for _ in range(40)]
+        pages[f"https://example.com/page-{i}"] = " ".join(sentences)
+    return pages
+
+
+def load_snapshot(args) -> CorpusSnapshot:
+    summary_service = SummaryService()
+    if args.synthetic:
+        pages = synthetic_pages(args.synthetic)
+        summaries = {url: summary_service.summarize(content) for url, content in pages.items()}
+        return CorpusSnapshot("synthetic", pages, summaries=summaries)
+
+    from app.cruds.page_crud import PageCrud
+    from app.db.database import get_db
+    from app.services.corpus_service import CorpusService
+    return CorpusService(PageCrud(next(get_db()))).get_snapshot()
+
+
+def select(snapshot: CorpusSnapshot, mode: str, question: str, budget: int):
+    if mode == "two_stage":
+        return snapshot.select_two_stage(question, budget, settings.TWO_STAGE_MAX_PAGES)
+    return snapshot.select_context(question, budget)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--synthetic", type=int, default=0, help="generate N synthetic pages instead of using the DB")
+    parser.add_argument("--budget", type=int, default=settings.MAX_CONTENT_SIZE)
+    parser.add_argument("--live", action="store_true", help="also ask OpenAI and measure answer latency")
+    args = parser.parse_args()
+
+    snapshot = load_snapshot(args)
+    print(f"corpus: {len(snapshot.pages)} pages, {snapshot.context_chars} chars serialized\n")
+
+    if args.live:
+        from app.services.openai_service import OpenAIService
+        openai_service = OpenAIService()
+
+    for mode in ("full", "two_stage"):
+        sizes, select_ms, latencies = [], [], []
+        for question in QUESTIONS:
+            started = time.perf_counter()
+            pages, context = select(snapshot, mode, question, args.budget)
+            select_ms.append((time.perf_counter() - started) * 1000)
+            sizes.append(len(context))
+            if args.live:
+                started = time.perf_counter()
+                openai_service.answer_question(question, pages, context=context)
+                latencies.append(time.perf_counter() - started)
+
+        line = (f"{mode:<10} prompt chars: mean {statistics.mean(sizes):>9.0f}  max {max(sizes):>9}  "
+                f"(~{statistics.mean(sizes) / 4:.0f} tokens)  selection {statistics.mean(select_ms):.2f} ms")
+        if latencies:
+            line += f"  answer latency: mean {statistics.mean(latencies):.2f} s  max {max(latencies):.2f} s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
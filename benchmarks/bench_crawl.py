@@ -0,0 +1,171 @@
+"""
+Crawler scale benchmark: TextSpider against a synthetic local site (benchmarks/synthetic_site.py) of configurable
+size and shape, with its real database write path.
+
+Every size runs `scrapy crawl text_spider` in a subprocess pointed at the local site through settings overrides
+(-s CRAWL_DOMAIN, CRAWL_START_URL, no download delay, unlimited content budget), writing to a fresh SQLite
+database (or --database-url, whose pages and links are dropped first). Reported per run:
+    time      wall time of the crawl process (Scrapy startup included)
+    pages/s   stored pages per second
+    rows/s    database rows written per second (pages and page_links)
+    tree RSS  peak of the resident sets of the crawl process and its extraction workers added up, sampled every
+              RSS_SAMPLE_SECONDS from /proc (Linux only, n/a elsewhere)
+    max RSS   largest resident set of a single process of the crawl (ru_maxrss of the waited processes)
+
+Usage:
+    python -m benchmarks.bench_crawl [--pages 1000 10000] [--concurrency 16] [--extract-workers 2]
+        [--fanout 10] [--page-words 300] [--duplicate-ratio 0.1] [--boilerplate-ratio 0.3]
+        [--slow-ratio 0.01] [--slow-ms 500] [--sitemap] [--database-url postgresql://...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, func, select
+
+from app.db.database import Base
+from app.db.models.page import Page
+from app.db.models.page_link import PageLink
+from benchmarks.synthetic_site import add_site_arguments, serve, site_from_arguments
+
+RSS_SAMPLE_SECONDS = 0.1
+
+
+def tree_rss(pid: int) -> int:
+    """
+    Resident set size in bytes of a process and all its descendants, read from /proc
+    """
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name may contain spaces, the fields after it are fixed
+                parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    total, pending = 0, [pid]
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/statm") as statm:
+                total += int(statm.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+def sample_tree_rss(pid: int, done: threading.Event, peak: list):
+    while not done.wait(RSS_SAMPLE_SECONDS):
+        peak[0] = max(peak[0], tree_rss(pid))
+
+
+def run_crawl(site_url: str, database_url: str, directory: str, args) -> dict:
+    command = [
+        sys.executable, "-m", "scrapy", "crawl", "text_spider",
+        "-s", "CRAWL_DOMAIN=localhost",
+        "-s", f"CRAWL_START_URL={site_url}",
+        "-s", f"CRAWL_JOB_DIR={os.path.join(directory, 'job')}",
+        "-s", f"CRAWL_ARCHIVE_DIR={os.path.join(directory, 'archive')}",
+        "-s", "CRAWL_RESUME=False",
+        "-s", f"CRAWL_MAX_CONTENT_SIZE={10 ** 12}",
+        "-s", "DOWNLOAD_DELAY=0",
+        "-s", f"CONCURRENT_REQUESTS={args.concurrency}",
+        "-s", f"CONCURRENT_REQUESTS_PER_DOMAIN={args.concurrency}",
+        "-s", "LOG_LEVEL=WARNING",
+    ]
+    if args.extract_workers is not None:
+        command += ["-s", f"CRAWL_EXTRACT_WORKERS={args.extract_workers}"]
+
+    log_path = os.path.join(directory, "crawl.log")
+    with open(log_path, "w") as log:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, env={**os.environ, "DATABASE_URL": database_url},
+                                   stdout=subprocess.DEVNULL, stderr=log)
+        done, peak_tree_rss = threading.Event(), [0]
+        sampler = None
+        if os.path.isdir("/proc"):
+            sampler = threading.Thread(target=sample_tree_rss, args=(process.pid, done, peak_tree_rss), daemon=True)
+            sampler.start()
+        # wait4 returns the resource usage of this crawl only (and of the workers it waited for)
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - started
+        done.set()
+        if sampler is not None:
+            sampler.join()
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        with open(log_path) as log:
+            raise RuntimeError(f"crawl failed ({process.returncode}): {log.read()[-2000:]}")
+
+    # ru_maxrss is the largest single process (not a sum), in kilobytes on Linux, in bytes on macOS
+    max_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "seconds": elapsed,
+        "tree_rss_mb": peak_tree_rss[0] / 1024 / 1024 if sampler is not None else None,
+        "max_rss_mb": max_rss / 1024 / 1024,
+    }
+
+
+def count_rows(database_url: str):
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        pages = connection.execute(select(func.count(Page.id))).scalar()
+        links = connection.execute(select(func.count(PageLink.id))).scalar()
+    engine.dispose()
+    return pages, links
+
+
+def prepare_database(database_url: str):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(PageLink.__table__.delete())
+        connection.execute(Page.__table__.delete())
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1000])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--extract-workers", type=int, default=None)
+    parser.add_argument("--database-url", default=None)
+    add_site_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"fanout {args.fanout}, ~{args.page_words} words/page, duplicates {args.duplicate_ratio:.0%}, "
+          f"boilerplate {args.boilerplate_ratio:.0%}, slow {args.slow_ratio:.0%} x {args.slow_ms} ms, "
+          f"concurrency {args.concurrency}, {os.cpu_count()} CPUs")
+    print(f"{'pages':>8} {'served':>8} {'stored':>8} {'links':>9} {'time (s)':>9} {'pages/s':>8} "
+          f"{'rows/s':>8} {'tree RSS (MB)':>14} {'max RSS (MB)':>13}")
+    for count in args.pages:
+        site = site_from_arguments(args, count)
+        server = serve(site)
+        with tempfile.TemporaryDirectory() as directory:
+            database_url = args.database_url or f"sqlite:///{os.path.join(directory, 'crawl.db')}"
+            prepare_database(database_url)
+            try:
+                result = run_crawl(server.url, database_url, directory, args)
+            finally:
+                server.shutdown()
+                server.server_close()
+            pages, links = count_rows(database_url)
+
+        seconds = result["seconds"]
+        tree_rss_mb = f"{result['tree_rss_mb']:.0f}" if result["tree_rss_mb"] is not None else "n/a"
+        print(f"{count:>8} {site.served:>8} {pages:>8} {links:>9} {seconds:>9.1f} {pages / seconds:>8.1f} "
+              f"{(pages + links) / seconds:>8.0f} {tree_rss_mb:>14} {result['max_rss_mb']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
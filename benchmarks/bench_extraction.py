@@ -0,0 +1,71 @@
+"""
+Throughput of the crawl extraction stage (crawler/extraction.py): pages per second extracted inline on one
+thread (the reactor thread before the process pool) versus PageExtractor pools of increasing size.
+
+Synthetic pages mimic large content pages: nested markup, scripts and styles, headings and many links.
+All pages are submitted at once, the extractor itself bounds how many are in flight (like the spider does).
+
+Usage:
+    python -m benchmarks.bench_extraction [--pages 400] [--paragraphs 300] [--links 200] [--workers 0 1 2 4]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from crawler.extraction import PageExtractor
+
+SENTENCE = "Tehisintellekt helps companies adopt machine learning, from data audits to production systems. "
+
+
+def build_page(index: int, paragraphs: int, links: int) -> bytes:
+    body = [f"<h1>Page {index}</h1>", "<script>var tracking = {'id': 1};</script>", "<style>.a {color: red}</style>"]
+    for paragraph in range(paragraphs):
+        if paragraph % 20 == 0:
+            body.append(f"<h2>Section {paragraph}</h2>")
+        body.append(f"<div class='row'><p><span>{SENTENCE * 3}</span> <b>{paragraph}</b></p></div>")
+    body.extend(f'<a href="/section/{index}/{link}.html">Link {link}</a>' for link in range(links))
+    return f'<html lang="en"><body>{"".join(body)}</body></html>'.encode()
+
+
+async def extract_all(extractor: PageExtractor, pages):
+    await asyncio.gather(*[extractor.extract(body, f"https://example.com/{index}/") for index, body in pages])
+
+
+async def measure(workers: int, pages) -> float:
+    extractor = PageExtractor(workers)
+    try:
+        if workers:
+            # Start the worker processes before timing
+            await extract_all(extractor, pages[:workers * 2])
+        started = time.perf_counter()
+        await extract_all(extractor, pages)
+        return time.perf_counter() - started
+    finally:
+        extractor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--paragraphs", type=int, default=300)
+    parser.add_argument("--links", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({0, 1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    pages = [(index, build_page(index, args.paragraphs, args.links)) for index in range(args.pages)]
+    size_kb = sum(len(body) for _, body in pages) / len(pages) / 1024
+    print(f"{args.pages} pages, {size_kb:.0f} KB each, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'time (s)':>10} {'pages/s':>10} {'speedup':>8}")
+
+    baseline = None
+    for workers in args.workers:
+        seconds = asyncio.run(measure(workers, pages))
+        rate = args.pages / seconds
+        baseline = baseline or rate
+        label = "inline" if workers == 0 else str(workers)
+        print(f"{label:>8} {seconds:>10.2f} {rate:>10.1f} {rate / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Cold-start benchmark: measures how long `import app.main` takes in a fresh interpreter and which
+top-level packages dominate it (parsed from `python -X importtime`).
+
+Usage:
+    python -m benchmarks.bench_import_time [--runs 5] [--module app.main]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ENV_DEFAULTS = {
+    "DATABASE_URL": "sqlite://",
+    "OPENAI_API_KEY": "sk-benchmark",
+}
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    for key, value in ENV_DEFAULTS.items():
+        env.setdefault(key, value)
+    return env
+
+
+def measure_wall_time(module: str, runs: int) -> list[float]:
+    """
+    Wall time in seconds of `python -c "import <module>"`, interpreter start-up included
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], env=_env(), check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def measure_package_breakdown(module: str) -> dict[str, int]:
+    """
+    Cumulative import time in microseconds per top-level package (a package's dependencies are included in
+    its figure, so numbers overlap and do not add up to the total)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=_env(), capture_output=True, text=True, check=True,
+    )
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if cumulative.isdigit() and "." not in name:
+            packages[name] = max(packages.get(name, 0), int(cumulative))
+    return packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    timings = measure_wall_time(args.module, args.runs)
+    print(f"import {args.module}: median {statistics.median(timings) * 1000:.0f} ms, "
+          f"min {min(timings) * 1000:.0f} ms over {args.runs} runs")
+
+    packages = measure_package_breakdown(args.module)
+    print(f"\nTop {args.top} top-level packages by cumulative import time:")
+    for name, micros in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {name:<30} {micros / 1000:>8.1f} ms")
+
+    if "openai" in packages:
+        print("\nWARNING: openai is imported eagerly by", args.module)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Time and peak Python memory of the PageCrud read APIs: whole-table ORM load (get_all_pages) versus the
+streaming iterators (iter_pages, deferred-content projection, Core tuple queries).
+
+Each size gets a temporary SQLite database with synthetic pages. Time is measured without tracing, peak
+memory in a second run under tracemalloc. "consume" strategies drop every row after reading it (e.g. size
+checks, export), "corpus" strategies keep url -> content like a snapshot rebuild does.
+
+Usage:
+    python -m benchmarks.bench_page_crud [--sizes 1000 10000 100000] [--content-chars 1500]
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.cruds.page_crud import PageCrud
+from app.db.database import Base
+from app.db.models.page import Page
+
+
+def build_database(path: str, count: int, content_chars: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    filler = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (content_chars // 57 + 1))[:content_chars]
+    with engine.begin() as connection:
+        for start in range(0, count, 5000):
+            connection.execute(insert(Page), [
+                {"url": f"https://example.com/page-{i:07d}", "content": f"{i} {filler}", "summary": None}
+                for i in range(start, min(start + 5000, count))
+            ])
+    return sessionmaker(bind=engine)
+
+
+def consume(iterator) -> int:
+    count = 0
+    for _ in iterator:
+        count += 1
+    return count
+
+
+STRATEGIES = {
+    "consume  get_all_pages (ORM, all rows)": lambda crud: consume(crud.get_all_pages()),
+    "consume  iter_pages (ORM, yield_per)": lambda crud: consume(crud.iter_pages()),
+    "consume  iter_pages content deferred": lambda crud: consume(page.url for page in crud.iter_pages(with_content=False)),
+    "consume  iter_page_sizes (Core)": lambda crud: consume(crud.iter_page_sizes()),
+    "consume  iter_page_rows (Core)": lambda crud: consume(crud.iter_page_rows()),
+    "corpus   get_all_pages (ORM)": lambda crud: len({page.url: page.content for page in crud.get_all_pages()}),
+    "corpus   iter_page_rows (Core)": lambda crud: len({url: content for url, content, _, _ in crud.iter_page_rows()}),
+}
+
+
+def measure(session_factory, strategy):
+    results = {}
+    for traced in (False, True):
+        session = session_factory()
+        gc.collect()
+        if traced:
+            tracemalloc.start()
+        started = time.perf_counter()
+        strategy(PageCrud(session))
+        elapsed = time.perf_counter() - started
+        if traced:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results["peak_mb"] = peak / 1024 / 1024
+        else:
+            results["seconds"] = elapsed
+        session.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--content-chars", type=int, default=1500)
+    args = parser.parse_args()
+
+    for count in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            session_factory = build_database(os.path.join(directory, "pages.db"), count, args.content_chars)
+            print(f"\n{count} pages x {args.content_chars} chars")
+            print(f"{'strategy':42} {'time (s)':>10} {'peak (MB)':>10}")
+            for name, strategy in STRATEGIES.items():
+                result = measure(session_factory, strategy)
+                print(f"{name:42} {result['seconds']:>10.3f} {result['peak_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Synthetic website for crawler benchmarks, served from a local HTTP server. Pages are generated on request from
+a seeded random generator, so sites of 100k pages need no files and every run serves the same site.
+
+- /, /page/<n>.html: page n (/ is page 0), with `fanout` links to other pages
+- /robots.txt: allows everything (and lists the sitemap if enabled)
+- /sitemap.xml: all pages (only with sitemap=True, 404 otherwise)
+
+Usage (serve a site to crawl manually):
+    python -m benchmarks.synthetic_site [--pages 10000] [--port 8800] ...
+"""
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "tehisintellekt masinõpe andmed teenused koolitus konsultatsioon lahendus ettevõte projekt mudel "
+    "machine learning data services training consulting solution company project model pipeline "
+    "analytics automation forecasting vision language cloud security platform integration support"
+).split()
+
+
+class SyntheticSite:
+    """
+    Deterministic generated site
+
+    Attributes:
+        pages (int): Number of pages
+        fanout (int): Links per page to random other pages, plus a link to the next page (every page is reachable)
+        page_words (int): Average number of words of page text
+        size_jitter (float): Page sizes vary uniformly within page_words * (1 +- size_jitter)
+        duplicate_ratio (float): Share of pages whose text is an exact copy of another page (mirrors, print views)
+        boilerplate_ratio (float): Share of every page's words that is the same navigation/footer text on all pages
+        slow_ratio (float): Share of pages answered after slow_ms milliseconds
+        slow_ms (int): Delay of slow pages
+        sitemap (bool): Serve /sitemap.xml with all pages
+        seed (int): Seed of the generator
+    """
+
+    def __init__(self, pages: int = 1000, fanout: int = 10, page_words: int = 300, size_jitter: float = 0.5,
+                 duplicate_ratio: float = 0.1, boilerplate_ratio: float = 0.3, slow_ratio: float = 0.0,
+                 slow_ms: int = 500, sitemap: bool = False, seed: int = 1):
+        self.pages = pages
+        self.fanout = fanout
+        self.page_words = page_words
+        self.size_jitter = size_jitter
+        self.duplicate_ratio = duplicate_ratio
+        self.boilerplate_ratio = boilerplate_ratio
+        self.slow_ratio = slow_ratio
+        self.slow_ms = slow_ms
+        self.sitemap = sitemap
+        self.seed = seed
+        boilerplate_words = int(page_words * boilerplate_ratio)
+        self.boilerplate = " ".join(random.Random(seed).choice(WORDS) for _ in range(boilerplate_words))
+        self.served = 0
+        self._served_lock = threading.Lock()
+
+    def path(self, number: int) -> str:
+        return "/" if number == 0 else f"/page/{number}.html"
+
+    def _random(self, number: int, salt: str) -> random.Random:
+        return random.Random(f"{self.seed}:{salt}:{number}")
+
+    def is_slow(self, number: int) -> bool:
+        return self._random(number, "slow").random() < self.slow_ratio
+
+    def text_source(self, number: int) -> int:
+        """
+        Page whose text page `number` shows: itself, or an earlier page for duplicates
+        """
+        if number > 0 and self._random(number, "duplicate").random() < self.duplicate_ratio:
+            return self._random(number, "original").randrange(number)
+        return number
+
+    def render(self, number: int) -> bytes:
+        source = self.text_source(number)
+        rng = self._random(source, "text")
+        words = int(self.page_words * (1 - self.boilerplate_ratio)
+                    * (1 + rng.uniform(-self.size_jitter, self.size_jitter)))
+        paragraphs = []
+        for start in range(0, words, 60):
+            sentence = " ".join(rng.choice(WORDS) for _ in range(min(60, words - start)))
+            paragraphs.append(f"<p>{sentence.capitalize()}.</p>")
+
+        # Duplicates copy the links too, so their extracted text is identical. The link to the next page has
+        # no text (an icon link), it keeps every page reachable without making duplicates differ
+        link_rng = self._random(source, "links")
+        targets = set()
+        while len(targets) < min(self.fanout, self.pages - 1):
+            targets.add(link_rng.randrange(self.pages))
+        links = "".join(f'<a href="{self.path(target)}">Page {target}</a>' for target in sorted(targets))
+        links += f'<a href="{self.path((number + 1) % self.pages)}"></a>'
+
+        return (
+            f'<html lang="en"><head><title>Page {source}</title><style>p {{margin: 0}}</style></head><body>'
+            f'<nav>{self.boilerplate[:len(self.boilerplate) // 2]}</nav>'
+            f'<h1>Page {source}</h1>{"".join(paragraphs)}<div class="links">{links}</div>'
+            f'<footer>{self.boilerplate[len(self.boilerplate) // 2:]}</footer>'
+            f'<script>var page = {number};</script></body></html>'
+        ).encode()
+
+    def sitemap_xml(self, base_url: str) -> bytes:
+        urls = "".join(f"<url><loc>{base_url.rstrip('/')}{self.path(n)}</loc></url>" for n in range(self.pages))
+        return ('<?xml version="1.0" encoding="UTF-8"?>'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>').encode()
+
+    def page_number(self, path: str):
+        if path == "/":
+            return 0
+        if path.startswith("/page/") and path.endswith(".html"):
+            try:
+                number = int(path[len("/page/"):-len(".html")])
+            except ValueError:
+                return None
+            return number if 0 < number < self.pages else None
+        return None
+
+    def count_served(self):
+        with self._served_lock:
+            self.served += 1
+
+
+def serve(site: SyntheticSite, port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start serving `site` on localhost in a background thread. The server's `url` attribute is the site root
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = self.path.split("?")[0].split("#")[0]
+            number = site.page_number(path)
+            if number is not None:
+                if site.is_slow(number):
+                    time.sleep(site.slow_ms / 1000)
+                site.count_served()
+                self._send(200, "text/html; charset=utf-8", site.render(number))
+            elif path == "/robots.txt":
+                sitemap = f"Sitemap: {server.url}sitemap.xml\n" if site.sitemap else ""
+                self._send(200, "text/plain", f"User-agent: *\nAllow: /\n{sitemap}".encode())
+            elif path == "/sitemap.xml" and site.sitemap:
+                self._send(200, "application/xml", site.sitemap_xml(server.url))
+            else:
+                self._send(404, "text/plain", b"Not found")
+
+        def _send(self, status: int, content_type: str, body: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("localhost", port), Handler)
+    server.daemon_threads = True
+    server.url = f"http://localhost:{server.server_address[1]}/"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_site_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--page-words", type=int, default=300)
+    parser.add_argument("--size-jitter", type=float, default=0.5)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--boilerplate-ratio", type=float, default=0.3)
+    parser.add_argument("--slow-ratio", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=int, default=500)
+    parser.add_argument("--sitemap", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def site_from_arguments(args, pages: int) -> SyntheticSite:
+    return SyntheticSite(
+        pages=pages, fanout=args.fanout, page_words=args.page_words, size_jitter=args.size_jitter,
+        duplicate_ratio=args.duplicate_ratio, boilerplate_ratio=args.boilerplate_ratio,
+        slow_ratio=args.slow_ratio, slow_ms=args.slow_ms, sitemap=args.sitemap, seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8800)
+    add_site_arguments(parser)
+    args = parser.parse_args()
+
+    server = serve(site_from_arguments(args, args.pages), args.port)
+    print(f"Serving {args.pages} pages at {server.url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+import pickle
+import shutil
+from typing import Optional
+
+# Same file Scrapy's SpiderState extension loads into `spider.state` when the job is resumed
+STATE_FILE = "spider.state"
+
+
+def load_checkpoint(job_dir: str) -> Optional[dict]:
+    """
+    Read the spider checkpoint of a crawl job
+
+    Returns:
+        Optional[dict]: Checkpointed spider state, None if the job has no (readable) checkpoint
+    """
+    try:
+        with open(os.path.join(job_dir, STATE_FILE), "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[checkpoint] @load_checkpoint: Unreadable checkpoint, ignoring it: {e}")
+        return None
+
+
+def save_checkpoint(job_dir: str, state: dict):
+    """
+    Write the spider checkpoint atomically, a crash while writing leaves the previous checkpoint intact
+    """
+    os.makedirs(job_dir, exist_ok=True)
+    path = os.path.join(job_dir, STATE_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f, protocol=4)
+    os.replace(tmp_path, path)
+
+
+def reset_job_dir(job_dir: str):
+    """
+    Drop the frontier, seen requests and checkpoint of a previous job so the next crawl starts over
+    """
+    shutil.rmtree(job_dir, ignore_errors=True)
+    os.makedirs(job_dir, exist_ok=True)
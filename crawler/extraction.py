@@ -0,0 +1,91 @@
+import asyncio
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from textwrap import dedent
+from typing import List, Optional
+from urllib.parse import urljoin
+
+from parsel import Selector
+from w3lib.encoding import html_to_unicode
+from w3lib.html import get_base_url
+
+from app.services.language_service import LanguageService
+from app.services.summary_service import SummaryService
+
+TEXT_XPATH = '//body//*[not(self::script or self::style or self::noscript)]/text()'
+HEADINGS_XPATH = '//h1//text() | //h2//text() | //h3//text()'
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def extract_content(texts: List[str]) -> str:
+    """
+    Concatenate lists of string (default returned by Scrapy) into a single string removing indents and extra spaces
+    """
+    united_string = ' '.join(texts)
+    united_string = WHITESPACE_PATTERN.sub(' ', united_string).strip()
+    return dedent(united_string)
+
+
+def extract_page(body: bytes, url: str, content_type: Optional[str] = None,
+                 max_summary_chars: Optional[int] = None) -> dict:
+    """
+    Everything TextSpider.parse needs from a raw HTML response: visible text, summary, language and absolute
+    link URLs. A pure function of the response, so it can run in a worker process
+
+    Args:
+        body (bytes): Raw response body
+        url (str): Response URL, base for relative links (unless the page has a <base href>)
+        content_type (Optional[str]): Content-Type header, for the charset
+        max_summary_chars (Optional[int]): Skip the summary of pages with more content (they cannot fit into
+            the remaining content budget, which only shrinks)
+
+    Returns:
+        dict: {"content": str, "summary": Optional[str], "language": Optional[str], "links": List[str]}
+    """
+    _, text = html_to_unicode(content_type, body)
+    selector = Selector(text=text, base_url=url)
+
+    # Filter out JavaScript, CSS and html tags to get text
+    content = extract_content(selector.xpath(TEXT_XPATH).getall())
+
+    summary = None
+    if max_summary_chars is None or len(content) <= max_summary_chars:
+        summary = SummaryService().summarize(content, selector.xpath(HEADINGS_XPATH).getall())
+    language = LanguageService().detect_page(content, selector.xpath('/html/@lang').get())
+
+    base_url = get_base_url(text, url)
+    links = list(dict.fromkeys(urljoin(base_url, href.strip()) for href in selector.css('a::attr(href)').getall()))
+    return {"content": content, "summary": summary, "language": language, "links": links}
+
+
+class PageExtractor:
+    """
+    Runs extract_page off the Scrapy reactor thread, in a pool of `workers` processes (inline when 0).
+    At most 2 * workers pages are extracted or queued at a time: the callbacks of further responses wait
+    for a slot while holding their response, so Scrapy's scraper slot fills up and the engine stops
+    downloading until extraction catches up
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        if workers > 0:
+            # spawn: the crawl process runs threads (reactor, DB pool), forking it is not safe
+            self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            self._slots = asyncio.Semaphore(workers * 2)
+
+    async def extract(self, body: bytes, url: str, content_type: Optional[str] = None,
+                      max_summary_chars: Optional[int] = None) -> dict:
+        if self._executor is None:
+            return extract_page(body, url, content_type, max_summary_chars)
+        async with self._slots:
+            return await asyncio.wrap_future(
+                self._executor.submit(extract_page, body, url, content_type, max_summary_chars)
+            )
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
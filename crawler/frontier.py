@@ -0,0 +1,119 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+# Listing, archive and utility pages: many of them, little unique content
+LOW_VALUE_URL_PATTERN = re.compile(
+    r"/(tag|tags|category|categories|author|page|feed|search|login|cart|wp-json|wp-admin)(/|$)"
+    r"|[?&](page|sort|order|replytocom|utm_[a-z]+)="
+    r"|\.(pdf|zip|jpg|jpeg|png|gif|svg)$",
+    re.IGNORECASE,
+)
+# Pages answering the typical visitor questions (English and Estonian slugs)
+HIGH_VALUE_URL_PATTERN = re.compile(
+    r"/(about|contact|services|products|pricing|team|faq|"
+    r"meist|kontakt|teenused|tooted|hinnakiri|hinnad|meeskond|kkk)([/.?#]|$)",
+    re.IGNORECASE,
+)
+
+# Sitemaps and robots.txt are fetched before any page, so their priorities are known when pages are scheduled
+SITEMAP_PRIORITY = 1000
+BASE_PRIORITY = 100
+DEPTH_PENALTY = 10
+INLINK_BONUS = 5
+MAX_COUNTED_INLINKS = 10
+HIGH_VALUE_BONUS = 30
+LOW_VALUE_PENALTY = 50
+SITEMAP_PRIORITY_WEIGHT = 40
+RECENT_LASTMOD_BONUS = 10
+RECENT_LASTMOD_DAYS = 365
+
+
+def request_priority(url: str, depth: int = 0, inlinks: int = 0,
+                     sitemap_priority: Optional[float] = None, lastmod: Optional[datetime] = None) -> int:
+    """
+    Scrapy request priority of a page, higher is fetched first. Shallow pages, pages linked from many
+    pages, key pages by URL and pages the sitemap marks as important or recently changed come first
+
+    Args:
+        url (str): Page URL
+        depth (int): Link distance from the start page
+        inlinks (int): Number of links to the page seen so far
+        sitemap_priority (Optional[float]): <priority> of the sitemap entry, 0.0-1.0 (0.5 is the default)
+        lastmod (Optional[datetime]): <lastmod> of the sitemap entry
+
+    Returns:
+        int
+    """
+    priority = BASE_PRIORITY - DEPTH_PENALTY * depth + INLINK_BONUS * min(inlinks, MAX_COUNTED_INLINKS)
+    if HIGH_VALUE_URL_PATTERN.search(url):
+        priority += HIGH_VALUE_BONUS
+    if LOW_VALUE_URL_PATTERN.search(url):
+        priority -= LOW_VALUE_PENALTY
+    if sitemap_priority is not None:
+        priority += round(SITEMAP_PRIORITY_WEIGHT * (sitemap_priority - 0.5))
+    if lastmod is not None and lastmod > datetime.utcnow() - timedelta(days=RECENT_LASTMOD_DAYS):
+        priority += RECENT_LASTMOD_BONUS
+    return priority
+
+
+def parse_sitemap_priority(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a sitemap <priority>, None if missing or malformed
+    """
+    try:
+        return min(max(float(value), 0.0), 1.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_sitemap_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a sitemap <lastmod> (W3C datetime, e.g. "2024-05-01" or "2024-05-01T10:00:00+03:00") as naive UTC,
+    None if missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class ContentBudget:
+    """
+    Tracks the MAX_CONTENT_SIZE budget of a crawl and projects when it runs out
+
+    Attributes:
+        limit: Total content characters allowed, the stored total stays below it
+        total_chars: Characters stored so far
+        pages_stored: Pages stored so far
+    """
+
+    def __init__(self, limit: int, total_chars: int = 0, pages_stored: int = 0):
+        self.limit = limit
+        self.total_chars = total_chars
+        self.pages_stored = pages_stored
+
+    @property
+    def remaining(self) -> int:
+        return self.limit - self.total_chars
+
+    def fits(self, content_len: int) -> bool:
+        return self.total_chars + content_len < self.limit
+
+    def add(self, content_len: int):
+        self.total_chars += content_len
+        self.pages_stored += 1
+
+    def projected_exhausted(self) -> bool:
+        """
+        True once the remaining budget is smaller than an average stored page, so further pages are
+        expected not to fit and nothing more should be scheduled
+        """
+        if self.pages_stored == 0:
+            return self.remaining <= 0
+        return self.remaining <= self.total_chars / self.pages_stored
@@ -0,0 +1,60 @@
+import os
+
+from scrapy.extensions.httpcache import DummyPolicy
+
+CRAWL_MODES = ("live", "record", "replay")
+
+
+class RecordPolicy(DummyPolicy):
+    """
+    HTTP cache policy of the record mode: every request goes to the network and every response overwrites
+    the archived one, so re-recording refreshes the archive instead of replaying it
+    """
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        return False
+
+    def is_cached_response_valid(self, cachedresponse, response, request):
+        return False
+
+
+def crawl_mode_settings(mode: str, archive_dir: str) -> dict:
+    """
+    Scrapy settings of a crawl mode
+
+    Args:
+        mode (str): "live" - fetch from the site (default behaviour)
+                    "record" - fetch from the site and store every response in `archive_dir`
+                    "replay" - serve every response from `archive_dir`, never touch the network; requests
+                               missing from the archive are dropped. Politeness delays are off
+        archive_dir (str): Scrapy HTTP cache directory holding the archive
+
+    Returns:
+        dict: Settings to apply with "spider" priority (`-s` command line options still win)
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    if mode not in CRAWL_MODES:
+        raise ValueError(f"Unknown crawl mode '{mode}', expected one of {', '.join(CRAWL_MODES)}")
+    if mode == "live":
+        return {}
+
+    archive = {
+        "HTTPCACHE_ENABLED": True,
+        "HTTPCACHE_DIR": os.path.abspath(archive_dir),
+        "HTTPCACHE_EXPIRATION_SECS": 0,
+        "HTTPCACHE_STORAGE": "scrapy.extensions.httpcache.FilesystemCacheStorage",
+        "HTTPCACHE_GZIP": True,
+    }
+    if mode == "record":
+        return {**archive, "HTTPCACHE_POLICY": "crawler.httpcache.RecordPolicy"}
+    return {
+        **archive,
+        "HTTPCACHE_POLICY": "scrapy.extensions.httpcache.DummyPolicy",
+        "HTTPCACHE_IGNORE_MISSING": True,
+        "DOWNLOAD_DELAY": 0,
+        "AUTOTHROTTLE_ENABLED": False,
+        "CONCURRENT_REQUESTS": 64,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 64,
+    }
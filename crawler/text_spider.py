@@ -1,11 +1,26 @@
-import re
+from collections import Counter
+
 import scrapy
+from scrapy.exceptions import CloseSpider
+from scrapy.http import TextResponse
+from scrapy.utils.gz import gunzip
+from scrapy.utils.sitemap import Sitemap, sitemap_urls_from_robots
 
-from textwrap import dedent
+from urllib.parse import urldefrag, urljoin
 
 from app.db.database import get_db
 from app.cruds.page_crud import PageCrud
+from app.cruds.page_link_crud import PageLinkCrud
 from app.config import settings
+from crawler.checkpoint import load_checkpoint, reset_job_dir, save_checkpoint
+from crawler.extraction import PageExtractor
+from crawler.frontier import (
+    SITEMAP_PRIORITY, ContentBudget, parse_sitemap_lastmod, parse_sitemap_priority, request_priority,
+)
+from crawler.httpcache import crawl_mode_settings
+
+# Close reasons of a complete crawl, a crawl closed for any other reason can be resumed
+FINISHED_REASONS = ("finished", "content_budget")
 
 
 class TextSpider(scrapy.Spider):
@@ -15,6 +30,30 @@ class TextSpider(scrapy.Spider):
 
     Attributes:
         name: name that scrapy will use to find the spider
+
+    Scrapy settings (`-s NAME=value`):
+        CRAWL_MODE: "live" (default, settings.CRAWL_MODE), "record" or "replay", see crawler/httpcache.py
+        CRAWL_ARCHIVE_DIR: HTTP cache directory used by record/replay
+        CRAWL_DOMAIN: Domain to crawl instead of settings.DOMAIN
+        CRAWL_START_URL: Start URL instead of https://<domain>/
+        CRAWL_JOB_DIR: Scrapy JOBDIR holding the frontier, seen requests and checkpoint (settings.CRAWL_JOB_DIR)
+        CRAWL_RESUME: Continue an interrupted crawl from CRAWL_JOB_DIR (settings.CRAWL_RESUME)
+        CRAWL_MAX_CONTENT_SIZE: Content budget instead of settings.MAX_CONTENT_SIZE
+        CRAWL_EXTRACT_WORKERS: Extraction processes instead of settings.CRAWL_EXTRACT_WORKERS (0: inline)
+
+    Pages are fetched in priority order (see crawler/frontier.py): sitemap.xml (also the sitemaps listed in
+    robots.txt) is read first, then pages are ranked by sitemap priority/lastmod, depth, inlinks and URL.
+    Pages that do not fit the remaining content budget are skipped, and once the budget is projected to run
+    out (less than an average page left) the spider stops scheduling and closes
+
+    Text, summary, language and link extraction runs in a process pool (see crawler/extraction.py), the reactor
+    thread only downloads, writes pages and schedules links
+
+    The internal links of every stored page are recorded in page_links, the link graph PageRankService ranks
+    pages by after the crawl
+
+    A crawl is resumed only if the job directory holds a checkpoint of a crawl that did not finish.
+    Otherwise the job directory and all stored pages are dropped and the crawl starts over
     """
 
     name = "text_spider"
@@ -26,38 +65,157 @@ class TextSpider(scrapy.Spider):
         "DOWNLOAD_DELAY": 0.5,
     }
 
+    @classmethod
+    def update_settings(cls, scrapy_settings):
+        super().update_settings(scrapy_settings)
+        mode = scrapy_settings.get("CRAWL_MODE", settings.CRAWL_MODE)
+        archive_dir = scrapy_settings.get("CRAWL_ARCHIVE_DIR", settings.CRAWL_ARCHIVE_DIR)
+        scrapy_settings.setdict(crawl_mode_settings(mode, archive_dir), priority="spider")
+        scrapy_settings.set("JOBDIR", scrapy_settings.get("CRAWL_JOB_DIR", settings.CRAWL_JOB_DIR), priority="spider")
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        domain = crawler.settings.get("CRAWL_DOMAIN", settings.DOMAIN)
+        spider.allowed_domains = [domain]
+        spider.start_urls = [crawler.settings.get("CRAWL_START_URL", f"https://{domain}/")]
+        spider.job_dir = crawler.settings.get("JOBDIR")
+        spider.budget = ContentBudget(crawler.settings.getint("CRAWL_MAX_CONTENT_SIZE", settings.MAX_CONTENT_SIZE))
+        spider.extractor = PageExtractor(
+            crawler.settings.getint("CRAWL_EXTRACT_WORKERS", settings.CRAWL_EXTRACT_WORKERS)
+        )
+        spider._start_or_resume(crawler.settings.getbool("CRAWL_RESUME", settings.CRAWL_RESUME))
+        return spider
+
     def __init__(self):
         super().__init__()
 
-        self.total_chars = 0
+        self.budget = ContentBudget(settings.MAX_CONTENT_SIZE)
+        self.stored_urls = set()
+        self.inlinks = Counter()
+        self.state = {}
+        self.job_dir = None
+        self.extractor = PageExtractor(0)
         self.db = next(get_db())
         self.page_crud = PageCrud(self.db)
-        self.page_crud.delete_all_pages()
+        self.link_crud = PageLinkCrud(self.db)
 
-    def parse(self, response):
+    def _start_or_resume(self, resume: bool):
         """
-        Scrapy spider's default function to crawl and parse web page content
+        Resume the interrupted crawl of the job directory or start over. On resume the content size is restored
+        from the checkpoint (or from the database if pages were stored after the last checkpoint) and already
+        stored pages are not fetched again
         """
+        checkpoint = load_checkpoint(self.job_dir) if resume else None
+        if checkpoint is None or checkpoint.get("finished"):
+            reset_job_dir(self.job_dir)
+            self.page_crud.delete_all_pages()
+            self.link_crud.delete_all_links()
+            return
+
+        self.stored_urls = self.page_crud.get_urls()
+        self.budget.pages_stored = len(self.stored_urls)
+        self.budget.total_chars = max(checkpoint.get("total_chars", 0), self.page_crud.get_total_content_length())
+        print(f"[TextSpider] Resuming crawl: {self.budget.pages_stored} pages, "
+              f"{self.budget.total_chars} characters stored")
+
+    async def start(self):
+        for url in self.start_urls:
+            yield scrapy.Request(urljoin(url, "/robots.txt"), callback=self.parse_robots,
+                                 priority=SITEMAP_PRIORITY)
+            yield scrapy.Request(urljoin(url, "/sitemap.xml"), callback=self.parse_sitemap,
+                                 priority=SITEMAP_PRIORITY)
+            if url not in self.stored_urls:
+                yield scrapy.Request(url, dont_filter=True, priority=request_priority(url))
+
+    def parse_robots(self, response):
+        """
+        Follow the sitemaps listed in robots.txt
+        """
+        for url in sitemap_urls_from_robots(response.body, base_url=response.url):
+            yield scrapy.Request(url, callback=self.parse_sitemap, priority=SITEMAP_PRIORITY)
 
-        # Filter out JavaScript, CSS and html tags to get text
-        texts = response.xpath(
-            '//body//*[not(self::script or self::style or self::noscript)]/text()'
-        ).getall()
-
-        content = self._extract_content(texts)
-
+    def parse_sitemap(self, response):
+        """
+        Schedule the pages of a sitemap (or the sitemaps of a sitemap index) with their sitemap priority
+        """
+        body = gunzip(response.body) if response.body[:2] == b"\x1f\x8b" else response.body
         try:
-            self._process_content_limit(len(content))
-            self.page_crud.add_page(response.url, content)
+            sitemap = Sitemap(body)
         except Exception as e:
-            print(f'[TextSpider] @parse. Unexpected error: {e}')
-
-        links = response.css('a::attr(href)').getall()
-        absolute_links = [response.urljoin(link) for link in links]
+            print(f'[TextSpider] @parse_sitemap. Invalid sitemap {response.url}: {e}')
+            return
+
+        for entry in sitemap:
+            url = entry.get("loc")
+            if not url:
+                continue
+            if sitemap.type == "sitemapindex":
+                yield scrapy.Request(url, callback=self.parse_sitemap, priority=SITEMAP_PRIORITY)
+            elif self._is_internal_link(url) and url not in self.stored_urls:
+                priority = request_priority(
+                    url,
+                    depth=1,
+                    sitemap_priority=parse_sitemap_priority(entry.get("priority")),
+                    lastmod=parse_sitemap_lastmod(entry.get("lastmod")),
+                )
+                yield scrapy.Request(url, callback=self.parse, priority=priority)
+
+    def closed(self, reason):
+        """
+        Final checkpoint. Only a crawl that ran out of requests is finished, every other stop reason
+        (shutdown, timeout, close spider limits) leaves it resumable
+        """
+        self._checkpoint(finished=reason in FINISHED_REASONS)
+        self.extractor.close()
+        self.db.close()
+
+    def _checkpoint(self, finished: bool = False):
+        self.state.update(
+            total_chars=self.budget.total_chars, pages_stored=self.budget.pages_stored, finished=finished
+        )
+        try:
+            save_checkpoint(self.job_dir, self.state)
+        except Exception as e:
+            print(f'[TextSpider] @_checkpoint. Unexpected error: {e}')
 
-        for link in absolute_links:
-            if self._is_internal_link(link):
-                yield response.follow(link, callback=self.parse)
+    async def parse(self, response):
+        """
+        Scrapy spider's default function to crawl and parse web page content
+        """
+        if not isinstance(response, TextResponse):
+            return
+
+        page = await self.extractor.extract(
+            response.body, response.url, response.headers.get("Content-Type", b"").decode("latin-1") or None,
+            max_summary_chars=self.budget.remaining,
+        )
+        content = page["content"]
+        internal_links = [urldefrag(link)[0] for link in page["links"] if self._is_internal_link(link)]
+
+        if self.budget.fits(len(content)):
+            try:
+                self.page_crud.add_page(response.url, content, summary=page["summary"], language=page["language"])
+                self.link_crud.replace_links(response.url, internal_links)
+                self.stored_urls.add(response.url)
+                self.budget.add(len(content))
+                if self.budget.pages_stored % settings.CRAWL_CHECKPOINT_PAGES == 0:
+                    self._checkpoint()
+            except Exception as e:
+                print(f'[TextSpider] @parse. Unexpected error: {e}')
+        else:
+            print(f'[TextSpider] @parse. Skipping {response.url}: {len(content)} characters do not fit '
+                  f'the remaining budget of {self.budget.remaining}')
+
+        if self.budget.projected_exhausted():
+            raise CloseSpider("content_budget")
+
+        depth = response.meta.get("depth", 0) + 1
+        for link in page["links"]:
+            if self._is_internal_link(link) and link not in self.stored_urls:
+                self.inlinks[link] += 1
+                priority = request_priority(link, depth=depth, inlinks=self.inlinks[link])
+                yield response.follow(link, callback=self.parse, priority=priority)
 
     def _is_internal_link(self, url: str) -> bool:
         """
@@ -65,18 +223,4 @@ class TextSpider(scrapy.Spider):
         """
         return any(domain in url for domain in self.allowed_domains)
 
-    def _extract_content(self, texts: list[str]) -> str:
-        """
-        Concatenate lists of string (default returned by Scrapy) into a single string removing indents and extra spaces
-        """
-        united_string = ' '.join(texts)
-        united_string = re.sub(r'\s+', ' ', united_string).strip()
-        return dedent(united_string)
 
-    def _process_content_limit(self, content_len=0) -> bool:
-        """
-        Checks if saved content length is less than MAC_CONTENT_SIZE. Throws Exception if limit exceeded
-        """
-        self.total_chars += content_len
-        if self.total_chars >= settings.MAX_CONTENT_SIZE:
-            raise Exception('Limit exceeded')
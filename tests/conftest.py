@@ -1,10 +1,25 @@
+import os
+import sqlite3
+import subprocess
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from app.config import settings
 from app.main import app
 from app.db.database import Base, get_db
 
+
+@pytest.fixture(autouse=True)
+def isolated_data_files(tmp_path, monkeypatch):
+    """Corpus and source info files of a test go to its own temporary directory"""
+    monkeypatch.setattr(settings, "CORPUS_FILE_DIR", str(tmp_path / "corpus"))
+    monkeypatch.setattr(settings, "SOURCE_INFO_DIR", str(tmp_path / "source_info"))
+
+
 @pytest.fixture(scope='function')
 def setup_test_database():
     engine = create_engine('sqlite://')
@@ -16,4 +31,72 @@ def setup_test_database():
 
 @pytest.fixture(scope="session")
 def client():
-    return TestClient(app)
\ No newline at end of file
+    return TestClient(app)
+
+
+LOCAL_SITE_PAGES = {
+    "index.html": '<html><body><h1>Home</h1><p>Welcome. We offer consulting.</p>'
+                  '<a href="/about.html">About</a><a href="/contact.html">Contact</a>'
+                  '<script>var hidden = 1;</script></body></html>',
+    "about.html": '<html><body><h2>About</h2><p>We are a small team.</p><a href="/">Home</a></body></html>',
+    "contact.html": '<html><body><h2>Contact</h2><p>Email info@example.ee</p></body></html>',
+    "robots.txt": "User-agent: *\nAllow: /\n",
+}
+
+
+@pytest.fixture
+def site_pages():
+    """Files of `local_site` by path, override the fixture to serve another site"""
+    return LOCAL_SITE_PAGES
+
+
+@pytest.fixture
+def local_site(tmp_path, site_pages):
+    """Small static site on a free localhost port. `requested` lists every path the crawler fetched"""
+    site_dir = tmp_path / "site"
+    for name, body in site_pages.items():
+        (site_dir / name).parent.mkdir(parents=True, exist_ok=True)
+        (site_dir / name).write_text(body)
+
+    requested = []
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=str(site_dir), **kwargs)
+
+        def log_message(self, *args):
+            requested.append(self.path)
+
+    server = ThreadingHTTPServer(("localhost", 0), Handler)
+    server.url = f"http://localhost:{server.server_address[1]}/"
+    server.requested = requested
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def run_crawl(tmp_path, local_site):
+    """Run text_spider against `local_site` in a subprocess with its own sqlite database, archive and job dir.
+    Returns the stored pages as {url: content}"""
+    database_url = f"sqlite:///{tmp_path / 'crawl.db'}"
+    Base.metadata.create_all(create_engine(database_url))
+
+    def run(*scrapy_settings):
+        command = ["scrapy", "crawl", "text_spider",
+                   "-s", f"CRAWL_ARCHIVE_DIR={tmp_path / 'archive'}",
+                   "-s", f"CRAWL_JOB_DIR={tmp_path / 'job'}",
+                   "-s", "CRAWL_DOMAIN=localhost",
+                   "-s", f"CRAWL_START_URL={local_site.url}",
+                   "-s", "DOWNLOAD_DELAY=0",
+                   "-s", "LOG_LEVEL=WARNING"]
+        for scrapy_setting in scrapy_settings:
+            command += ["-s", scrapy_setting]
+        result = subprocess.run(command, env={**os.environ, "DATABASE_URL": database_url},
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        with sqlite3.connect(tmp_path / "crawl.db") as connection:
+            return dict(connection.execute("SELECT url, content FROM pages").fetchall())
+
+    return run
@@ -0,0 +1,94 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIServer:
+    """
+    Local stand-in for the OpenAI Responses API. Each request consumes the next scripted behaviour:
+        ("ok", delay_seconds)       - answer after the delay
+        ("error", status_code)      - respond with an HTTP error
+    When the script is exhausted every request is answered immediately
+    """
+
+    def __init__(self, script=None, answer=None):
+        self.script = list(script or [])
+        self.answer = answer or {"question": "Q?", "answer": "A", "sources": ["https://example.com"]}
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1/"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _next_behaviour(self):
+        with self._lock:
+            return self.script.pop(0) if self.script else ("ok", 0)
+
+    def _response_body(self) -> bytes:
+        return json.dumps({
+            "id": "resp_fake",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": "gpt-4o-mini",
+            "status": "completed",
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "output": [{
+                "type": "message",
+                "id": "msg_fake",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": json.dumps(self.answer), "annotations": []}],
+            }],
+            "usage": {
+                "input_tokens": 100,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": 10,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": 110,
+            },
+        }).encode()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                with server._lock:
+                    server.requests.append(json.loads(self.rfile.read(length) or b"{}"))
+                kind, value = server._next_behaviour()
+                if kind == "error":
+                    body = json.dumps({"error": {"message": f"fake error {value}", "type": "server_error"}}).encode()
+                    self.send_response(value)
+                else:
+                    time.sleep(value)
+                    body = server._response_body()
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
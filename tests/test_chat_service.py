@@ -0,0 +1,251 @@
+import time
+
+import pytest
+from unittest.mock import MagicMock, Mock, patch
+from fastapi import HTTPException
+
+from app.config import settings
+from app.dtos.ask_response import AskResponse, Usage
+from app.services.chat_service import ChatService, ChatSession, ChatSessionStore
+from app.services.corpus_service import CorpusSnapshot
+from app.services.metrics_service import MetricsService
+from app.services.openai_service import OpenAIService
+from app.services.question_log_service import QuestionLogService
+
+
+def make_response(question: str, answer: str = "Answer") -> AskResponse:
+    return AskResponse(question=question, answer=answer, sources=["https://example.com/pricing"],
+                       usage=Usage(input_tokens=100, output_tokens=10))
+
+
+@pytest.fixture
+def corpus():
+    return CorpusSnapshot("v1", {
+        "https://example.com/pricing": "Consulting pricing starts at 990 euros per project " * 3,
+        "https://example.com/training": "Machine learning training courses for teams " * 3,
+        "https://example.com/contact": "Contact us by email at info@example.com " * 3,
+    })
+
+
+class TestChatSession:
+
+    def test_whole_corpus_within_budget_is_shared(self, corpus):
+        session = ChatSession("s1")
+
+        context = session.extend_context(corpus, "What does consulting cost?", max_chars=100000)
+
+        assert context is corpus.context
+        assert session.context_shared
+        assert session.update_memory() < len(corpus.context)
+
+    def test_context_is_extended_with_new_pages(self, corpus):
+        session = ChatSession("s1")
+        first = session.extend_context(corpus, "How much does consulting cost?", max_chars=400)
+        session.turns.append(("How much does consulting cost?", "990 euros"))
+
+        second = session.extend_context(corpus, "Do you have training courses?", max_chars=400)
+
+        assert session.urls == ["https://example.com/pricing", "https://example.com/training"]
+        assert second.startswith(first)
+
+    def test_follow_up_uses_previous_question_for_retrieval(self, corpus):
+        session = ChatSession("s1")
+        session.turns.append(("Tell me about training courses", "We have courses"))
+
+        session.extend_context(corpus, "How long are they?", max_chars=200)
+
+        assert session.urls == ["https://example.com/training"]
+
+    def test_context_starts_over_when_budget_is_exceeded(self, corpus):
+        session = ChatSession("s1")
+        session.extend_context(corpus, "pricing", max_chars=200)
+
+        context = session.extend_context(corpus, "contact email", max_chars=200)
+
+        assert session.urls == ["https://example.com/contact"]
+        assert context.startswith("[https://example.com/contact]")
+
+    def test_context_starts_over_on_corpus_change(self, corpus):
+        session = ChatSession("s1")
+        session.extend_context(corpus, "pricing", max_chars=300)
+
+        session.extend_context(CorpusSnapshot("v2", {"https://example.com/new": "pricing " * 50}), "pricing", 300)
+
+        assert session.corpus_version == "v2"
+        assert session.urls == ["https://example.com/new"]
+
+
+class TestChatSessionStore:
+
+    @pytest.fixture(autouse=True)
+    def reset_store(self):
+        ChatSessionStore.reset()
+        MetricsService.reset()
+        yield
+        ChatSessionStore.reset()
+
+    def test_open_resumes_existing_session(self):
+        session = ChatSessionStore.open()
+
+        assert ChatSessionStore.open(session.id) is session
+        assert ChatSessionStore.open("unknown") is not session
+
+    def test_least_recently_used_session_is_evicted(self):
+        with patch.object(settings, "CHAT_MAX_SESSIONS", 2):
+            first = ChatSessionStore.open()
+            second = ChatSessionStore.open()
+            ChatSessionStore.open(first.id)
+            ChatSessionStore.open()
+
+        assert ChatSessionStore.get(first.id) is first
+        assert ChatSessionStore.get(second.id) is None
+        assert MetricsService.snapshot()["chat.sessions_evicted.lru"] == 1
+        assert MetricsService.snapshot()["chat.sessions"] == 2
+
+    def test_idle_sessions_are_evicted(self):
+        idle = ChatSessionStore.open()
+        idle.last_active = time.monotonic() - settings.CHAT_SESSION_IDLE_SECONDS - 1
+
+        ChatSessionStore.open()
+
+        assert ChatSessionStore.get(idle.id) is None
+        assert MetricsService.snapshot()["chat.sessions_evicted.idle"] == 1
+
+    def test_sessions_are_evicted_over_memory_budget(self):
+        first = ChatSessionStore.open()
+        first.turns.append(("Question?", "x" * 5000))
+        ChatSessionStore.touch(first)
+        second = ChatSessionStore.open()
+        second.turns.append(("Question?", "y" * 5000))
+
+        with patch.object(settings, "CHAT_MAX_MEMORY_BYTES", 8000):
+            ChatSessionStore.touch(second)
+
+        assert ChatSessionStore.get(first.id) is None
+        assert MetricsService.snapshot()["chat.sessions_evicted.memory"] == 1
+        assert MetricsService.snapshot()["chat.memory_bytes"] == second.memory_bytes
+
+
+class TestChatService:
+
+    @pytest.fixture
+    def chat_service(self, corpus):
+        ChatSessionStore.reset()
+        service = ChatService()
+        service.get_snapshot = Mock(return_value=corpus)
+        service.openai_service = Mock(spec=OpenAIService)
+
+        def stream_answer(question, context, history=(), cache_key=None, model=None, on_delta=None):
+            for part in ("Consulting ", "costs 990 euros"):
+                on_delta(part)
+            return make_response(question, "Consulting costs 990 euros")
+
+        service.openai_service.stream_answer.side_effect = stream_answer
+        with patch.object(QuestionLogService, "log"):
+            yield service
+
+    def test_answer_is_streamed_and_turn_stored(self, chat_service):
+        session = ChatSessionStore.open()
+        deltas = []
+
+        response = chat_service.ask(session, "How much does consulting cost?", deltas.append)
+
+        assert deltas == ["Consulting ", "costs 990 euros"]
+        assert response.answer == "Consulting costs 990 euros"
+        assert list(session.turns) == [("How much does consulting cost?", "Consulting costs 990 euros")]
+
+    def test_follow_up_sends_previous_turns(self, chat_service):
+        session = ChatSessionStore.open()
+        chat_service.ask(session, "How much does consulting cost?", lambda text: None)
+
+        chat_service.ask(session, "And is there a discount?", lambda text: None)
+
+        _, kwargs = chat_service.openai_service.stream_answer.call_args
+        assert kwargs["history"] == [("How much does consulting cost?", "Consulting costs 990 euros")]
+
+    def test_off_topic_opening_question_is_gated(self, chat_service):
+        session = ChatSessionStore.open()
+
+        response = chat_service.ask(session, "What is the weather in Paris?", lambda text: None)
+
+        chat_service.openai_service.stream_answer.assert_not_called()
+        assert response.usage.input_tokens == 0
+        assert not session.turns
+
+    def test_invalid_question(self, chat_service):
+        with pytest.raises(HTTPException) as exc_info:
+            chat_service.ask(ChatSessionStore.open(), "Hi", lambda text: None)
+
+        assert exc_info.value.status_code == 400
+
+
+class TestChatEndpoint:
+
+    @pytest.fixture
+    def mock_chat_service(self):
+        ChatSessionStore.reset()
+        with patch('app.api.routes.chat.ChatService') as mock_service_class:
+            mock_service = MagicMock()
+            mock_service_class.return_value = mock_service
+
+            def ask(session, question, on_delta):
+                if len(question) < 5:
+                    raise HTTPException(status_code=400, detail="Question is too short")
+                on_delta("Hello ")
+                on_delta("there")
+                session.turns.append((question, "Hello there"))
+                return make_response(question, "Hello there")
+
+            mock_service.ask.side_effect = ask
+            yield mock_service
+
+    def test_streams_deltas_then_answer(self, client, mock_chat_service):
+        with client.websocket_connect("/chat") as websocket:
+            session = websocket.receive_json()
+            websocket.send_json({"question": "How much does it cost?"})
+            messages = [websocket.receive_json() for _ in range(3)]
+
+        assert session["type"] == "session"
+        assert messages[0] == {"type": "delta", "text": "Hello "}
+        assert messages[1] == {"type": "delta", "text": "there"}
+        assert messages[2]["type"] == "answer"
+        assert messages[2]["answer"] == "Hello there"
+        assert messages[2]["usage"]["input_tokens"] == 100
+
+    def test_errors_keep_connection_open(self, client, mock_chat_service):
+        with client.websocket_connect("/chat") as websocket:
+            websocket.receive_json()
+            websocket.send_json({"question": "Hi"})
+            error = websocket.receive_json()
+            websocket.send_text("not json")
+            invalid = websocket.receive_json()
+
+        assert error == {"type": "error", "status": 400, "detail": "Question is too short"}
+        assert invalid["status"] == 400
+
+    def test_messages_without_text_question_are_rejected(self, client, mock_chat_service):
+        with client.websocket_connect("/chat") as websocket:
+            websocket.receive_json()
+            errors = []
+            for message in ({"question": 12345}, {"text": "How much does it cost?"}, ["How much does it cost?"]):
+                websocket.send_json(message)
+                errors.append(websocket.receive_json())
+            websocket.send_json({"question": "How much does it cost?"})
+            messages = [websocket.receive_json() for _ in range(3)]
+
+        assert [error["status"] for error in errors] == [400, 400, 400]
+        assert {error["type"] for error in errors} == {"error"}
+        assert messages[2]["type"] == "answer"
+        mock_chat_service.ask.assert_called_once()
+
+    def test_session_resumed_after_reconnect(self, client, mock_chat_service):
+        with client.websocket_connect("/chat") as websocket:
+            session_id = websocket.receive_json()["session_id"]
+            websocket.send_json({"question": "How much does it cost?"})
+            for _ in range(3):
+                websocket.receive_json()
+
+        with client.websocket_connect(f"/chat?session_id={session_id}") as websocket:
+            assert websocket.receive_json()["session_id"] == session_id
+
+        assert len(ChatSessionStore.get(session_id).turns) == 1
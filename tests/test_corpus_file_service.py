@@ -0,0 +1,130 @@
+import os
+
+import pytest
+from unittest.mock import Mock
+
+from app.cruds.page_crud import PageCrud
+from app.services.corpus_file_service import CorpusFileService, MappedPages
+from app.services.corpus_service import CorpusService, CorpusSnapshot, serialize_pages
+
+
+class TestCorpusFileService:
+
+    @pytest.fixture
+    def snapshot(self):
+        return CorpusSnapshot(
+            "v1",
+            {
+                "https://example.com/et/teenused": "Pakume masinõppe konsultatsiooni",
+                "https://example.com/en/services": "We offer machine learning consulting",
+            },
+            summaries={"https://example.com/en/services": "Machine learning consulting"},
+            languages={"https://example.com/et/teenused": "et", "https://example.com/en/services": "en"},
+        )
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        return CorpusFileService(str(tmp_path))
+
+    def test_export_and_load_round_trip(self, service, snapshot):
+        service.export(snapshot)
+        corpus = service.load("v1")
+
+        assert corpus.urls == list(snapshot.pages)
+        assert dict(MappedPages(corpus)) == snapshot.pages
+        assert corpus.summaries() == snapshot.summaries
+        assert corpus.languages() == snapshot.languages
+        assert corpus.context() == snapshot.context
+        assert corpus.token_counts() == {
+            "https://example.com/en/services": 5, "https://example.com/et/teenused": 3,
+        }
+
+    def test_mapped_pages_decode_on_access(self, service, snapshot):
+        service.export(snapshot)
+        pages = MappedPages(service.load("v1"))
+
+        assert len(pages) == 2
+        assert "https://example.com/en/services" in pages
+        assert "https://example.com/missing" not in pages
+        assert pages["https://example.com/et/teenused"] == "Pakume masinõppe konsultatsiooni"
+
+    def test_missing_or_invalid_file_is_not_loaded(self, service, snapshot, tmp_path):
+        assert service.load("v1") is None
+
+        (tmp_path / "v2.bin").write_bytes(b"not a corpus file at all, just some bytes")
+        assert service.load("v2") is None
+
+        service.export(snapshot)
+        os.replace(service.path("v1"), service.path("v3"))
+        assert service.load("v3") is None
+
+    def test_export_replaces_previous_version(self, service, snapshot):
+        service.export(snapshot)
+        service.export(CorpusSnapshot("v2", {"https://example.com/a": "A"}))
+
+        assert not service.exists("v1")
+        assert service.load("v2").urls == ["https://example.com/a"]
+
+
+class TestCorpusServiceWithCorpusFile:
+
+    @pytest.fixture
+    def mock_page_crud(self):
+        CorpusService.invalidate()
+        page_crud = Mock(spec=PageCrud)
+        page_crud.get_corpus_version.return_value = "v1"
+        page_crud.iter_page_rows.return_value = [
+            ("https://example.com/b", "Content B", "Summary B", "en"),
+            ("https://example.com/a", "Content A", None, None),
+        ]
+        page_crud.get_page_importance.return_value = {"https://example.com/a": 1.5}
+        return page_crud
+
+    def test_first_load_exports_corpus_file(self, mock_page_crud):
+        CorpusService(mock_page_crud).get_snapshot()
+
+        assert CorpusFileService().exists("v1")
+
+    def test_worker_maps_exported_file_without_loading_pages(self, mock_page_crud):
+        loaded = CorpusService(mock_page_crud).get_snapshot()
+        CorpusService.invalidate()
+        other_worker_crud = Mock(spec=PageCrud)
+        other_worker_crud.get_corpus_version.return_value = "v1"
+
+        mapped = CorpusService(other_worker_crud).get_snapshot()
+
+        other_worker_crud.iter_page_rows.assert_not_called()
+        assert isinstance(mapped.pages, MappedPages)
+        assert dict(mapped.pages) == loaded.pages
+        assert mapped.context == loaded.context
+        assert mapped.summaries == {"https://example.com/b": "Summary B"}
+        assert mapped.languages == {"https://example.com/b": "en"}
+        assert mapped.importance == {"https://example.com/a": 1.5}
+        assert mapped.select_context("Content A", max_chars=10000)[1] == loaded.context
+
+    def test_mapped_snapshot_keeps_no_corpus_copy(self, mock_page_crud):
+        mock_page_crud.iter_page_rows.return_value.append(("https://example.com/c", "Sisu C", None, "et"))
+        CorpusService(mock_page_crud).get_snapshot()
+        CorpusService.invalidate()
+        other_worker_crud = Mock(spec=PageCrud)
+        other_worker_crud.get_corpus_version.return_value = "v1"
+
+        mapped = CorpusService(other_worker_crud).get_snapshot()
+        view = mapped.language_view("en")
+
+        assert mapped._context is None
+        assert mapped.context_chars == len(mapped.context)
+        assert list(view.pages) == ["https://example.com/a", "https://example.com/b"]
+        assert isinstance(view.pages, MappedPages) and view.pages.corpus is mapped.pages.corpus
+        assert view._context is None
+        assert view.context == serialize_pages({url: mapped.pages[url] for url in view.pages})
+
+    def test_file_of_older_format_is_replaced(self, mock_page_crud):
+        service = CorpusFileService()
+        os.makedirs(service.directory, exist_ok=True)
+        with open(service.path("v1"), "wb") as f:
+            f.write(b"CMTCORP1" + bytes(64))
+
+        assert service.load("v1") is None
+        CorpusService(mock_page_crud).get_snapshot()
+        assert service.load("v1") is not None
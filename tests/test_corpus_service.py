@@ -0,0 +1,170 @@
+import pytest
+from unittest.mock import Mock
+
+from app.cruds.page_crud import PageCrud
+from app.services.corpus_service import CorpusService, CorpusSnapshot, serialize_pages
+
+
+class TestCorpusService:
+
+    @pytest.fixture
+    def mock_page_crud(self):
+        CorpusService.invalidate()
+        page_crud = Mock(spec=PageCrud)
+        page_crud.get_corpus_version.return_value = "v1"
+        page_crud.iter_page_rows.return_value = [
+            ("https://example.com/b", "Content B", None, None),
+            ("https://example.com/a", "Content A", None, None),
+        ]
+        page_crud.get_page_importance.return_value = {}
+        return page_crud
+
+    def test_snapshot_is_ordered_by_url(self, mock_page_crud):
+        snapshot = CorpusService(mock_page_crud).get_snapshot()
+
+        assert list(snapshot.pages) == ["https://example.com/a", "https://example.com/b"]
+        assert snapshot.context == "[https://example.com/a]\nContent A\n\n[https://example.com/b]\nContent B"
+
+    def test_snapshot_reused_for_same_version(self, mock_page_crud):
+        first = CorpusService(mock_page_crud).get_snapshot()
+        second = CorpusService(mock_page_crud).get_snapshot()
+
+        assert first is second
+        mock_page_crud.iter_page_rows.assert_called_once()
+
+    def test_snapshot_rebuilt_on_version_change(self, mock_page_crud):
+        first = CorpusService(mock_page_crud).get_snapshot()
+        mock_page_crud.get_corpus_version.return_value = "v2"
+        second = CorpusService(mock_page_crud).get_snapshot()
+
+        assert first is not second
+        assert second.version == "v2"
+        assert mock_page_crud.iter_page_rows.call_count == 2
+
+    def test_serialize_pages_is_deterministic(self):
+        pages = {"https://example.com/b": "B", "https://example.com/a": "A"}
+
+        assert serialize_pages(pages) == CorpusSnapshot("v", pages).context
+        assert serialize_pages(pages) == serialize_pages(dict(reversed(list(pages.items()))))
+
+    def test_select_context_keeps_full_corpus_within_budget(self):
+        snapshot = CorpusSnapshot("v", {"https://example.com/a": "pricing", "https://example.com/b": "contact"})
+
+        pages, context = snapshot.select_context("pricing?", max_chars=10000)
+
+        assert pages == snapshot.pages
+        assert context is snapshot.context
+
+    def test_select_context_trims_to_relevant_pages(self):
+        snapshot = CorpusSnapshot("v", {
+            "https://example.com/pricing": "Our pricing starts at 100 euros per month " * 5,
+            "https://example.com/contact": "Call us at our office phone number " * 5,
+            "https://example.com/about": "We are a team of engineers " * 5,
+        })
+
+        pages, context = snapshot.select_context("What is the pricing?", max_chars=300)
+
+        assert list(pages) == ["https://example.com/pricing"]
+        assert len(context) <= 300
+
+    def test_select_context_prefers_central_pages_when_trimming(self):
+        pages = {
+            "https://example.com/blog/pricing-news": "pricing " * 20,
+            "https://example.com/pricing": "pricing " * 20,
+            "https://example.com/about": "about us " * 20,
+        }
+        importance = {"https://example.com/pricing": 2.5, "https://example.com/blog/pricing-news": 0.2,
+                      "https://example.com/about": 0.3}
+        snapshot = CorpusSnapshot("v", pages, importance=importance)
+
+        assert list(snapshot.select_context("pricing", max_chars=250)[0]) == ["https://example.com/pricing"]
+        assert list(snapshot.select_context("weather", max_chars=250)[0]) == ["https://example.com/pricing"]
+        assert list(CorpusSnapshot("v", pages).select_context("pricing", max_chars=250)[0]) == [
+            "https://example.com/blog/pricing-news"
+        ]
+
+    def test_select_two_stage_uses_summaries(self):
+        snapshot = CorpusSnapshot(
+            "v",
+            {
+                "https://example.com/pricing": "Long page text " * 20,
+                "https://example.com/contact": "Long page text " * 20,
+            },
+            summaries={"https://example.com/pricing": "Facts: 990 EUR. Pricing of consulting"},
+        )
+
+        pages, context = snapshot.select_two_stage("What is the pricing?", max_chars=10000, max_pages=1)
+
+        assert list(pages) == ["https://example.com/pricing"]
+        assert pages["https://example.com/pricing"] == "Long page text " * 20
+
+    def test_select_two_stage_falls_back_without_summary_match(self):
+        snapshot = CorpusSnapshot("v", {"https://example.com/a": "pricing", "https://example.com/b": "contact"})
+
+        pages, context = snapshot.select_two_stage("pricing?", max_chars=10000, max_pages=1)
+
+        assert context is snapshot.context
+
+    def test_shards_partition_corpus_within_budget(self):
+        snapshot = CorpusSnapshot("v", {f"https://example.com/{i}": f"Page {i} " * 20 for i in range(10)})
+
+        shards = snapshot.shards(max_chars=300)
+        selected = snapshot.select_shards("page", max_chars=300, max_shards=len(shards))
+
+        assert len(shards) > 1
+        assert [url for urls in shards for url in urls] == list(snapshot.pages)
+        assert [number for number, _, _ in selected] == list(range(len(shards)))
+        assert all(len(context) <= 300 and context == serialize_pages(pages) for _, pages, context in selected)
+        assert snapshot.shards(max_chars=300) is shards
+
+    def test_select_shards_keeps_shards_of_matching_pages(self):
+        snapshot = CorpusSnapshot("v", {
+            "https://example.com/a": "We are a team of engineers " * 5,
+            "https://example.com/b": "Our pricing starts at 100 euros per month " * 5,
+            "https://example.com/c": "Call us at our office phone number " * 5,
+            "https://example.com/d": "Pricing of the training courses " * 5,
+        })
+
+        shards = snapshot.select_shards("What is the pricing?", max_chars=300, max_shards=3)
+
+        assert [list(pages) for _, pages, _ in shards] == [["https://example.com/b"], ["https://example.com/d"]]
+        assert [number for number, _, _ in shards] == [1, 3]
+        assert snapshot.select_shards("pricing?", max_chars=10000, max_shards=3)[0][2] is snapshot.context
+
+
+class TestLanguageView:
+
+    @pytest.fixture
+    def snapshot(self):
+        return CorpusSnapshot(
+            "v1",
+            {
+                "https://example.com/en/services": "We offer machine learning consulting",
+                "https://example.com/et/teenused": "Pakume masinõppe konsultatsiooni",
+                "https://example.com/en/courses": "Training courses for teams",
+                "https://example.com/files": "Unknown language page",
+            },
+            languages={
+                "https://example.com/en/services": "en",
+                "https://example.com/et/teenused": "et",
+                "https://example.com/en/courses": "en",
+            },
+        )
+
+    def test_view_keeps_same_language_and_unknown_pages(self, snapshot):
+        view = snapshot.language_view("et")
+
+        assert view.version == "v1-et"
+        assert list(view.pages) == ["https://example.com/et/teenused", "https://example.com/files"]
+        assert "/en/" not in view.context
+
+    def test_view_is_cached_per_language(self, snapshot):
+        assert snapshot.language_view("en") is snapshot.language_view("en")
+
+    def test_unknown_or_missing_language_uses_whole_corpus(self, snapshot):
+        assert snapshot.language_view(None) is snapshot
+        assert snapshot.language_view("de") is snapshot
+
+    def test_falls_back_when_language_has_no_matching_pages(self, snapshot):
+        assert snapshot.language_view("et", "training courses") is snapshot
+        assert snapshot.language_view("et", "masinõppe").version == "v1-et"
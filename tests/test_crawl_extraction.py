@@ -0,0 +1,78 @@
+import asyncio
+
+from crawler.extraction import PageExtractor, extract_content, extract_page
+
+PAGE = (
+    '<html lang="en"><head><style>p {color: red}</style></head><body>'
+    '<h1>Consulting services</h1><p>We offer   machine learning\n consulting. Contact info@example.com.</p>'
+    '<script>var hidden = 1;</script><noscript>Enable JavaScript</noscript>'
+    '<a href="/about.html">About</a><a href="contact.html">Contact</a><a href="/about.html">Again</a>'
+    '<a href="https://other.example.org/">Other</a>'
+    '</body></html>'
+).encode()
+
+
+class TestExtractPage:
+
+    def test_visible_text_without_scripts_and_styles(self):
+        page = extract_page(PAGE, "https://example.com/services/")
+
+        assert page["content"] == ("Consulting services We offer machine learning consulting. "
+                                   "Contact info@example.com. About Contact Again Other")
+        assert page["language"] == "en"
+        assert "info@example.com" in page["summary"]
+
+    def test_links_are_absolute_and_unique(self):
+        page = extract_page(PAGE, "https://example.com/services/")
+
+        assert page["links"] == [
+            "https://example.com/about.html",
+            "https://example.com/services/contact.html",
+            "https://other.example.org/",
+        ]
+
+    def test_base_href_and_charset(self):
+        body = ('<html><head><base href="https://example.com/en/"></head>'
+                '<body><p>Hinnad ja teenused</p><a href="prices">Hinnad</a></body></html>').encode("iso-8859-15")
+
+        page = extract_page(body, "https://example.com/", "text/html; charset=iso-8859-15")
+
+        assert page["links"] == ["https://example.com/en/prices"]
+        assert page["content"] == "Hinnad ja teenused Hinnad"
+
+    def test_summary_skipped_for_pages_over_budget(self):
+        page = extract_page(PAGE, "https://example.com/", max_summary_chars=10)
+
+        assert page["summary"] is None
+        assert page["content"]
+
+    def test_extract_content(self):
+        assert extract_content(["  Hello\n", "\tworld  "]) == "Hello world"
+
+
+class TestPageExtractor:
+
+    def test_pool_matches_inline_extraction(self):
+        async def extract_all(extractor):
+            try:
+                return await asyncio.gather(*[
+                    extractor.extract(PAGE, f"https://example.com/{i}/") for i in range(6)
+                ])
+            finally:
+                extractor.close()
+
+        inline = asyncio.run(extract_all(PageExtractor(0)))
+        pooled = asyncio.run(extract_all(PageExtractor(2)))
+
+        assert pooled == inline
+
+
+class TestPooledCrawl:
+
+    def test_crawl_with_extraction_pool(self, local_site, run_crawl):
+        pooled = run_crawl("CRAWL_EXTRACT_WORKERS=2")
+        inline = run_crawl("CRAWL_EXTRACT_WORKERS=0")
+
+        assert pooled == inline
+        assert pooled[local_site.url].startswith("Home Welcome. We offer consulting.")
+        assert "var hidden" not in pooled[local_site.url]
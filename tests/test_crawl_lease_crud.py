@@ -0,0 +1,56 @@
+import pytest
+from datetime import datetime, timedelta
+
+from app.cruds.crawl_lease_crud import CrawlLeaseCrud
+from app.db.models.crawl_lease import CrawlLease
+
+
+class TestCrawlLeaseCrud:
+    @pytest.fixture(autouse=True)
+    def setup(self, setup_test_database):
+        self.db = setup_test_database
+        self.lease_crud = CrawlLeaseCrud(self.db)
+
+        yield
+
+        self.db.close()
+
+    def test_first_owner_acquires(self):
+        """Test the first process takes the lease and others are rejected"""
+        assert self.lease_crud.try_acquire("crawl", "worker-a", 60) is True
+        assert self.lease_crud.try_acquire("crawl", "worker-b", 60) is False
+        assert self.lease_crud.get_lease("crawl").owner == "worker-a"
+
+    def test_owner_can_reacquire(self):
+        """Test acquiring a lease already held by the same owner succeeds"""
+        self.lease_crud.try_acquire("crawl", "worker-a", 60)
+
+        assert self.lease_crud.try_acquire("crawl", "worker-a", 60) is True
+
+    def test_expired_lease_is_taken_over(self):
+        """Test an expired lease can be acquired by another process"""
+        self.lease_crud.try_acquire("crawl", "worker-a", 60)
+        self.db.query(CrawlLease).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+        self.db.commit()
+
+        assert self.lease_crud.try_acquire("crawl", "worker-b", 60) is True
+        assert self.lease_crud.renew("crawl", "worker-a", 60) is False
+
+    def test_release_records_completion(self):
+        """Test releasing frees the lease and keeps the completion time"""
+        self.lease_crud.try_acquire("crawl", "worker-a", 60)
+
+        self.lease_crud.release("crawl", "worker-a", completed=True)
+
+        lease = self.lease_crud.get_lease("crawl")
+        assert lease.owner is None
+        assert lease.completed_at is not None
+        assert self.lease_crud.try_acquire("crawl", "worker-b", 60) is True
+
+    def test_release_by_non_owner_is_ignored(self):
+        """Test a process cannot release a lease it does not hold"""
+        self.lease_crud.try_acquire("crawl", "worker-a", 60)
+
+        self.lease_crud.release("crawl", "worker-b")
+
+        assert self.lease_crud.get_lease("crawl").owner == "worker-a"
@@ -0,0 +1,38 @@
+import pytest
+
+from crawler.httpcache import crawl_mode_settings
+
+class TestCrawlModeSettings:
+
+    def test_live_mode_changes_nothing(self):
+        assert crawl_mode_settings("live", "archive") == {}
+
+    def test_record_mode_always_refetches(self):
+        scrapy_settings = crawl_mode_settings("record", "archive")
+
+        assert scrapy_settings["HTTPCACHE_ENABLED"] is True
+        assert scrapy_settings["HTTPCACHE_POLICY"] == "crawler.httpcache.RecordPolicy"
+
+    def test_replay_mode_never_touches_network(self):
+        scrapy_settings = crawl_mode_settings("replay", "archive")
+
+        assert scrapy_settings["HTTPCACHE_IGNORE_MISSING"] is True
+        assert scrapy_settings["DOWNLOAD_DELAY"] == 0
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            crawl_mode_settings("offline", "archive")
+
+
+class TestCrawlReplay:
+    """End-to-end: record a local site, shut it down, replay the crawl from the archive"""
+
+    def test_replay_reproduces_recorded_crawl_offline(self, local_site, run_crawl):
+        recorded = run_crawl("CRAWL_MODE=record")
+
+        local_site.shutdown()
+        replayed = run_crawl("CRAWL_MODE=replay")
+
+        assert len(recorded) == 3
+        assert replayed == recorded
+        assert "hidden" not in recorded[local_site.url]
@@ -0,0 +1,64 @@
+from crawler.checkpoint import load_checkpoint, reset_job_dir, save_checkpoint
+
+
+class TestCheckpoint:
+
+    def test_round_trip(self, tmp_path):
+        save_checkpoint(str(tmp_path), {"total_chars": 42, "finished": False})
+
+        assert load_checkpoint(str(tmp_path)) == {"total_chars": 42, "finished": False}
+
+    def test_missing_or_corrupt_checkpoint(self, tmp_path):
+        assert load_checkpoint(str(tmp_path)) is None
+
+        (tmp_path / "spider.state").write_bytes(b"not a pickle")
+
+        assert load_checkpoint(str(tmp_path)) is None
+
+    def test_reset_job_dir(self, tmp_path):
+        save_checkpoint(str(tmp_path), {"total_chars": 42})
+
+        reset_job_dir(str(tmp_path))
+
+        assert tmp_path.exists()
+        assert load_checkpoint(str(tmp_path)) is None
+
+
+class TestCrawlResume:
+    """End-to-end against a local site: interrupt a crawl, then resume it"""
+
+    def test_resume_continues_without_refetching_stored_pages(self, local_site, run_crawl, tmp_path):
+        interrupted = run_crawl("CLOSESPIDER_PAGECOUNT=1")
+
+        assert list(interrupted) == [local_site.url]
+        assert load_checkpoint(str(tmp_path / "job"))["finished"] is False
+
+        local_site.requested.clear()
+        resumed = run_crawl("CRAWL_RESUME=true")
+
+        assert len(resumed) == 3
+        assert resumed[local_site.url] == interrupted[local_site.url]
+        assert "/" not in local_site.requested
+        assert load_checkpoint(str(tmp_path / "job")) == {
+            "total_chars": sum(len(content) for content in resumed.values()),
+            "pages_stored": 3,
+            "finished": True,
+        }
+
+    def test_finished_crawl_starts_over(self, local_site, run_crawl):
+        run_crawl()
+        local_site.requested.clear()
+
+        pages = run_crawl("CRAWL_RESUME=true")
+
+        assert len(pages) == 3
+        assert "/" in local_site.requested
+
+    def test_resume_disabled_starts_over(self, local_site, run_crawl):
+        run_crawl("CLOSESPIDER_PAGECOUNT=1")
+        local_site.requested.clear()
+
+        pages = run_crawl("CRAWL_RESUME=false")
+
+        assert len(pages) == 3
+        assert "/" in local_site.requested
@@ -0,0 +1,96 @@
+import subprocess
+
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+from app.cruds.crawl_lease_crud import CrawlLeaseCrud
+from app.services.crawler_service import CrawlerService, CRAWL_LEASE_NAME
+
+
+class TestCrawlerService:
+
+    @pytest.fixture
+    def mock_lease_crud(self):
+        lease_crud = Mock(spec=CrawlLeaseCrud)
+        lease_crud.get_lease.return_value = Mock(completed_at=None)
+        return lease_crud
+
+    def test_follower_does_not_crawl(self, mock_lease_crud):
+        mock_lease_crud.try_acquire.return_value = False
+        service = CrawlerService()
+
+        with patch('app.services.crawler_service.subprocess.Popen') as mock_popen:
+            assert service._acquire_lease(mock_lease_crud) is None
+            mock_popen.assert_not_called()
+
+    def test_follower_takes_over_expired_lease(self, mock_lease_crud):
+        # The leader died: its lease expires and the next attempt of the follower wins
+        mock_lease_crud.try_acquire.side_effect = [False, False, True]
+        service = CrawlerService()
+
+        with patch('app.services.crawler_service.settings.CRAWL_LEASE_TTL_SECONDS', 0):
+            assert service._wait_for_lease(mock_lease_crud) is True
+        assert mock_lease_crud.try_acquire.call_count == 3
+
+    def test_follower_stops_after_leader_finished(self, mock_lease_crud):
+        mock_lease_crud.try_acquire.side_effect = [False, True]
+        mock_lease_crud.get_lease.return_value = Mock(completed_at=datetime.utcnow())
+        service = CrawlerService()
+
+        with patch('app.services.crawler_service.settings.CRAWL_LEASE_TTL_SECONDS', 0):
+            assert service._wait_for_lease(mock_lease_crud) is False
+
+    def test_follower_stops_on_shutdown(self, mock_lease_crud):
+        mock_lease_crud.try_acquire.return_value = False
+        service = CrawlerService()
+        service._stop_event.set()
+
+        assert service._wait_for_lease(mock_lease_crud) is False
+
+    def test_recent_crawl_is_skipped(self, mock_lease_crud):
+        mock_lease_crud.try_acquire.return_value = True
+        mock_lease_crud.get_lease.return_value = Mock(completed_at=datetime.utcnow())
+        service = CrawlerService()
+
+        assert service._acquire_lease(mock_lease_crud) is False
+        mock_lease_crud.release.assert_called_once_with(CRAWL_LEASE_NAME, service.owner)
+
+    def test_leader_crawls(self, mock_lease_crud):
+        mock_lease_crud.try_acquire.return_value = True
+        service = CrawlerService()
+
+        assert service._acquire_lease(mock_lease_crud) is True
+
+    def test_lost_lease_stops_crawl(self, mock_lease_crud):
+        mock_lease_crud.renew.return_value = False
+        service = CrawlerService()
+
+        with patch('app.services.crawler_service.subprocess.Popen') as mock_popen, \
+                patch('app.services.crawler_service.settings.CRAWL_LEASE_TTL_SECONDS', 0):
+            process = mock_popen.return_value
+            process.stderr = []
+            process.wait.side_effect = [subprocess.TimeoutExpired("scrapy", 0), None]
+
+            assert service._run_spider(mock_lease_crud) is False
+            process.terminate.assert_called_once()
+
+    def test_lease_renewed_during_post_crawl_steps(self, mock_lease_crud):
+        service = CrawlerService()
+        renewed = []
+
+        def slow_post_crawl_steps():
+            while not renewed:
+                service._stop_event.wait(0.01)
+
+        mock_lease_crud.try_acquire.return_value = True
+        mock_lease_crud.renew.side_effect = lambda *args: renewed.append(args) or True
+        with patch('app.services.crawler_service.get_db', side_effect=lambda: iter([Mock()])), \
+                patch('app.services.crawler_service.CrawlLeaseCrud', return_value=mock_lease_crud), \
+                patch.object(service, "_run_spider", return_value=True), \
+                patch.object(service, "_on_crawl_finished", side_effect=slow_post_crawl_steps), \
+                patch('app.services.crawler_service.settings.CRAWL_LEASE_TTL_SECONDS', 0.03):
+            service._run_crawl()
+
+        assert renewed
+        mock_lease_crud.release.assert_called_once_with(CRAWL_LEASE_NAME, service.owner, completed=True)
@@ -0,0 +1,102 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.db import database
+from app.main import record_pool_checkout
+from app.services.metrics_service import MetricsService
+
+
+class TestInitDb:
+
+    def test_init_db_adds_missing_nullable_columns(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE pages (id INTEGER PRIMARY KEY, url VARCHAR NOT NULL, content VARCHAR NOT NULL, "
+                "created_at DATETIME)"
+            ))
+
+        with patch.object(database, 'engine', engine):
+            database.init_db()
+
+        columns = {column["name"] for column in inspect(engine).get_columns("pages")}
+        assert "summary" in columns
+        assert inspect(engine).has_table("question_logs")
+
+
+    def test_column_added_by_another_worker_is_skipped(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE pages (id INTEGER PRIMARY KEY, url VARCHAR NOT NULL, content VARCHAR NOT NULL, "
+                "created_at DATETIME, summary VARCHAR)"
+            ))
+        real_inspector = inspect(engine)
+        # Inspected before the other worker added the column, the ALTER then fails with a duplicate column
+        stale_inspector = MagicMock(wraps=real_inspector)
+        stale_inspector.get_columns.side_effect = lambda table_name: [
+            column for column in real_inspector.get_columns(table_name) if column["name"] != "summary"
+        ]
+
+        with patch.object(database, 'engine', engine), \
+                patch.object(database, 'inspect', side_effect=[stale_inspector, real_inspector]):
+            database.init_db()
+
+        columns = [column["name"] for column in inspect(engine).get_columns("pages")]
+        assert columns.count("summary") == 1
+        assert "language" in columns
+
+
+class TestRoleEngines:
+
+    @pytest.fixture(autouse=True)
+    def reset_metrics(self):
+        MetricsService.reset()
+        database.set_checkout_listener(record_pool_checkout)
+        yield
+        MetricsService.reset()
+
+    def test_checkout_wait_and_counts_are_recorded(self, tmp_path):
+        read_engine = database.create_role_engine(
+            "read", f"sqlite:///{tmp_path / 'app.db'}", {"pool_size": 2, "max_overflow": 0, "pool_timeout": 1}
+        )
+
+        with read_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            with patch.object(database, 'read_engine', read_engine):
+                gauges = database.pool_metrics()
+
+        metrics = MetricsService.snapshot()
+        assert metrics["db.read.checkouts"] == 1
+        assert metrics["db.read.checkout_wait_seconds"] >= 0
+        assert gauges["db.read.pool_size"] == 2
+        assert gauges["db.read.checked_out"] == 1
+        assert gauges["db.read.overflow"] == 0
+
+    def test_exhausted_pool_times_out_and_is_counted(self, tmp_path):
+        write_engine = database.create_role_engine(
+            "write", f"sqlite:///{tmp_path / 'app.db'}", {"pool_size": 1, "max_overflow": 0, "pool_timeout": 0.1}
+        )
+
+        with write_engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                write_engine.connect()
+
+        assert MetricsService.snapshot()["db.write.checkout_timeouts"] == 1
+
+    def test_read_and_write_pools_are_independent(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'app.db'}"
+        write_engine = database.create_role_engine("write", url, {"pool_size": 1, "max_overflow": 0, "pool_timeout": 0.1})
+        read_engine = database.create_role_engine("read", url, {"pool_size": 1, "max_overflow": 0, "pool_timeout": 0.1})
+
+        with write_engine.connect():
+            with read_engine.connect() as connection:
+                assert connection.execute(text("SELECT 1")).scalar() == 1
+
+    def test_in_memory_database_uses_default_pool(self):
+        memory_engine = database.create_role_engine("read", "sqlite://", {"pool_size": 1})
+
+        assert not isinstance(memory_engine.pool, database.TimedQueuePool)
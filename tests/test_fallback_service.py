@@ -0,0 +1,58 @@
+import pytest
+
+from app.config import settings
+from app.services.corpus_service import CorpusSnapshot
+from app.services.fallback_service import FallbackService
+
+
+class TestFallbackService:
+
+    @pytest.fixture
+    def snapshot(self):
+        return CorpusSnapshot(
+            "v1",
+            {
+                "https://example.com/en/pricing": "We are a small team. Our consulting pricing starts at 100 euros "
+                                                  "per hour. Training is priced per group.",
+                "https://example.com/et/hinnad": "Konsultatsiooni hind algab 100 eurost tunnis.",
+                "https://example.com/en/contact": "Call us at our office phone number.",
+            },
+            languages={
+                "https://example.com/en/pricing": "en",
+                "https://example.com/et/hinnad": "et",
+                "https://example.com/en/contact": "en",
+            },
+        )
+
+    def test_quotes_best_matching_passages(self, snapshot, monkeypatch):
+        monkeypatch.setattr(settings, "ASK_FALLBACK_PASSAGE_CHARS", 60)
+
+        response = FallbackService().answer("What is the consulting pricing?", snapshot, "en")
+
+        assert response.fallback
+        assert response.sources == ["https://example.com/en/pricing"]
+        assert response.answer.split("\n\n")[1] == "- Our consulting pricing starts at 100 euros per hour."
+        assert "Konsultatsiooni" not in response.answer
+        assert response.usage.input_tokens == 0 and response.usage.output_tokens == 0
+
+    def test_answer_in_question_language(self, snapshot):
+        response = FallbackService().answer("Mis on konsultatsiooni hind?", snapshot, "et")
+
+        assert response.answer.startswith("Assistent ei saa praegu vastata")
+        assert response.sources == ["https://example.com/et/hinnad"]
+
+    def test_no_matching_page(self, snapshot):
+        response = FallbackService().answer("Do you sell bicycles?", snapshot, "en")
+
+        assert response.fallback
+        assert response.sources == []
+        assert "try again later" in response.answer
+
+    def test_split_passages_respects_limit(self, monkeypatch):
+        monkeypatch.setattr(settings, "ASK_FALLBACK_PASSAGE_CHARS", 30)
+
+        passages = FallbackService.split_passages("First short one. Second short one. " + "Long " * 20 + "end.")
+
+        assert passages[0] == "First short one."
+        assert all(len(passage) <= 30 for passage in passages)
+        assert passages[-1].endswith("…")
@@ -0,0 +1,35 @@
+import pytest
+
+from app.services.language_service import LanguageService
+
+
+class TestLanguageService:
+
+    @pytest.fixture
+    def language_service(self):
+        return LanguageService()
+
+    @pytest.mark.parametrize("text, language", [
+        ("What services do you offer?", "en"),
+        ("How can I contact you?", "en"),
+        ("Milliseid teenuseid te pakute?", "et"),
+        ("Kuidas teiega ühendust võtta?", "et"),
+        ("Mis on hind?", "et"),
+    ])
+    def test_detect_questions(self, language_service, text, language):
+        assert language_service.detect(text) == language
+
+    @pytest.mark.parametrize("text", ["", "GPT-4o", "12345 ???"])
+    def test_detect_without_signal(self, language_service, text):
+        assert language_service.detect(text) is None
+
+    def test_normalize_html_lang(self):
+        assert LanguageService.normalize("et-EE") == "et"
+        assert LanguageService.normalize("EN_us") == "en"
+        assert LanguageService.normalize("de") is None
+        assert LanguageService.normalize(None) is None
+
+    def test_detect_page_prefers_html_lang(self, language_service):
+        assert language_service.detect_page("We offer consulting", "et") == "et"
+        assert language_service.detect_page("We offer consulting", "de-DE") == "en"
+        assert language_service.detect_page("Pakume teenuseid ja koolitusi") == "et"
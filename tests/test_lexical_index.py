@@ -0,0 +1,46 @@
+from app.services.lexical_index import LexicalIndex, tokenize
+
+
+class TestLexicalIndex:
+
+    def test_tokenize(self):
+        assert tokenize("Mis on AI hind? Price: 100 EUR, 5 a") == ["mis", "on", "ai", "hind", "price", "100", "eur"]
+
+    def test_search_ranks_matching_documents(self):
+        index = LexicalIndex({
+            "a": "pricing and plans pricing",
+            "b": "contact us",
+            "c": "plans overview",
+        })
+
+        results = index.search("pricing plans")
+
+        assert [doc_id for doc_id, _ in results] == ["a", "c"]
+
+    def test_search_without_matches(self):
+        index = LexicalIndex({"a": "pricing"})
+
+        assert index.search("weather") == []
+        assert LexicalIndex({}).search("pricing") == []
+
+    def test_contains_exact_and_prefix_terms(self):
+        index = LexicalIndex({"a": "masinõppe koolitus", "b": "pricing"})
+
+        assert index.contains("pricing")
+        assert not index.contains("koolitusi")
+        assert index.contains("koolitusi", prefix_chars=5)
+        assert not index.contains("kool", prefix_chars=5)
+        assert not index.contains("weather", prefix_chars=5)
+
+    def test_incremental_index_matches_full_rebuild(self):
+        previous = LexicalIndex({"a": "pricing and plans", "b": "contact us", "c": "old courses"})
+        documents = {"a": "pricing and plans", "b": "contact us by phone", "d": "new training courses"}
+
+        index = LexicalIndex(documents, previous)
+        rebuilt = LexicalIndex(documents)
+
+        assert index.reindexed == 2
+        assert index._term_freqs[0] is previous._term_freqs[0]
+        for query in ("pricing", "contact phone", "courses", "old"):
+            assert index.search(query) == rebuilt.search(query)
+        assert not index.contains("old")
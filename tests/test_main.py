@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+from app.services.readiness_service import ReadinessService
+
+
+class TestHealthEndpoints:
+
+    def test_health(self, client):
+        response = client.get("/health")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "healthy"}
+
+    def test_ready_while_warming_up(self, client):
+        with patch.object(ReadinessService, 'is_ready', return_value=False):
+            response = client.get("/ready")
+
+        assert response.status_code == 503
+        assert response.json() == {"status": "warming_up"}
+
+    def test_ready_when_warm(self, client):
+        with patch.object(ReadinessService, 'is_ready', return_value=True), \
+                patch.object(ReadinessService, 'corpus_version', return_value="abc"):
+            response = client.get("/ready")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready", "corpus_version": "abc"}
+
+    def test_metrics_include_pool_gauges(self, client):
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert "db.write.checked_out" in response.json()
+        assert "db.read.checked_out" in response.json()
+
+
+class TestReadinessService:
+
+    def test_warm_up_waits_for_corpus(self):
+        service = ReadinessService()
+        with patch.object(ReadinessService, '_ready') as mock_ready, \
+                patch.object(service, '_load_corpus', side_effect=[False, True]), \
+                patch('app.services.readiness_service.settings.READINESS_RETRY_SECONDS', 0):
+            service._warm_up()
+
+        mock_ready.set.assert_called_once()
+
+    def test_import_does_not_load_openai(self):
+        """Cold start: the openai SDK and the HTML parsers must only be imported on first use or during warm-up"""
+        result = subprocess.run(
+            [sys.executable, "-c",
+             "import sys, app.main; print([name for name in ('openai', 'parsel', 'lxml') if name in sys.modules])"],
+            capture_output=True, text=True, env=dict(os.environ),
+        )
+
+        assert result.stdout.strip() == "[]", result.stderr
@@ -1,9 +1,14 @@
+import openai
 import pytest
 from unittest.mock import patch, MagicMock
 
 from app.config import settings
-from app.services.openai_service import OpenAIService
+from app.services.openai_service import OpenAIService, openai_caller, partial_json_string
+from app.services.resilience_service import (
+    AttemptTimeoutError, CircuitBreaker, CircuitOpenError, LatencyTracker, ResilientCaller,
+)
 from app.dtos.ask_response import AskResponse, AskFormat
+from tests.fake_openai_server import FakeOpenAIServer
 
 
 class TestOpenAIService:
@@ -15,6 +20,7 @@ class TestOpenAIService:
 
     @pytest.fixture
     def service(self, mock_openai_key):
+        openai_caller.breaker.reset()
         return OpenAIService()
 
     @pytest.fixture
@@ -55,4 +61,144 @@ class TestOpenAIService:
         with pytest.raises(Exception) as exc_info:
             service.answer_question("Test question", sample_data)
 
-        assert "API Error" in str(exc_info.value)
\ No newline at end of file
+        assert "API Error" in str(exc_info.value)
+
+    @patch('openai.responses.parse')
+    def test_answer_question_prompt_layout(self, mock_parse, service, sample_data):
+        mock_response = MagicMock()
+        mock_response.output_parsed = AskFormat(question="Q?", answer="A", sources=[])
+        mock_response.usage.input_tokens = 100
+        mock_response.usage.output_tokens = 50
+        mock_response.usage.input_tokens_details.cached_tokens = 64
+        mock_parse.return_value = mock_response
+
+        reversed_data = dict(reversed(list(sample_data.items())))
+        result = service.answer_question("Q?", reversed_data, cache_key="abc")
+
+        kwargs = mock_parse.call_args.kwargs
+        messages = kwargs["input"]
+        assert messages[0]["role"] == "system"
+        assert messages[1]["content"].index("page1") < messages[1]["content"].index("page2")
+        assert messages[-1]["content"] == "Question: Q?"
+        assert kwargs["prompt_cache_key"] == "corpus-abc"
+        assert result.usage.cached_input_tokens == 64
+
+    @patch('openai.responses.parse')
+    def test_combine_answers_keeps_partial_sources(self, mock_parse, service):
+        mock_response = MagicMock()
+        mock_response.output_parsed = AskFormat(
+            question="Q?", answer="Combined", sources=["https://example.com/page2", "https://invented.com/"]
+        )
+        mock_response.usage.input_tokens = 40
+        mock_response.usage.output_tokens = 20
+        mock_parse.return_value = mock_response
+        partials = [
+            AskResponse(question="Q?", answer=f"Part {i}", sources=[f"https://example.com/page{i}"],
+                        usage={"input_tokens": 100, "output_tokens": 10})
+            for i in (1, 2)
+        ]
+
+        result = service.combine_answers("Q?", partials)
+
+        information = mock_parse.call_args.kwargs["input"][1]["content"]
+        assert "Part 1" in information and "https://example.com/page2" in information
+        assert result.sources == ["https://example.com/page2"]
+        assert result.usage.input_tokens == 40
+
+    @patch('openai.responses.stream')
+    def test_stream_answer_passes_answer_deltas(self, mock_stream, service):
+        final = MagicMock()
+        final.output_parsed = AskFormat(question="Q?", answer='Say "hi"', sources=["https://example.com/page1"])
+        final.usage.input_tokens = 100
+        final.usage.output_tokens = 20
+        final.usage.input_tokens_details.cached_tokens = 0
+        chunks = ['{"question": "Q?", "ans', 'wer": "Say \\', '"hi\\"', '", "sources": ["https://example.com/page1"]}']
+        stream = mock_stream.return_value.__enter__.return_value
+        stream.__iter__.return_value = [MagicMock(type="response.output_text.delta", delta=chunk) for chunk in chunks]
+        stream.get_final_response.return_value = final
+        deltas = []
+
+        result = service.stream_answer("Q?", "[https://example.com/page1]\nHi", history=[("Before?", "Yes")],
+                                       on_delta=deltas.append)
+
+        assert "".join(deltas) == 'Say "hi"'
+        assert deltas == ["Say ", '"hi"']
+        assert result.answer == 'Say "hi"'
+        _, kwargs = mock_stream.call_args
+        assert [message["role"] for message in kwargs["input"]] == ["system", "user", "user", "assistant", "user"]
+
+    def test_partial_json_string(self):
+        assert partial_json_string('{"question": "Q", "ans', "answer") is None
+        assert partial_json_string('{"question": "Q", "answer": "Hel', "answer") == "Hel"
+        assert partial_json_string('{"answer": "x\\u00e4y\\u00', "answer") == "xäy"
+        assert partial_json_string('{"answer": "done", "sources": []}', "answer") == "done"
+
+    def test_concatinate_content_is_order_independent(self, service, sample_data):
+        reversed_data = dict(reversed(list(sample_data.items())))
+
+        assert service._concatinate_content(sample_data) == service._concatinate_content(reversed_data)
+
+
+class TestOpenAIServiceAgainstFakeServer:
+
+    @pytest.fixture
+    def caller(self):
+        return ResilientCaller(
+            breaker=CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4, open_seconds=60),
+            latency_tracker=LatencyTracker(min_samples=1),
+            attempt_timeout=0.5,
+            max_attempts=3,
+            backoff_base=0.01,
+            backoff_max=0.05,
+        )
+
+    @pytest.fixture
+    def service(self, caller, monkeypatch):
+        monkeypatch.setattr('app.services.openai_service.openai_caller', caller)
+        service = OpenAIService()
+        yield service
+        openai.base_url = settings.OPENAI_BASE_URL
+
+    def _ask(self, service, server):
+        openai.base_url = server.base_url
+        return service.answer_question("Q?", {"https://example.com": "Content"})
+
+    def test_retries_server_errors(self, service):
+        with FakeOpenAIServer(script=[("error", 500), ("error", 429)]) as server:
+            result = self._ask(service, server)
+
+        assert result.answer == "A"
+        assert len(server.requests) == 3
+
+    def test_does_not_retry_bad_request(self, service):
+        with FakeOpenAIServer(script=[("error", 400)]) as server:
+            with pytest.raises(openai.BadRequestError):
+                self._ask(service, server)
+
+        assert len(server.requests) == 1
+
+    def test_stuck_connection_times_out(self, service, caller):
+        caller.max_attempts = 1
+        with FakeOpenAIServer(script=[("ok", 2)]) as server:
+            with pytest.raises((AttemptTimeoutError, openai.APITimeoutError)):
+                self._ask(service, server)
+
+    def test_circuit_opens_after_failures(self, service, caller):
+        caller.max_attempts = 1
+        with FakeOpenAIServer(script=[("error", 503)] * 4) as server:
+            for _ in range(4):
+                with pytest.raises(openai.InternalServerError):
+                    self._ask(service, server)
+            with pytest.raises(CircuitOpenError):
+                self._ask(service, server)
+
+        assert len(server.requests) == 4
+
+    def test_hedged_request_cuts_tail_latency(self, service, caller):
+        caller.hedge_enabled = True
+        caller.latency_tracker.record(0.05)
+        with FakeOpenAIServer(script=[("ok", 0.4)]) as server:
+            result = self._ask(service, server)
+
+        assert result.answer == "A"
+        assert len(server.requests) == 2
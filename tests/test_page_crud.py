@@ -110,4 +110,106 @@ class TestPageCrud:
 
         # Assert
         assert page is not None
-        assert page.content == ""
\ No newline at end of file
+        assert page.content == ""
+
+    def test_get_all_pages_ordered_by_url(self):
+        """Test pages are returned in URL order regardless of insert order"""
+        self.page_crud.add_page("https://example.com/b", "B")
+        self.page_crud.add_page("https://example.com/a", "A")
+
+        urls = [page.url for page in self.page_crud.get_all_pages()]
+
+        assert urls == ["https://example.com/a", "https://example.com/b"]
+
+    def test_get_corpus_version_changes_with_corpus(self):
+        """Test corpus version is stable for the same data and changes on insert/delete"""
+        empty_version = self.page_crud.get_corpus_version()
+        self.page_crud.add_page("https://example.com", "Content")
+        version = self.page_crud.get_corpus_version()
+
+        assert version != empty_version
+        assert version == self.page_crud.get_corpus_version()
+
+        self.page_crud.delete_all_pages()
+        assert self.page_crud.get_corpus_version() != version
+
+    def test_upsert_page_updates_in_place_and_changes_version(self):
+        """Test refreshing a page updates its row and the corpus version, an identical page changes nothing"""
+        page, status = self.page_crud.upsert_page("https://example.com", "Old content")
+        assert status == "created"
+        version = self.page_crud.get_corpus_version()
+
+        updated, status = self.page_crud.upsert_page("https://example.com", "New content", language="en")
+
+        assert status == "updated"
+        assert updated.id == page.id
+        assert updated.revision == 1
+        assert self.page_crud.get_corpus_version() != version
+
+        version = self.page_crud.get_corpus_version()
+        _, status = self.page_crud.upsert_page("https://example.com", "New content", language="en")
+        assert status == "unchanged"
+        assert self.page_crud.get_corpus_version() == version
+
+    def test_delete_page(self):
+        """Test deleting the page of a single URL"""
+        self.page_crud.add_page("https://example.com/a", "A")
+        self.page_crud.add_page("https://example.com/b", "B")
+
+        assert self.page_crud.delete_page("https://example.com/a") is True
+        assert self.page_crud.delete_page("https://example.com/a") is False
+        assert self.page_crud.get_urls() == {"https://example.com/b"}
+
+    def test_get_urls_and_total_content_length(self):
+        """Test crawl progress queries used when resuming a crawl"""
+        assert self.page_crud.get_urls() == set()
+        assert self.page_crud.get_total_content_length() == 0
+
+        self.page_crud.add_page("https://example.com/a", "Hello")
+        self.page_crud.add_page("https://example.com/b", "World!")
+
+        assert self.page_crud.get_urls() == {"https://example.com/a", "https://example.com/b"}
+        assert self.page_crud.get_total_content_length() == 11
+
+    def test_iter_pages_spans_batches(self):
+        """Test keyset paging returns every page exactly once in id order"""
+        for i in range(5):
+            self.page_crud.add_page(f"https://example.com/{4 - i}", f"Content {i}")
+
+        pages = list(self.page_crud.iter_pages(batch_size=2))
+
+        assert [page.content for page in pages] == [f"Content {i}" for i in range(5)]
+
+    def test_iter_pages_defers_content(self):
+        """Test projection without content only loads it when accessed"""
+        self.page_crud.add_page("https://example.com/a", "Content A")
+        self.db.expunge_all()
+
+        page = next(self.page_crud.iter_pages(with_content=False))
+
+        assert "content" not in page.__dict__
+        assert page.url == "https://example.com/a"
+        assert page.content == "Content A"
+
+    def test_iter_page_rows_in_url_order(self):
+        """Test Core tuple stream is ordered by URL across batches"""
+        for url in ["https://example.com/c", "https://example.com/a", "https://example.com/b"]:
+            self.page_crud.add_page(url, url[-1], summary=f"Summary {url[-1]}", language="en")
+
+        rows = list(self.page_crud.iter_page_rows(batch_size=2))
+
+        assert rows == [
+            ("https://example.com/a", "a", "Summary a", "en"),
+            ("https://example.com/b", "b", "Summary b", "en"),
+            ("https://example.com/c", "c", "Summary c", "en"),
+        ]
+
+    def test_iter_page_sizes(self):
+        """Test size projection computes lengths in the database"""
+        first = self.page_crud.add_page("https://example.com/a", "Hello")
+        second = self.page_crud.add_page("https://example.com/b", "")
+
+        assert list(self.page_crud.iter_page_sizes(batch_size=1)) == [
+            (first.id, "https://example.com/a", 5),
+            (second.id, "https://example.com/b", 0),
+        ]
@@ -0,0 +1,48 @@
+import pytest
+
+from app.cruds.page_link_crud import PageLinkCrud
+
+
+class TestPageLinkCrud:
+    @pytest.fixture(autouse=True)
+    def setup(self, setup_test_database):
+        self.db = setup_test_database
+        self.link_crud = PageLinkCrud(self.db)
+
+        yield
+
+        self.db.close()
+
+    def test_replace_links_drops_duplicates_and_self_links(self):
+        """Test a page's links are stored once each, without links to itself"""
+        self.link_crud.replace_links("https://example.com/", [
+            "https://example.com/a", "https://example.com/", "https://example.com/a", "https://example.com/b",
+        ])
+
+        assert list(self.link_crud.iter_links()) == [
+            ("https://example.com/", "https://example.com/a"),
+            ("https://example.com/", "https://example.com/b"),
+        ]
+
+    def test_replace_links_replaces_previous_links(self):
+        """Test storing a page's links again (refresh) replaces only that page's links"""
+        self.link_crud.replace_links("https://example.com/", ["https://example.com/a"])
+        self.link_crud.replace_links("https://example.com/a", ["https://example.com/"])
+
+        self.link_crud.replace_links("https://example.com/", ["https://example.com/c"])
+
+        assert sorted(self.link_crud.iter_links(batch_size=1)) == [
+            ("https://example.com/", "https://example.com/c"),
+            ("https://example.com/a", "https://example.com/"),
+        ]
+
+    def test_delete_links(self):
+        """Test deleting one page's links and the whole graph"""
+        self.link_crud.replace_links("https://example.com/", ["https://example.com/a"])
+        self.link_crud.replace_links("https://example.com/a", ["https://example.com/"])
+
+        self.link_crud.delete_links("https://example.com/")
+        assert list(self.link_crud.iter_links()) == [("https://example.com/a", "https://example.com/")]
+
+        self.link_crud.delete_all_links()
+        assert list(self.link_crud.iter_links()) == []
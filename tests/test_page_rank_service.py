@@ -0,0 +1,67 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from app.cruds.page_crud import PageCrud
+from app.cruds.page_link_crud import PageLinkCrud
+from app.services.page_rank_service import PageRankService, page_rank
+
+
+class TestPageRank:
+
+    def test_cycle_ranks_pages_equally(self):
+        ranks = page_rank(np.array([0, 1, 2]), np.array([1, 2, 0]), 3)
+
+        assert ranks == pytest.approx([1 / 3] * 3)
+
+    def test_linked_page_ranks_highest(self):
+        # 1, 2 and 3 link to 0, 0 links to 1, 3 is linked by nobody
+        ranks = page_rank(np.array([1, 2, 3, 0]), np.array([0, 0, 0, 1]), 4)
+
+        assert ranks.sum() == pytest.approx(1.0)
+        assert ranks.argmax() == 0
+        assert ranks[1] > ranks[2] == pytest.approx(ranks[3])
+
+    def test_dangling_pages_and_no_links(self):
+        # 0 -> 1, page 1 has no outgoing links
+        ranks = page_rank(np.array([0]), np.array([1]), 2)
+        assert ranks.sum() == pytest.approx(1.0)
+        assert ranks[1] > ranks[0]
+
+        assert page_rank(np.array([], dtype=np.int64), np.array([], dtype=np.int64), 2) == pytest.approx([0.5, 0.5])
+        assert len(page_rank(np.array([], dtype=np.int64), np.array([], dtype=np.int64), 0)) == 0
+
+
+class TestPageRankService:
+
+    def test_run_stores_importance_and_changes_corpus_version(self, setup_test_database):
+        page_crud = PageCrud(setup_test_database)
+        link_crud = PageLinkCrud(setup_test_database)
+        for url in ("https://example.com/", "https://example.com/a", "https://example.com/b"):
+            page_crud.add_page(url, f"Content of {url}")
+        link_crud.replace_links("https://example.com/", ["https://example.com/a", "https://example.com/b"])
+        link_crud.replace_links("https://example.com/a", ["https://example.com/", "https://example.com/missing"])
+        link_crud.replace_links("https://example.com/b", ["https://example.com/"])
+        version = page_crud.get_corpus_version()
+
+        importance = PageRankService().run(setup_test_database)
+
+        assert page_crud.get_page_importance() == pytest.approx(importance)
+        assert sum(importance.values()) == pytest.approx(3.0)
+        assert max(importance, key=importance.get) == "https://example.com/"
+        assert page_crud.get_corpus_version() != version
+
+
+class TestCrawlLinkGraph:
+
+    def test_crawl_records_internal_links(self, run_crawl, local_site, tmp_path):
+        run_crawl()
+
+        with sqlite3.connect(tmp_path / "crawl.db") as connection:
+            links = set(connection.execute("SELECT source_url, target_url FROM page_links").fetchall())
+        assert links == {
+            (local_site.url, local_site.url + "about.html"),
+            (local_site.url, local_site.url + "contact.html"),
+            (local_site.url + "about.html", local_site.url),
+        }
@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import Mock, patch
+
+from app.cruds.precomputed_answer_crud import PrecomputedAnswerCrud
+from app.cruds.question_log_crud import QuestionLogCrud
+from app.dtos.ask_response import AskResponse, Usage
+from app.services.corpus_service import CorpusSnapshot
+from app.services.precompute_service import PrecomputeService
+from app.services.validation_service import ValidationService
+
+
+def log_entry(question):
+    return {
+        "question": question, "question_key": ValidationService.normalize_question(question), "answer": "A",
+        "sources": "[]", "answer_source": "llm", "latency_ms": 1.0,
+    }
+
+
+class TestPrecomputeService:
+
+    @pytest.fixture
+    def mock_app_service(self):
+        app_service = Mock()
+        app_service.corpus_service.get_snapshot.return_value = CorpusSnapshot("v2", {"https://example.com": "Content"})
+
+        def generate_answer(question, snapshot):
+            if question == "broken?":
+                raise Exception("OpenAI API error")
+            return AskResponse(question=question, answer=f"answer to {question}", sources=[],
+                               usage=Usage(input_tokens=1, output_tokens=1))
+
+        app_service.generate_answer.side_effect = generate_answer
+        return app_service
+
+    def test_get_questions_deduplicates(self, setup_test_database):
+        with patch('app.services.precompute_service.settings.PRECOMPUTE_QUESTIONS',
+                   ["How to contact?", "how to contact", "Prices?"]), \
+                patch('app.services.precompute_service.settings.PRECOMPUTE_TOP_N', 5):
+            assert PrecomputeService().get_questions(setup_test_database) == ["How to contact?", "Prices?"]
+
+    def test_get_questions_prefers_question_log(self, setup_test_database):
+        QuestionLogCrud(setup_test_database).add_entries([
+            log_entry("Where are you located?"), log_entry("where are you located"), log_entry("Prices?"),
+        ])
+        with patch('app.services.precompute_service.settings.PRECOMPUTE_QUESTIONS', ["How to contact?"]), \
+                patch('app.services.precompute_service.settings.PRECOMPUTE_TOP_N', 2):
+            assert PrecomputeService().get_questions(setup_test_database) == ["Where are you located?", "Prices?"]
+
+    def test_run_stores_answers_for_current_version(self, mock_app_service, setup_test_database):
+        with patch('app.services.precompute_service.AppService', return_value=mock_app_service), \
+                patch('app.services.precompute_service.get_db', return_value=iter([setup_test_database])), \
+                patch('app.services.precompute_service.settings.PRECOMPUTE_QUESTIONS', ["Prices?", "broken?"]):
+            crud = PrecomputedAnswerCrud(setup_test_database)
+            crud.add_answer("v1", "prices", "Prices?", "{}")
+
+            stored = PrecomputeService().run()
+
+        assert stored == 1
+        answer = crud.get_answer("v2", ValidationService.normalize_question("prices"))
+        assert AskResponse.model_validate_json(answer.response).answer == "answer to Prices?"
+        assert crud.get_answer("v1", "prices") is None
+
+
+class TestNormalizeQuestion:
+
+    def test_normalize_question(self):
+        assert ValidationService.normalize_question("  How  can I\tcontact you?? ") == "how can i contact you"
@@ -0,0 +1,124 @@
+import json
+import os
+import queue
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db.models.question_log import QuestionLog
+from app.services.metrics_service import MetricsService
+from app.services.question_log_service import QuestionLogService
+
+
+def make_entry(question="What is AI?"):
+    return {
+        "question": question,
+        "question_key": question.lower(),
+        "answer": "AI is artificial intelligence.",
+        "sources": json.dumps(["https://example.com"]),
+        "answer_source": "llm",
+        "corpus_version": "v1",
+        "input_tokens": 10,
+        "output_tokens": 5,
+        "cached_input_tokens": 0,
+        "latency_ms": 12.5,
+        "created_at": datetime(2025, 1, 1, 12, 0, 0),
+    }
+
+
+class TestQuestionLogService:
+
+    @pytest.fixture
+    def session_factory(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'log.db'}")
+        Base.metadata.create_all(engine)
+        return sessionmaker(bind=engine)
+
+    @pytest.fixture(autouse=True)
+    def setup(self, session_factory, tmp_path):
+        MetricsService.reset()
+        # Entries queued by other tests (AppService logs every answer) must not be flushed here
+        while not QuestionLogService._queue.empty():
+            QuestionLogService._queue.get_nowait()
+        self.spill_path = str(tmp_path / "spill.jsonl")
+        with patch('app.services.question_log_service.get_db', side_effect=lambda: iter([session_factory()])), \
+                patch('app.services.question_log_service.settings.QUESTION_LOG_SPILL_PATH', self.spill_path), \
+                patch('app.services.question_log_service.settings.QUESTION_LOG_FLUSH_SECONDS', 0.05):
+            yield
+
+    def _count_rows(self, session_factory):
+        session = session_factory()
+        try:
+            return session.query(QuestionLog).count()
+        finally:
+            session.close()
+
+    def test_background_writer_flushes_on_stop(self, session_factory):
+        QuestionLogService.start()
+        for i in range(5):
+            QuestionLogService.log(make_entry(f"Question {i}?"))
+        QuestionLogService.stop()
+
+        assert self._count_rows(session_factory) == 5
+        assert MetricsService.snapshot()["question_log.written"] == 5
+
+    def test_failed_write_spills_and_replays(self, session_factory):
+        with patch('app.services.question_log_service.QuestionLogCrud.add_entries', side_effect=Exception("DB down")):
+            assert QuestionLogService._write([make_entry()]) is False
+
+        with open(self.spill_path) as spill_file:
+            assert json.loads(spill_file.readline())["question"] == "What is AI?"
+
+        assert QuestionLogService._write([make_entry("Second?")]) is True
+        assert self._count_rows(session_factory) == 2
+        assert MetricsService.snapshot()["question_log.replayed"] == 1
+
+    def test_corrupt_spill_line_is_quarantined(self, session_factory):
+        QuestionLogService._overflow([make_entry("First?")])
+        with open(self.spill_path, "a") as spill_file:
+            spill_file.write('{"question": "Trunc')
+        QuestionLogService._overflow([make_entry("Second?")])
+
+        QuestionLogService._replay_spill()
+
+        assert self._count_rows(session_factory) == 1
+        with open(self.spill_path + ".corrupt") as corrupt_file:
+            assert corrupt_file.read().startswith('{"question": "Trunc')
+        assert not os.path.exists(self.spill_path + ".replay")
+
+    def test_interrupted_replay_is_extended_not_replaced(self, session_factory):
+        with open(self.spill_path + ".replay", "w") as replay_file:
+            replay_file.write(json.dumps(make_entry("Left over?"), default=datetime.isoformat) + "\n")
+        QuestionLogService._overflow([make_entry("New?")])
+
+        QuestionLogService._replay_spill()
+
+        assert self._count_rows(session_factory) == 2
+        assert not os.path.exists(self.spill_path + ".replay")
+
+    def test_replay_error_does_not_stop_writer(self, session_factory):
+        QuestionLogService._overflow([make_entry()])
+
+        with patch.object(QuestionLogService, '_replay_spill', side_effect=OSError("disk error")):
+            QuestionLogService.start()
+            QuestionLogService.log(make_entry("Still written?"))
+            QuestionLogService.stop()
+
+        assert self._count_rows(session_factory) == 1
+
+    def test_drop_policy(self):
+        with patch('app.services.question_log_service.settings.QUESTION_LOG_OVERFLOW_POLICY', "drop"):
+            QuestionLogService._overflow([make_entry(), make_entry()])
+
+        assert MetricsService.snapshot()["question_log.dropped"] == 2
+
+    def test_full_queue_does_not_block(self):
+        with patch.object(QuestionLogService, '_queue', queue.Queue(maxsize=1)):
+            QuestionLogService.log(make_entry())
+            QuestionLogService.log(make_entry())
+
+        assert MetricsService.snapshot()["question_log.spilled"] == 1
@@ -0,0 +1,221 @@
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.cruds.crawl_lease_crud import CrawlLeaseCrud
+from app.cruds.precomputed_answer_crud import PrecomputedAnswerCrud
+from app.dtos.refresh_response import RefreshResponse, RefreshResult
+from app.services.corpus_service import CorpusService
+from app.services.crawler_service import CRAWL_LEASE_NAME
+from app.services.refresh_service import RefreshService
+
+
+class TestRefreshService:
+
+    @pytest.fixture
+    def service(self, setup_test_database, local_site, monkeypatch):
+        """RefreshService on an in-memory database, refreshing pages of `local_site`"""
+        monkeypatch.setattr(settings, "DOMAIN", "localhost")
+        CorpusService.invalidate()
+        yield RefreshService(setup_test_database)
+        CorpusService.invalidate()
+
+    @pytest.fixture
+    def site_file(self, tmp_path):
+        return lambda name: tmp_path / "site" / name
+
+    def test_refresh_stores_pages_like_the_spider(self, service, local_site):
+        response = service.refresh([local_site.url, local_site.url + "about.html"])
+
+        assert [result.status for result in response.results] == ["created", "created"]
+        snapshot = service.corpus_service.get_snapshot()
+        assert snapshot.version == response.corpus_version
+        assert snapshot.pages[local_site.url] == "Home Welcome. We offer consulting. About Contact"
+
+    def test_update_reindexes_only_the_changed_page(self, service, local_site, site_file):
+        service.refresh([local_site.url, local_site.url + "about.html", local_site.url + "contact.html"])
+        previous = service.corpus_service.get_snapshot()
+        site_file("about.html").write_text("<html><body><p>We now teach robotics.</p></body></html>")
+
+        response = service.refresh([local_site.url + "about.html"])
+
+        snapshot = service.corpus_service.get_snapshot()
+        assert response.results[0].status == "updated"
+        assert snapshot.version != previous.version
+        assert snapshot.index.reindexed == 1
+        assert [url for url, _ in snapshot.index.search("robotics")] == [local_site.url + "about.html"]
+        assert not snapshot.index.search("small team")
+
+    def test_unchanged_page_keeps_version(self, service, local_site):
+        version = service.refresh([local_site.url]).corpus_version
+
+        response = service.refresh([local_site.url])
+
+        assert response.results[0].status == "unchanged"
+        assert response.corpus_version == version
+
+    def test_missing_page_is_deleted(self, service, local_site, site_file):
+        service.refresh([local_site.url + "contact.html"])
+        site_file("contact.html").unlink()
+
+        assert service.refresh([local_site.url + "contact.html"]).results[0].status == "deleted"
+        assert service.refresh([local_site.url + "contact.html"]).results[0].status == "not_found"
+        assert not service.corpus_service.get_snapshot().pages
+
+    def test_other_domains_are_not_fetched(self, service, local_site):
+        with patch.object(service, "fetch") as fetch:
+            results = service.refresh(["https://example.com/", "http://localhost.evil.com/"]).results
+
+        assert [result.status for result in results] == ["skipped", "skipped"]
+        fetch.assert_not_called()
+
+    def test_redirect_to_another_host_is_not_followed(self, service, local_site):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(302)
+                self.send_header("Location", local_site.url.replace("localhost", "127.0.0.1"))
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("localhost", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            result = service.refresh([f"http://localhost:{server.server_address[1]}/moved"]).results[0]
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert result.status == "skipped"
+        assert result.detail == f"Redirected to {local_site.url.replace('localhost', '127.0.0.1')}"
+        assert local_site.requested == []
+
+    def test_response_size_is_capped(self, service, local_site, monkeypatch):
+        monkeypatch.setattr(settings, "REFRESH_MAX_RESPONSE_BYTES", 10)
+
+        result = service.refresh([local_site.url]).results[0]
+
+        assert result.status == "failed"
+        assert "larger than 10 bytes" in result.detail
+        assert not service.page_crud.get_urls()
+
+    def test_page_over_budget_is_not_stored(self, service, local_site, monkeypatch):
+        monkeypatch.setattr(settings, "MAX_CONTENT_SIZE", 10)
+
+        response = service.refresh([local_site.url])
+
+        assert response.results[0].status == "over_budget"
+        assert not service.page_crud.get_urls()
+
+    def test_rejected_while_crawl_is_running(self, service, local_site):
+        CrawlLeaseCrud(service.db).try_acquire(CRAWL_LEASE_NAME, "crawler", 60)
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.refresh([local_site.url])
+
+        assert exc_info.value.status_code == 409
+
+    def test_invalid_url_lists_are_rejected(self, service):
+        with pytest.raises(HTTPException) as exc_info:
+            service.refresh(["  "])
+        assert exc_info.value.status_code == 400
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.refresh([f"http://localhost/{i}" for i in range(settings.REFRESH_MAX_URLS + 1)])
+        assert exc_info.value.status_code == 400
+
+    def test_unaffected_precomputed_answers_are_carried_over(self, service, local_site, site_file):
+        version = service.refresh([local_site.url, local_site.url + "about.html"]).corpus_version
+        answer_crud = PrecomputedAnswerCrud(service.db)
+        for key, question, sources in (
+                ("team", "Who is in the team?", [local_site.url + "about.html"]),
+                ("welcome", "Do you offer consulting?", [local_site.url]),
+                ("robotics", "Do you teach robotics?", []),
+        ):
+            answer_crud.add_answer(version, key, question, json.dumps({"sources": sources}))
+        site_file("about.html").write_text("<html><body><p>We now teach robotics.</p></body></html>")
+
+        new_version = service.refresh([local_site.url + "about.html"]).corpus_version
+
+        assert [answer.question_key for answer in answer_crud.get_answers(new_version)] == ["welcome"]
+        assert answer_crud.get_answers(version) == []
+
+    def test_stop_words_do_not_drop_precomputed_answers(self, service, local_site, site_file):
+        version = service.refresh([local_site.url, local_site.url + "about.html"]).corpus_version
+        answer_crud = PrecomputedAnswerCrud(service.db)
+        # "how", "are" and "we" occur in the old or new about page, "charging" and "consulting" do not
+        answer_crud.add_answer(version, "price", "How much are we charging for consulting?",
+                               json.dumps({"sources": [local_site.url]}))
+        site_file("about.html").write_text("<html><body><p>How we work: we now teach robotics.</p></body></html>")
+
+        new_version = service.refresh([local_site.url + "about.html"]).corpus_version
+
+        assert [answer.question_key for answer in answer_crud.get_answers(new_version)] == ["price"]
+
+
+class TestRefreshEndpoints:
+
+    @pytest.fixture
+    def mock_refresh_service(self):
+        with patch("app.api.routes.admin.RefreshService") as mock_service_class:
+            mock_service = MagicMock()
+            mock_service_class.return_value = mock_service
+            mock_service_class.validate_urls.side_effect = RefreshService.validate_urls
+            mock_service.crawl_running.return_value = False
+            mock_service.refresh.return_value = RefreshResponse(
+                corpus_version="v2", results=[RefreshResult(url="https://tehisintellekt.ee/", status="updated")]
+            )
+            yield mock_service
+
+    def test_admin_refresh_requires_token(self, client, mock_refresh_service, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", None)
+        assert client.post("/admin/refresh", json={"urls": ["https://tehisintellekt.ee/"]}).status_code == 503
+
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+        response = client.post("/admin/refresh", json={"urls": ["https://tehisintellekt.ee/"]},
+                               headers={"Authorization": "Bearer wrong"})
+        assert response.status_code == 401
+        mock_refresh_service.refresh.assert_not_called()
+
+    def test_admin_refresh(self, client, mock_refresh_service, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+
+        response = client.post("/admin/refresh", json={"urls": ["https://tehisintellekt.ee/"]},
+                               headers={"Authorization": "Bearer secret"})
+
+        assert response.status_code == 200
+        assert response.json()["corpus_version"] == "v2"
+        mock_refresh_service.refresh.assert_called_once_with(["https://tehisintellekt.ee/"])
+        mock_refresh_service.db.close.assert_called_once()
+
+    def test_webhook_checks_signature_and_refreshes_in_background(self, client, mock_refresh_service, monkeypatch):
+        monkeypatch.setattr(settings, "REFRESH_WEBHOOK_SECRET", "hook-secret")
+        body = json.dumps({"urls": ["https://tehisintellekt.ee/"]}).encode()
+        signature = "sha256=" + hmac.new(b"hook-secret", body, hashlib.sha256).hexdigest()
+
+        rejected = client.post("/webhooks/refresh", content=body, headers={"X-Webhook-Signature": "sha256=00"})
+        accepted = client.post("/webhooks/refresh", content=body, headers={"X-Webhook-Signature": signature})
+
+        assert rejected.status_code == 401
+        assert accepted.status_code == 202
+        assert accepted.json() == {"accepted": 1}
+        mock_refresh_service.refresh.assert_called_once_with(["https://tehisintellekt.ee/"])
+
+    def test_webhook_rejects_while_crawl_is_running(self, client, mock_refresh_service, monkeypatch):
+        monkeypatch.setattr(settings, "REFRESH_WEBHOOK_SECRET", "hook-secret")
+        mock_refresh_service.crawl_running.return_value = True
+        body = json.dumps({"urls": ["https://tehisintellekt.ee/"]}).encode()
+        signature = "sha256=" + hmac.new(b"hook-secret", body, hashlib.sha256).hexdigest()
+
+        response = client.post("/webhooks/refresh", content=body, headers={"X-Webhook-Signature": signature})
+
+        assert response.status_code == 409
+        mock_refresh_service.refresh.assert_not_called()
@@ -0,0 +1,265 @@
+import threading
+import time
+
+import pytest
+
+from app.services.resilience_service import (
+    AttemptTimeoutError, Cancellation, CircuitBreaker, CircuitOpenError, LatencyTracker, RequestCancelledError,
+    ResilientCaller,
+)
+
+
+class TransientError(Exception):
+    pass
+
+
+def make_caller(**overrides):
+    options = dict(
+        breaker=CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4, open_seconds=60),
+        latency_tracker=LatencyTracker(min_samples=3),
+        attempt_timeout=1.0,
+        max_attempts=3,
+        backoff_base=0.0,
+        backoff_max=0.0,
+        is_retryable=lambda e: isinstance(e, (TransientError, TimeoutError)),
+    )
+    options.update(overrides)
+    return ResilientCaller(**options)
+
+
+class TestCircuitBreaker:
+
+    def test_opens_on_failure_rate(self):
+        breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4, open_seconds=60)
+        for _ in range(2):
+            breaker.record_success()
+            breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+
+    def test_stays_closed_below_min_calls(self):
+        breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4, open_seconds=60)
+        breaker.record_failure()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_probe_closes_circuit(self):
+        breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=2, min_calls=2, open_seconds=0)
+        breaker.record_failure()
+        breaker.record_failure()
+
+        assert breaker.allow_request() is True
+        assert breaker.allow_request() is False  # only one probe while half-open
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_probe_failure_reopens(self):
+        breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=2, min_calls=2, open_seconds=0)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.allow_request()
+
+        breaker.record_failure()
+
+        assert breaker._state == CircuitBreaker.OPEN
+
+
+class TestResilientCaller:
+
+    def test_retries_transient_errors(self):
+        calls = []
+
+        def flaky(timeout):
+            calls.append(timeout)
+            if len(calls) < 3:
+                raise TransientError()
+            return "ok"
+
+        assert make_caller().call(flaky) == "ok"
+        assert len(calls) == 3
+
+    def test_does_not_retry_client_errors(self):
+        calls = []
+
+        def bad_request(timeout):
+            calls.append(timeout)
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            make_caller().call(bad_request)
+        assert len(calls) == 1
+
+    def test_attempt_deadline(self):
+        caller = make_caller(attempt_timeout=0.05, max_attempts=2)
+        started = time.monotonic()
+
+        with pytest.raises(AttemptTimeoutError):
+            caller.call(lambda timeout: time.sleep(0.5))
+        assert time.monotonic() - started < 0.4
+
+    def test_open_circuit_fails_fast(self):
+        caller = make_caller()
+        for _ in range(4):
+            caller.breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError):
+            caller.call(lambda timeout: "ok")
+
+    def test_hedged_request_wins_over_slow_primary(self):
+        caller = make_caller(hedge_enabled=True, hedge_min_delay=0.01)
+        for _ in range(3):
+            caller.latency_tracker.record(0.01)
+        calls = []
+        lock = threading.Lock()
+
+        def first_call_stuck(timeout):
+            with lock:
+                calls.append(timeout)
+                is_first = len(calls) == 1
+            if is_first:
+                time.sleep(0.5)
+                return "primary"
+            return "hedge"
+
+        started = time.monotonic()
+        assert caller.call(first_call_stuck) == "hedge"
+        assert time.monotonic() - started < 0.4
+        assert len(calls) == 2
+
+    def test_queued_attempt_is_dropped_after_timeout(self):
+        caller = make_caller(attempt_timeout=0.1, max_attempts=1, max_workers=1)
+        calls = []
+
+        def occupy_pool():
+            with pytest.raises(AttemptTimeoutError):
+                caller.call(lambda timeout: time.sleep(0.4))
+
+        threading.Thread(target=occupy_pool, daemon=True).start()
+        time.sleep(0.02)
+        with pytest.raises(AttemptTimeoutError):
+            caller.call(calls.append)
+
+        time.sleep(0.5)
+        assert calls == []
+
+    def test_queued_attempt_gets_the_time_left(self):
+        caller = make_caller(attempt_timeout=1.0, max_attempts=1, max_workers=1)
+        timeouts = []
+
+        threading.Thread(target=lambda: caller.call(lambda timeout: time.sleep(0.3)), daemon=True).start()
+        time.sleep(0.02)
+        caller.call(timeouts.append)
+
+        assert timeouts[0] < 0.8
+
+    def test_no_hedge_without_latency_history(self):
+        caller = make_caller(hedge_enabled=True, hedge_min_delay=0.01)
+
+        assert caller.hedge_delay() is None
+
+
+class TestCancellation:
+
+    def test_deadline_cancels(self):
+        cancellation = Cancellation(timeout=0.05)
+
+        assert not cancellation.cancelled
+        time.sleep(0.06)
+        assert cancellation.cancelled
+        assert cancellation.reason == "deadline"
+
+    def test_check_raises_with_stage_and_saved_tokens(self):
+        cancellation = Cancellation()
+        cancellation.cancel("disconnect")
+        cancellation.cancel("deadline")
+
+        with pytest.raises(RequestCancelledError) as exc_info:
+            cancellation.check("llm_queued", tokens_saved=500)
+
+        assert exc_info.value.reason == "disconnect"
+        assert exc_info.value.stage == "llm_queued"
+        assert exc_info.value.tokens_saved == 500
+
+    def test_child_fires_at_own_deadline_or_with_parent(self):
+        parent = Cancellation(timeout=10)
+        child = Cancellation(timeout=60, parent=parent)
+        assert child.deadline == parent.deadline
+
+        short = Cancellation(timeout=0.05, parent=parent)
+        time.sleep(0.06)
+        assert short.cancelled and not parent.cancelled
+
+        parent.cancel("disconnect")
+        assert child.cancelled
+        assert child.reason == "disconnect"
+
+    def test_caller_stops_waiting_on_cancel(self):
+        caller = make_caller(attempt_timeout=5.0)
+        cancellation = Cancellation()
+        threading.Timer(0.1, cancellation.cancel, args=("disconnect",)).start()
+
+        started = time.monotonic()
+        with pytest.raises(RequestCancelledError) as exc_info:
+            caller.call(lambda timeout: time.sleep(2), cancellation=cancellation)
+
+        assert time.monotonic() - started < 1.0
+        assert exc_info.value.stage == "llm"
+        assert caller.breaker.state == CircuitBreaker.CLOSED
+
+    def test_attempt_is_capped_at_deadline(self):
+        caller = make_caller(attempt_timeout=5.0)
+        timeouts = []
+
+        def slow(timeout):
+            timeouts.append(timeout)
+            time.sleep(1)
+
+        with pytest.raises(RequestCancelledError) as exc_info:
+            caller.call(slow, cancellation=Cancellation(timeout=0.2))
+
+        assert timeouts[0] <= 0.2
+        assert exc_info.value.reason == "deadline"
+        assert len(timeouts) == 1
+
+    def test_abandoned_attempts_count_toward_latency(self):
+        caller = make_caller(attempt_timeout=5.0, max_attempts=1)
+
+        with pytest.raises(RequestCancelledError):
+            caller.call(lambda timeout: time.sleep(1), cancellation=Cancellation(timeout=0.2))
+        disconnected = Cancellation()
+        threading.Timer(0.05, disconnected.cancel, args=("disconnect",)).start()
+        with pytest.raises(RequestCancelledError):
+            caller.call(lambda timeout: time.sleep(1), cancellation=disconnected)
+
+        # Only the deadline is recorded, a client that left says nothing about the provider's latency
+        assert len(caller.latency_tracker._samples) == 1
+        assert caller.latency_tracker._samples[0] >= 0.2
+
+    def test_cancelled_half_open_probe_is_released(self):
+        caller = make_caller(breaker=CircuitBreaker(failure_rate_threshold=0.5, window_size=2, min_calls=2,
+                                                    open_seconds=0))
+        caller.breaker.record_failure()
+        caller.breaker.record_failure()
+
+        with pytest.raises(RequestCancelledError):
+            caller.call(lambda timeout: time.sleep(1), cancellation=Cancellation(timeout=0.05))
+
+        assert caller.call(lambda timeout: "ok") == "ok"
+        assert caller.breaker.state == CircuitBreaker.CLOSED
+
+    def test_no_retry_after_cancel(self):
+        caller = make_caller(backoff_base=10.0, backoff_max=10.0)
+        cancellation = Cancellation()
+        calls = []
+
+        def failing(timeout):
+            calls.append(timeout)
+            cancellation.cancel("disconnect")
+            raise TransientError()
+
+        with pytest.raises(RequestCancelledError):
+            caller.call(failing, cancellation=cancellation)
+
+        assert len(calls) == 1
@@ -1,30 +1,62 @@
+import asyncio
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 from fastapi import HTTPException
 
+from app.api.routes.info import request_timeout, watch_disconnect
+from app.config import settings
 from app.dtos.ask_response import AskResponse, Usage
+from app.services.corpus_service import CorpusSnapshot
+from app.services.resilience_service import Cancellation
+from app.services.source_info_service import SourceInfoService
 
 
 class TestSourceInfoEndpoint:
 
-    def test_get_source_info_success(self, client):
-        """Test successful retrieval of source info"""
-        # Use patch to mock the service in the actual route
+    @pytest.fixture
+    def source_info_file(self, tmp_path):
+        """Mocked AppService serving a really rendered source info snapshot"""
+        source_info_service = SourceInfoService(str(tmp_path))
+        snapshot = CorpusSnapshot("v1", {
+            "https://example.com/page1": "Content 1",
+            "https://example.com/page2": "Content 2"
+        })
+        source_info_service.render(snapshot)
         with patch('app.api.routes.info.AppService') as mock_service_class:
             mock_service = MagicMock()
             mock_service_class.return_value = mock_service
-            mock_service.get_source_info.return_value = {
-                "https://example.com/page1": "Content 1",
-                "https://example.com/page2": "Content 2"
-            }
+            mock_service.get_source_info_file.side_effect = lambda accept_encoding: source_info_service.get_file(
+                snapshot, accept_encoding)
+            yield mock_service
 
-            response = client.get("/source_info")
+    def test_get_source_info_success(self, client, source_info_file):
+        """Test successful retrieval of source info"""
+        response = client.get("/source_info")
 
-            assert response.status_code == 200
-            assert response.json() == {
-                "https://example.com/page1": "Content 1",
-                "https://example.com/page2": "Content 2"
-            }
+        assert response.status_code == 200
+        assert response.json() == {
+            "https://example.com/page1": "Content 1",
+            "https://example.com/page2": "Content 2"
+        }
+
+    def test_get_source_info_compressed_with_etag(self, client, source_info_file):
+        """Test the precompressed variant matching Accept-Encoding is sent with its ETag"""
+        response = client.get("/source_info", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] == '"v1-gzip"'
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.json()["https://example.com/page1"] == "Content 1"
+
+    def test_get_source_info_not_modified(self, client, source_info_file):
+        """Test a matching If-None-Match gets 304 without a body"""
+        response = client.get("/source_info", headers={"Accept-Encoding": "br", "If-None-Match": '"v1-br"'})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == '"v1-br"'
 
     def test_get_source_info_service_error(self, client):
         """Test get_source_info handles service errors"""
@@ -32,7 +64,7 @@ class TestSourceInfoEndpoint:
             mock_service = MagicMock()
             mock_service_class.return_value = mock_service
             # Make the mock raise the exception
-            mock_service.get_source_info.side_effect = HTTPException(
+            mock_service.get_source_info_file.side_effect = HTTPException(
                 status_code=500,
                 detail="Database connection failed"
             )
@@ -93,4 +125,37 @@ class TestAskQuestionEndpoint:
             response = client.post("/ask", json={"question": "What is AI?"})
 
             assert response.status_code == 500
-            assert "Internal server error" in response.json()["detail"]
\ No newline at end of file
+            assert "Internal server error" in response.json()["detail"]
+
+    def test_ask_question_deadline_from_header(self, client):
+        """Test the X-Request-Timeout header shortens the deadline passed to the service"""
+        with patch('app.api.routes.info.AppService') as mock_service_class:
+            mock_service = MagicMock()
+            mock_service_class.return_value = mock_service
+            mock_service.ask_question.return_value = AskResponse(
+                question="What is AI?", answer="AI", sources=[], usage=Usage(input_tokens=1, output_tokens=1)
+            )
+
+            client.post("/ask", json={"question": "What is AI?"}, headers={"X-Request-Timeout": "2.5"})
+
+            cancellation = mock_service.ask_question.call_args[0][1]
+            assert 0 < cancellation.remaining() <= 2.5
+
+    def test_request_timeout_parsing(self):
+        """Test invalid or longer timeouts fall back to the server default"""
+        assert request_timeout("10") == 10
+        assert request_timeout(None) == settings.ASK_TIMEOUT_SECONDS
+        assert request_timeout("soon") == settings.ASK_TIMEOUT_SECONDS
+        assert request_timeout("-1") == settings.ASK_TIMEOUT_SECONDS
+        assert request_timeout(str(settings.ASK_TIMEOUT_SECONDS * 10)) == settings.ASK_TIMEOUT_SECONDS
+
+    def test_disconnect_cancels_work(self):
+        """Test the disconnect watcher cancels the request once the client is gone"""
+        request = MagicMock()
+        request.is_disconnected = AsyncMock(side_effect=[False, True])
+        cancellation = Cancellation()
+
+        with patch.object(settings, "ASK_DISCONNECT_POLL_SECONDS", 0.01):
+            asyncio.run(watch_disconnect(request, cancellation))
+
+        assert cancellation.reason == "disconnect"
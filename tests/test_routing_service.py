@@ -0,0 +1,44 @@
+import pytest
+
+from app.services.routing_service import RoutingService
+
+ROUTES = [
+    {"name": "degraded", "model": "fast", "max_context_chars": 100, "min_latency_p95_seconds": 10},
+    {"name": "simple", "model": "mini", "max_context_chars": 1000, "max_question_chars": 50, "complex": False,
+     "min_context_chars": 2000},
+    {"name": "default", "model": "big", "max_context_chars": 100000},
+]
+
+
+class TestRoutingService:
+
+    @pytest.fixture
+    def service(self):
+        return RoutingService(ROUTES)
+
+    def test_simple_question_uses_cheap_route(self, service):
+        assert service.choose("What is your phone number?", context_chars=5000).name == "simple"
+
+    def test_comparison_goes_to_default(self, service):
+        assert service.choose("Compare plan A with plan B", context_chars=5000).name == "default"
+
+    def test_multi_part_question_is_complex(self, service):
+        assert RoutingService.is_complex_question("Where are you? What do you do?") is True
+        assert RoutingService.is_complex_question("Mis on teenuste erinevus") is True
+        assert RoutingService.is_complex_question("What is your email?") is False
+
+    def test_long_question_goes_to_default(self, service):
+        question = "Please tell me everything about the services that your company provides to customers"
+
+        assert service.choose(question, context_chars=5000).name == "default"
+
+    def test_small_corpus_is_not_trimmed(self, service):
+        assert service.choose("What is your phone number?", context_chars=500).name == "default"
+
+    def test_high_latency_degrades(self, service):
+        assert service.choose("Compare A and B", context_chars=5000, latency_p95=12).name == "degraded"
+        assert service.choose("Compare A and B", context_chars=5000, latency_p95=None).name == "default"
+
+    def test_empty_table_rejected(self):
+        with pytest.raises(ValueError):
+            RoutingService([])
@@ -0,0 +1,88 @@
+import gzip
+import json
+import os
+import threading
+import time
+
+import brotli
+import pytest
+from unittest.mock import patch
+
+from app.services.corpus_service import CorpusSnapshot
+from app.services.source_info_service import SourceInfoService
+
+
+class TestSourceInfoService:
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        return SourceInfoService(str(tmp_path))
+
+    @pytest.fixture
+    def snapshot(self):
+        return CorpusSnapshot("v1", {"https://example.com/b": "Content B", "https://example.com/a": "Sisu õ"})
+
+    def test_render_writes_all_variants(self, service, snapshot):
+        service.render(snapshot)
+
+        with open(service.path("v1"), "rb") as f:
+            body = f.read()
+        with open(service.path("v1", "gzip"), "rb") as f:
+            assert gzip.decompress(f.read()) == body
+        with open(service.path("v1", "br"), "rb") as f:
+            assert brotli.decompress(f.read()) == body
+        assert list(json.loads(body)) == ["https://example.com/a", "https://example.com/b"]
+        assert json.loads(body)["https://example.com/a"] == "Sisu õ"
+
+    def test_get_file_does_not_wait_for_brotli(self, service, snapshot):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_brotli(version, body):
+            started.set()
+            release.wait(5)
+            SourceInfoService._render_brotli(service, version, body)
+
+        with patch.object(service, '_render_brotli', side_effect=slow_brotli):
+            first = service.get_file(snapshot, "gzip, br")
+            assert started.wait(5)
+            second = service.get_file(snapshot, "br")
+            release.set()
+
+        assert first == (service.path("v1", "gzip"), "gzip", '"v1-gzip"')
+        assert second == (service.path("v1"), None, '"v1-identity"')
+        for _ in range(100):
+            if service.is_rendered("v1"):
+                break
+            time.sleep(0.05)
+        assert service.get_file(snapshot, "gzip, br") == (service.path("v1", "br"), "br", '"v1-br"')
+
+    def test_old_versions_are_pruned(self, service):
+        for version in ("v1", "v2", "v3"):
+            service.render(CorpusSnapshot(version, {"https://example.com": version}))
+
+        assert service.is_rendered("v3")
+        assert service.is_rendered("v2")
+        assert not os.path.exists(service.path("v1"))
+
+    @pytest.mark.parametrize("accept_encoding, encoding", [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0, gzip;q=0.5", "gzip"),
+        ("*", "br"),
+        ("identity", None),
+        (None, None),
+    ])
+    def test_choose_encoding(self, accept_encoding, encoding):
+        assert SourceInfoService.choose_encoding(accept_encoding) == encoding
+
+    def test_choose_encoding_among_rendered(self):
+        assert SourceInfoService.choose_encoding("gzip, br", available=["gzip"]) == "gzip"
+        assert SourceInfoService.choose_encoding("br", available=[]) is None
+
+    def test_etag_matches(self):
+        assert SourceInfoService.etag_matches('"v1-br"', '"v1-br"')
+        assert SourceInfoService.etag_matches('"v0-br", W/"v1-br"', '"v1-br"')
+        assert SourceInfoService.etag_matches("*", '"v1-br"')
+        assert not SourceInfoService.etag_matches('"v1-gzip"', '"v1-br"')
+        assert not SourceInfoService.etag_matches(None, '"v1-br"')
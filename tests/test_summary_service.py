@@ -0,0 +1,47 @@
+from unittest.mock import patch
+
+from app.services.summary_service import SummaryService
+
+
+class TestSummaryService:
+
+    TEXT = (
+        "Tehisintellekt builds machine learning solutions for companies. "
+        "Our machine learning team trains language models for Estonian companies. "
+        "The weather was nice yesterday. "
+        "Contact us at info@example.ee or +372 5555 1234. "
+        "Language models and machine learning consulting starts from 990 EUR."
+    )
+
+    def test_split_sentences(self):
+        assert SummaryService.split_sentences("First one. Second one! Third? 4th.") == [
+            "First one.", "Second one!", "Third?", "4th."
+        ]
+
+    def test_extract_facts(self):
+        facts = SummaryService.extract_facts(self.TEXT)
+
+        assert "info@example.ee" in facts
+        assert "+372 5555 1234" in facts
+        assert "990 EUR" in facts
+
+    def test_central_sentences_rank_higher(self):
+        sentences = SummaryService.split_sentences(self.TEXT)
+
+        scores = SummaryService().rank_sentences(sentences)
+
+        assert scores[1] > scores[2]  # machine learning sentence vs. the off-topic weather sentence
+
+    def test_summarize_is_deterministic_and_bounded(self):
+        service = SummaryService()
+
+        summary = service.summarize(self.TEXT, headings=["Services", "Services", "Contact"], max_chars=200)
+
+        assert summary == service.summarize(self.TEXT, headings=["Services", "Services", "Contact"], max_chars=200)
+        assert len(summary) <= 200
+        assert summary.startswith("Headings: Services | Contact\nFacts: info@example.ee")
+        assert "Our machine learning team trains language models" in summary
+
+    def test_summarize_empty_page(self):
+        with patch('app.services.summary_service.settings.SUMMARY_MAX_CHARS', 100):
+            assert SummaryService().summarize("") == ""